@@ -1,3 +1,4 @@
+import copy
 import json
 import os
 
@@ -9,6 +10,7 @@ class ConfigLoader:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.config_path = os.path.join(current_dir, config_file)
         self.config = self._load_config()
+        self.persistent = True
 
     def _load_config(self):
         """Загружает настройки из JSON"""
@@ -16,10 +18,19 @@ class ConfigLoader:
             return json.load(file)
 
     def save_config(self):
-        """Сохраняет настройки в JSON"""
+        """Сохраняет настройки в JSON (копия из detached() ничего не пишет)"""
+        if not self.persistent:
+            return
         with open(self.config_path, 'w', encoding='utf-8') as file:
             json.dump(self.config, file, indent=2, ensure_ascii=False)
 
+    def detached(self):
+        """Копия настроек, изменения которой никогда не сохраняются (для воспроизведения)"""
+        detached = copy.copy(self)
+        detached.config = copy.deepcopy(self.config)
+        detached.persistent = False
+        return detached
+
     def get(self, *keys, default=None):
         """
         Получает значение из конфига
@@ -0,0 +1,181 @@
+import math
+import multiprocessing
+import queue
+import random
+from collections import namedtuple
+
+from simulation.engine import HeadlessRound, hit_below_17
+from simulation.streaming import Welford
+
+# Последняя оценка советника
+Advice = namedtuple('Advice', ['action', 'ev_hit', 'ev_stand', 'confidence', 'rollouts'])
+
+ROLLOUT_BATCH = 500  # Раздач между проверками отмены и публикацией результата
+
+
+def _rollout_batch(rng, pool, player, player_soft, upcard, stand_value, hit_stats, stand_stats):
+    """
+    Доигрывает позицию ROLLOUT_BATCH раз для каждого действия
+    pool: неизвестные игроку карты (остаток колоды и закрытая карта дилера)
+    """
+    add = HeadlessRound._add
+    randrange = rng.randrange
+    size = len(pool)
+
+    for _ in range(ROLLOUT_BATCH):
+        for action, stats in (('hit', hit_stats), ('stand', stand_stats)):
+            # Выбор без возвращения: вынутая карта переставляется за границу end.
+            # Набор карт в pool не меняется, поэтому копировать его не нужно
+            end = size
+            total, soft = player, player_soft
+
+            if action == 'hit':
+                busted = False
+                while True:
+                    i = randrange(end)
+                    end -= 1
+                    pool[i], pool[end] = pool[end], pool[i]
+                    total, soft = add(total, soft, pool[end])
+                    if total > 21:
+                        busted = True
+                        break
+                    if not hit_below_17(total, soft > 0, upcard):
+                        break
+                if busted:
+                    stats.add(-1)
+                    continue
+
+            # Ход дилера: закрытая карта и добор до stand_value
+            dealer, dealer_soft = add(0, 0, upcard)
+            while dealer < stand_value:
+                i = randrange(end)
+                end -= 1
+                pool[i], pool[end] = pool[end], pool[i]
+                dealer, dealer_soft = add(dealer, dealer_soft, pool[end])
+
+            if dealer > 21 or dealer < total:
+                stats.add(1)
+            elif dealer > total:
+                stats.add(-1)
+            else:
+                stats.add(0)
+
+
+def _rollout_worker(jobs, results, current_job, max_rollouts):
+    """Рабочий процесс: считает задания, пока они не отменены"""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+
+        job_id, player, player_soft, upcard, pool, stand_value, seed = job
+        rng = random.Random(seed)
+        hit_stats = Welford()
+        stand_stats = Welford()
+
+        while current_job.value == job_id and stand_stats.count < max_rollouts:
+            _rollout_batch(rng, pool, player, player_soft, upcard, stand_value, hit_stats, stand_stats)
+            results.put((job_id, hit_stats.mean, hit_stats.stderr(), stand_stats.mean,
+                         stand_stats.stderr(), stand_stats.count))
+
+
+class DecisionAdvisor:
+    """
+    Советник HIT/STAND на основе розыгрышей Монте-Карло
+    Розыгрыши идут в отдельном процессе, поэтому не занимают GIL игрового цикла;
+    каждый кадр забирается последняя частичная оценка
+    """
+
+    def __init__(self, config, max_rollouts=200000):
+        """
+        config: объект ConfigLoader
+        max_rollouts: после скольких розыгрышей на действие оценка считается готовой
+        """
+        self.config = config
+        self.stand_value = config.get('game', 'dealer_stand_value')
+
+        context = multiprocessing.get_context('spawn')
+        self._jobs = context.Queue()
+        self._results = context.Queue()
+        self._current_job = context.Value('i', 0)
+        self._process = context.Process(target=_rollout_worker, daemon=True,
+                                        args=(self._jobs, self._results, self._current_job, max_rollouts))
+        self._process.start()
+
+        self._job_id = 0
+        self._position = None
+        self.advice = None
+
+    def update(self, game_manager):
+        """Вызывается каждый кадр: запускает/отменяет расчет и забирает результат"""
+        if game_manager.get_state() != "playing":
+            self.cancel()
+            return
+
+        position = (id(game_manager), len(game_manager.player.hand), game_manager.deck.cards_remaining())
+        if position != self._position:
+            self._start(game_manager, position)
+
+        self._poll()
+
+    def _start(self, game_manager, position):
+        """Отправляет текущую позицию на расчет"""
+        player = game_manager.player
+        dealer = game_manager.dealer
+
+        total = player.get_hand_value()
+        soft = 1 if player.is_soft() else 0
+        upcard = dealer.hand[1].value
+
+        # Закрытая карта дилера неизвестна игроку - она остается в пуле вместе с колодой
+        pool = [card.value for card in game_manager.deck.cards]
+        pool.append(dealer.hand[0].value)
+
+        self._job_id += 1
+        self._position = position
+        self.advice = None
+        self._current_job.value = self._job_id
+        self._jobs.put((self._job_id, total, soft, upcard, pool, self.stand_value, random.getrandbits(32)))
+
+    def _poll(self):
+        """Забирает накопившиеся результаты без ожидания, оставляя последний"""
+        latest = None
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if result[0] == self._job_id:
+                latest = result
+
+        if latest is None:
+            return
+
+        _, ev_hit, se_hit, ev_stand, se_stand, rollouts = latest
+        action = "HIT" if ev_hit > ev_stand else "STAND"
+
+        # Уверенность: вероятность того, что лучшее действие действительно лучше
+        spread = math.sqrt(se_hit ** 2 + se_stand ** 2)
+        if spread == 0 or math.isinf(spread):
+            confidence = 0.5
+        else:
+            z = abs(ev_hit - ev_stand) / spread
+            confidence = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+
+        self.advice = Advice(action, ev_hit, ev_stand, confidence, rollouts)
+
+    def cancel(self):
+        """Немедленно останавливает текущий расчет (игрок сделал ход)"""
+        if self._position is None:
+            return
+        self._current_job.value = 0
+        self._position = None
+        self.advice = None
+
+    def close(self):
+        """Останавливает рабочий процесс"""
+        self.cancel()
+        self._jobs.put(None)
+        self._process.join(timeout=1)
+        if self._process.is_alive():
+            self._process.terminate()
@@ -0,0 +1,115 @@
+import time
+
+from simulation.analytics import load_policy
+
+
+class BotSeat:
+    """
+    Место бота за столом: решения стратегии (функция или PolicyTable)
+    по состоянию GameManager. Таблице со счетом передается истинный
+    счет Hi-Lo по видимым картам (закрытая карта дилера в него не входит)
+    """
+
+    def __init__(self, policy, bet, name="bot"):
+        """
+        policy: стратегия (сумма игрока, мягкая ли рука, открытая карта) -> брать ли карту
+        bet: ставка на раунд
+        name: подпись стратегии для HUD и отчетов
+        """
+        self.policy = getattr(policy, 'decide', policy)
+        self.counted = getattr(policy, 'counted', False)
+        self.bet = bet
+        self.name = name
+
+    def wants_card(self, game_manager):
+        """Брать ли карту в текущей позиции"""
+        player = game_manager.player
+        upcard = game_manager.dealer.hand[1].value
+        if self.counted:
+            return self.policy(player.get_hand_value(), player.is_soft(), upcard, game_manager.deck.true_count())
+        return self.policy(player.get_hand_value(), player.is_soft(), upcard)
+
+    def step(self, game_manager):
+        """
+        Одно действие по состоянию стола
+        Возвращает False, если в этом состоянии действовать нечего
+        """
+        state = game_manager.get_state()
+        if state == "round_over":
+            game_manager.start_new_round()
+        elif state == "betting":
+            game_manager.place_bet(self.bet)
+        elif state == "playing":
+            if self.wants_card(game_manager):
+                game_manager.player_hit()
+            else:
+                game_manager.player_stand()
+        else:
+            return False
+        return True
+
+
+class AutoPlayer:
+    """
+    Автоигра: раунды играются стратегией через обычный поток GameManager
+    (ставка, добор/остановка, новый раунд), поэтому слушатели раундов,
+    статистика сессии и трансляция работают как при ручной игре
+    """
+
+    def __init__(self, config, difficulty, policy=None):
+        """
+        config: объект ConfigLoader
+        difficulty: сложность игры (для стратегии по таблице)
+        policy: (имя, стратегия) вместо стратегии из конфига - например, одна
+            PolicyTable на несколько столов
+        """
+        settings = config.get('autoplay', default={})
+        if policy is None:
+            name = settings.get('policy', 'hit17')
+            policy = (name, load_policy(config, name, difficulty))
+        self.bet = settings.get('bet', config.get('game', 'min_bet'))
+        self.set_policy(policy)
+        self.render_every = settings.get('render_every', 100)
+        self.display_interval = 1.0 / settings.get('display_fps', 30)
+
+        self.rounds = 0
+        self._started = time.perf_counter()
+
+    def set_policy(self, policy):
+        """Меняет стратегию на ходу: policy - (имя, стратегия)"""
+        self.policy_name, self.policy = policy
+        self.seat = BotSeat(self.policy, self.bet, self.policy_name)
+
+    def step(self, game_manager):
+        """
+        Одно действие по состоянию стола
+        Возвращает True, если после действия закончился раунд
+        """
+        if not self.seat.step(game_manager):
+            return False
+
+        if game_manager.get_state() == "round_over":
+            self.rounds += 1
+            return True
+        return False
+
+    def play(self, game_manager, timed=True):
+        """
+        Играет до следующей отрисовки: render_every раундов или,
+        если timed, не дольше интервала отображения
+        Возвращает число сыгранных раундов
+        """
+        deadline = time.perf_counter() + self.display_interval
+        rounds = 0
+        while game_manager.get_state() != "game_over":
+            if self.step(game_manager):
+                rounds += 1
+                if self.render_every and rounds >= self.render_every:
+                    break
+            if timed and time.perf_counter() >= deadline:
+                break
+        return rounds
+
+    def rate(self):
+        """Раундов в секунду с момента включения"""
+        return self.rounds / max(time.perf_counter() - self._started, 1e-9)
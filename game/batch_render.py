@@ -0,0 +1,186 @@
+import argparse
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from config.config_loader import ConfigLoader
+from game.card import Card
+from game.game_manager import GameManager, RESULT_MESSAGES
+from game.hand_history import HandHistoryReader
+from game.renderer import Renderer
+from game.shuffler import create_shuffler
+from simulation.engine import hit_below_17
+
+
+def _encode_frame(path, data, size, image_format):
+    """Кодирует один кадр (выполняется в рабочем процессе)"""
+    if image_format == 'raw':
+        with open(path, 'wb') as file:
+            file.write(data)
+    else:
+        surface = pygame.image.frombytes(data, size, 'RGB')
+        pygame.image.save(surface, path)
+    return path
+
+
+class BatchRenderer:
+    """
+    Пакетная отрисовка снимков стола без окна (SDL dummy driver)
+    Кадры рисуются Renderer и GameManager.draw() во внеэкранную поверхность,
+    а кодирование в PNG/raw выполняется пулом процессов
+    """
+
+    def __init__(self, config, out_dir, image_format='png', workers=None, max_pending=64):
+        """
+        config: объект ConfigLoader
+        out_dir: папка для кадров
+        image_format: 'png' или 'raw' (байты RGB)
+        workers: число процессов кодирования (None - по числу ядер)
+        max_pending: сколько кадров может ждать кодирования
+        """
+        # Пул создаем до инициализации SDL, чтобы процессы стартовали чистыми
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self._pending = deque()
+        self.max_pending = max_pending
+
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.init()
+
+        self.config = config
+        self.out_dir = out_dir
+        self.image_format = image_format
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.size = (config.get('game', 'screen_width'), config.get('game', 'screen_height'))
+        self.surface = pygame.Surface(self.size)
+        self.renderer = Renderer(self.surface, config)
+        self.game_manager = GameManager(config, self.renderer, record_stats=False, dealer_delay=0)
+        self.frames = 0
+
+    def snapshot(self, name):
+        """Рисует текущее состояние стола и отправляет кадр на кодирование"""
+        self.game_manager.draw()
+        data = pygame.image.tobytes(self.surface, 'RGB')
+
+        extension = 'raw' if self.image_format == 'raw' else 'png'
+        path = os.path.join(self.out_dir, f"{name}.{extension}")
+        self._pending.append(self._pool.submit(_encode_frame, path, data, self.size, self.image_format))
+        self.frames += 1
+
+        # Ограничиваем очередь, чтобы не копить кадры в памяти
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft().result()
+
+    def render_simulated(self, rounds, bet=10, policy=None, seed=None):
+        """
+        Играет rounds раундов через GameManager и снимает каждый шаг
+        policy: функция (сумма игрока, мягкая ли рука, открытая карта дилера) -> брать ли карту
+        """
+        if seed is not None:
+            # Движок передается в конструктор: иначе следующий башмак (prefetch)
+            # уже заказан у незасеянного движка и воспроизводим только первый
+            self.game_manager.deck.close()
+            self.game_manager = GameManager(self.config, self.renderer, record_stats=False, dealer_delay=0,
+                                            shuffler=create_shuffler('seeded', seed))
+        policy = policy if policy else hit_below_17
+        game_manager = self.game_manager
+        player = game_manager.player
+
+        for round_no in range(rounds):
+            game_manager.start_new_round()
+            if game_manager.get_state() == "game_over":
+                self.snapshot(f"{round_no:08d}_00")
+                break
+
+            game_manager.place_bet(bet)
+            step = 0
+            self.snapshot(f"{round_no:08d}_{step:02d}")
+
+            while game_manager.get_state() == "playing":
+                upcard = game_manager.dealer.hand[1].value
+                if policy(player.get_hand_value(), player.is_soft(), upcard):
+                    game_manager.player_hit()
+                else:
+                    game_manager.player_stand()
+                step += 1
+                self.snapshot(f"{round_no:08d}_{step:02d}")
+
+    def render_history(self, path, session=None):
+        """Восстанавливает раунды из файла истории и снимает раздачу и итог"""
+        with HandHistoryReader(path) as reader:
+            for record in reader:
+                if session is not None and record.session != session:
+                    continue
+                name = f"{record.session:06d}_{record.round:08d}"
+                self._load_record(record, final=False)
+                self.snapshot(f"{name}_00")
+                self._load_record(record, final=True)
+                self.snapshot(f"{name}_01")
+
+    def _load_record(self, record, final):
+        """Выставляет состояние GameManager по записи истории"""
+        game_manager = self.game_manager
+        player = game_manager.player
+        dealer = game_manager.dealer
+
+        player.reset_hand()
+        dealer.reset_hand()
+        player.bet = record.bet
+
+        if final:
+            player.hand = [Card(suit, rank, self.config) for rank, suit in record.player_cards]
+            dealer.hand = [Card(suit, rank, self.config) for rank, suit in record.dealer_cards]
+            player.balance = record.balance
+            game_manager.game_state = "round_over"
+            game_manager.result_message = RESULT_MESSAGES.get(record.outcome, "")
+            game_manager.win_amount = max(record.payout, 0)
+        else:
+            # Начальная раздача: по две карты, первая карта дилера закрыта
+            player.hand = [Card(suit, rank, self.config) for rank, suit in record.player_cards[:2]]
+            dealer.hand = [Card(suit, rank, self.config) for rank, suit in record.dealer_cards[:2]]
+            dealer.hide_first_card()
+            player.balance = record.balance - record.payout - record.bet
+            game_manager.game_state = "playing"
+            game_manager.result_message = ""
+            game_manager.win_amount = 0
+
+    def close(self):
+        """Дожидается кодирования всех кадров и останавливает пул"""
+        while self._pending:
+            self._pending.popleft().result()
+        self._pool.shutdown()
+        self.game_manager.deck.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch rendering of table snapshots")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--history', help="hand history file to replay")
+    source.add_argument('--simulate', type=int, help="number of rounds to simulate")
+    parser.add_argument('--session', type=int, default=None)
+    parser.add_argument('--out', default='frames')
+    parser.add_argument('--format', choices=['png', 'raw'], default='png')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--bet', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    with BatchRenderer(ConfigLoader(), args.out, args.format, args.workers) as batch:
+        if args.history:
+            batch.render_history(args.history, args.session)
+        else:
+            batch.render_simulated(args.simulate, args.bet, seed=args.seed)
+        print(f"Rendered {batch.frames} frames to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,311 @@
-import random
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
 from game.card import Card
+from game.shuffler import create_shuffler
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+
+
+def _hi_lo(card):
+    """Вклад карты в счет Hi-Lo: 2-6 = +1, 10/туз = -1"""
+    return 1 if card.value <= 6 else -1 if card.value >= 10 else 0
 
 
 class Deck:
     """Класс колоды карт"""
 
-    def __init__(self, config, num_decks=1):
+    def __init__(self, config, num_decks=1, prefetch=False, shuffler=None, continuous=False):
         """
         config: объект ConfigLoader
         num_decks: количество колод (обычно 1, 4 или 6)
+        prefetch: готовить следующий башмак заранее в фоновом потоке
+        shuffler: движок тасования (по умолчанию - из game.shuffler и game.shuffle_seed конфига)
+        continuous: режим машины непрерывного тасования (CSM): сброс возвращается
+            в машину через discard(), каждая карта - случайная из находящихся в машине;
+            машина хранит не карты, а 52 счетчика (масть, ранг) - память не зависит от числа колод
         """
         self.config = config
         self.num_decks = num_decks
-        self.cards = []
+        if shuffler is None:
+            shuffler = create_shuffler(config.get('game', 'shuffler', default='seeded'),
+                                       config.get('game', 'shuffle_seed'))
+        self.shuffler = shuffler
+
+        # Башмак не изменяется при раздаче: карты выдаются с конца, _remaining - сколько осталось.
+        # Благодаря этому снимок и копия колоды разделяют один список (копирование при записи)
+        self._shoe = []
+        self._remaining = 0
+        self._shared = False
+
+        # Счет Hi-Lo сданных открытых карт ведется при раздаче, а не пересчетом башмака;
+        # закрытые карты (hide) входят в него только после reveal
+        self._running = 0
+        self._hidden = []
+
+        # В машине непрерывного тасования башмак не кончается - готовить нечего
+        self.continuous = continuous
+        self._counts = None  # Счетчики машины по индексу масть * 13 + ранг
+        self._prototypes = None  # По одной карте каждого вида: раздаются их копии
+        if continuous:
+            prefetch = False
+            self._prototypes = self._card_set()
+
+        # Двойная буферизация: следующий перетасованный башмак готовится в фоне
+        self.prefetch = prefetch
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        self._next_shoe = None
+
+        # Метрики пересоздания башмака
+        self.reshuffles = 0
+        self.prefetch_waits = 0  # Сколько раз раздача ждала фоновый башмак
+        self.prefetch_wait_time = 0.0
+        self.prefetch_max_wait = 0.0
+
+        # Фоновая подготовка запускается после первого тасования (см. shuffle):
+        # генератор используется строго по очереди, и при заданном зерне порядок карт воспроизводим
         self.create_deck()
 
-    def create_deck(self):
-        """Создает колоду из 52 карт * num_decks"""
-        suits = ['hearts', 'diamonds', 'clubs', 'spades']
-        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+    def _card_set(self):
+        """Одна колода: карты в порядке масть * 13 + ранг"""
+        return [Card(suit, rank, self.config) for suit in SUITS for rank in RANKS]
 
-        self.cards = []
+    def _new_cards(self):
+        """Новый неперетасованный набор карт"""
+        cards = []
         for _ in range(self.num_decks):
-            for suit in suits:
-                for rank in ranks:
-                    card = Card(suit, rank, self.config)
-                    self.cards.append(card)
+            cards.extend(self._card_set())
+        return cards
+
+    def _build_shuffled_shoe(self):
+        """Собирает и тасует башмак (выполняется в фоновом потоке)"""
+        cards = self._new_cards()
+        self.shuffler.shuffle(cards)
+        return cards
+
+    def _prepare_next_shoe(self):
+        """Запускает подготовку следующего башмака"""
+        self._next_shoe = self._executor.submit(self._build_shuffled_shoe)
+
+    def _set_shoe(self, cards):
+        """Устанавливает новый башмак"""
+        self._shoe = cards
+        self._remaining = len(cards)
+        self._shared = False
+        self._running = 0
+        self._hidden = []
+
+    def create_deck(self):
+        """Создает колоду из 52 карт * num_decks"""
+        if self.continuous:
+            self._counts = [self.num_decks] * len(self._prototypes)
+            self._remaining = self.num_decks * len(self._prototypes)
+            self._running = 0
+            self._hidden = []
+            return
+        self._set_shoe(self._new_cards())
 
     def shuffle(self):
         """Тасует колоду"""
-        random.shuffle(self.cards)
+        if self.continuous:
+            # Порядок в машине не важен: каждая карта выбирается случайно при раздаче
+            return
+
+        # Тасуются оставшиеся карты; если башмак разделен со снимком - в новом списке
+        if self._shared or self._remaining != len(self._shoe):
+            cards = self._shoe[:self._remaining]
+        else:
+            cards = self._shoe
+        self.shuffler.shuffle(cards)
+        self._set_shoe(cards)
+
+        if self.prefetch and self._next_shoe is None:
+            self._prepare_next_shoe()
+
+    def _reshuffle(self):
+        """Заменяет пустой башмак новым перетасованным"""
+        self.reshuffles += 1
+
+        if not self.prefetch:
+            self.create_deck()
+            self.shuffle()
+            return
+
+        # Подменяем башмак заранее подготовленным; ждем, только если он еще не готов
+        if self._next_shoe is None:
+            self._prepare_next_shoe()
+        if not self._next_shoe.done():
+            start = time.perf_counter()
+            self._set_shoe(self._next_shoe.result())
+            waited = time.perf_counter() - start
+            self.prefetch_waits += 1
+            self.prefetch_wait_time += waited
+            self.prefetch_max_wait = max(self.prefetch_max_wait, waited)
+        else:
+            self._set_shoe(self._next_shoe.result())
+        self._prepare_next_shoe()
 
     def deal_card(self):
         """
         Выдает одну карту из колоды
         Если карт не осталось - пересоздает и тасует колоду
         """
-        if len(self.cards) == 0:
+        if self.continuous:
+            return self._draw_continuous()
+
+        if self._remaining == 0:
+            self._reshuffle()
+        self._remaining -= 1
+        card = self._shoe[self._remaining]
+        if self._shared:
+            # Башмак общий со снимками и копиями - карту на руки выдаем отдельным объектом
+            card = copy.copy(card)
+        card.face_up = True
+        self._running += _hi_lo(card)
+        return card
+
+    def _draw_continuous(self):
+        """
+        Карта из машины непрерывного тасования: случайный номер среди оставшихся
+        карт находится проходом по 52 счетчикам (выбор без возвращения, с весами)
+        """
+        if self._remaining == 0:
+            # Сброс не вернули в машину - загружаем новые колоды
+            self.reshuffles += 1
             self.create_deck()
-            self.shuffle()
-        return self.cards.pop()
+        if self._shared:
+            self._detach()
+
+        counts = self._counts
+        position = self.shuffler.randbelow(self._remaining)
+        index = 0
+        while position >= counts[index]:
+            position -= counts[index]
+            index += 1
+        counts[index] -= 1
+        self._remaining -= 1
+
+        card = copy.copy(self._prototypes[index])
+        card.face_up = True
+        self._running += _hi_lo(card)
+        return card
+
+    def discard(self, cards):
+        """
+        Возвращает сыгранные карты
+        В режиме CSM они сразу попадают обратно в машину; в обычном башмаке
+        сброс откладывается до пересоздания колоды
+        """
+        # Сбрасываемые карты раунда уже видны
+        self.reveal()
+        if not self.continuous or not cards:
+            return
+        if self._shared:
+            self._detach()
+
+        counts = self._counts
+        for card in cards:
+            counts[SUITS.index(card.suit) * len(RANKS) + RANKS.index(card.rank)] += 1
+            self._remaining += 1
+            self._running -= _hi_lo(card)
+
+    def _detach(self):
+        """Отделяет счетчики машины от снимков перед первым изменением"""
+        self._counts = list(self._counts)
+        self._shared = False
+
+    @property
+    def cards(self):
+        """Оставшиеся карты (новый список; в машине - общие экземпляры по счетчикам)"""
+        if self.continuous:
+            return [card for card, count in zip(self._prototypes, self._counts) for _ in range(count)]
+        return self._shoe[:self._remaining]
 
     def cards_remaining(self):
         """Возвращает количество оставшихся карт"""
-        return len(self.cards)
+        return self._remaining
+
+    def composition(self):
+        """Число оставшихся карт каждого ранга {ранг: количество}"""
+        counts = dict.fromkeys(RANKS, 0)
+        if self.continuous:
+            for card, count in zip(self._prototypes, self._counts):
+                counts[card.rank] += count
+            return counts
+        for card in self._shoe[:self._remaining]:
+            counts[card.rank] += 1
+        return counts
+
+    def hide(self, card):
+        """
+        Сданная карта закрыта (закрытая карта дилера): ее вклад убирается
+        из счета до reveal, а сама она считается невидимой, как остаток колоды
+        """
+        self._running -= _hi_lo(card)
+        self._hidden.append(card)
+
+    def reveal(self):
+        """Закрытые карты открыты: их вклад возвращается в счет"""
+        for card in self._hidden:
+            self._running += _hi_lo(card)
+        self._hidden = []
+
+    def true_count(self):
+        """
+        Истинный счет Hi-Lo по видимым картам (как FastShoe.true_count): счет
+        ведется при раздаче, поэтому вызов не пересчитывает башмак
+        """
+        return self._running / max((self._remaining + len(self._hidden)) / 52, 0.5)
+
+    def snapshot(self):
+        """Снимок порядка и позиции колоды за O(1): башмак (или счетчики машины) разделяется, а не копируется"""
+        self._shared = True
+        if self.continuous:
+            return self._counts, self._remaining, self._running, tuple(self._hidden)
+        return self._shoe, self._remaining, self._running, tuple(self._hidden)
+
+    def restore(self, snapshot):
+        """Восстанавливает колоду из snapshot()"""
+        if self.continuous:
+            self._counts, self._remaining, self._running, hidden = snapshot
+        else:
+            self._shoe, self._remaining, self._running, hidden = snapshot
+        self._hidden = list(hidden)
+        self._shared = True
+
+    def fork(self):
+        """
+        Копия колоды с общим башмаком и без фоновой подготовки
+        У копии свой движок тасования: ее пересоздания и непрерывная раздача
+        не расходуют поток игры (воспроизводимость) и не трогают его из других потоков
+        """
+        forked = Deck.__new__(Deck)
+        forked.__dict__.update(self.__dict__)
+        fork_shuffler = getattr(self.shuffler, 'fork', None)
+        forked.shuffler = fork_shuffler() if fork_shuffler else copy.deepcopy(self.shuffler)
+        forked.prefetch = False
+        forked._executor = None
+        forked._next_shoe = None
+        forked.restore(self.snapshot())
+        return forked
+
+    def get_prefetch_stats(self):
+        """Возвращает метрики фоновой подготовки башмака"""
+        return {
+            'reshuffles': self.reshuffles,
+            'waits': self.prefetch_waits,
+            'wait_rate': self.prefetch_waits / self.reshuffles if self.reshuffles else 0.0,
+            'total_wait_ms': self.prefetch_wait_time * 1000,
+            'max_wait_ms': self.prefetch_max_wait * 1000,
+        }
+
+    def close(self):
+        """Останавливает фоновый поток подготовки башмака"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.prefetch = False
 
     def __len__(self):
-        return len(self.cards)
+        return self._remaining
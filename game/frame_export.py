@@ -0,0 +1,217 @@
+import argparse
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Заголовок кольца: сигнатура, версия, ширина, высота, слотов, открыто ли кольцо, последний кадр
+MAGIC = b'BJFR'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIIIIq')
+# Заголовок и слоты выровнены на 64 байта (сегмент начинается с границы страницы)
+ALIGNMENT = 64
+# Заголовок слота: счетчик записи (нечетный - слот пишется), номер кадра, время кадра
+SLOT_HEADER = struct.Struct('<Qqd')
+# Пиксели слота - RGBX, 4 байта на точку, строки без выравнивания
+PIXEL_FORMAT = 'RGBX'
+BYTES_PER_PIXEL = 4
+
+_LATEST = HEADER.size - 8  # Смещение номера последнего кадра в заголовке
+_OPEN = HEADER.size - 12
+
+
+def _aligned(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Начало первого слота; в слоте заголовок занимает первые ALIGNMENT байт,
+# поэтому пиксели каждого слота начинаются на границе 64 байт
+_SLOTS_OFFSET = _aligned(HEADER.size)
+
+
+def _slot_size(width, height):
+    return ALIGNMENT + _aligned(width * height * BYTES_PER_PIXEL)
+
+
+def _slot_offset(slot, slot_size):
+    return _SLOTS_OFFSET + slot * slot_size
+
+
+def _attach(name):
+    """Подключается к существующему сегменту, не передавая его трекеру ресурсов"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # До Python 3.13 трекер удалил бы чужой сегмент при выходе читателя
+        memory = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+
+class FrameRing:
+    """
+    Публикация кадров в кольцевой буфер multiprocessing.shared_memory
+    Слоты кольца обернуты поверхностями pygame прямо поверх общей памяти
+    (pygame.image.frombuffer), поэтому кадр попадает туда одним blit, без
+    промежуточных tostring/tobytes. Игра никогда не ждет читателя: отстающий
+    читатель пропускает кадры, недописанный слот он отличает по счетчику записи
+    """
+
+    def __init__(self, name, size, slots=4):
+        """
+        name: имя сегмента общей памяти
+        size: (ширина, высота) кадра
+        slots: число слотов кольца
+        """
+        self.name = name
+        self.size = tuple(size)
+        self.slots = slots
+        width, height = self.size
+        self._slot_size = _slot_size(width, height)
+
+        # Сегмент от прошлого запуска (аварийное завершение) пересоздается; подключение
+        # без _attach: сегмент остается в трекере ресурсов, и unlink снимает его оттуда
+        try:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self._memory = shared_memory.SharedMemory(name, create=True, size=_slot_offset(slots, self._slot_size))
+        buffer = self._memory.buf
+        HEADER.pack_into(buffer, 0, MAGIC, VERSION, BYTES_PER_PIXEL, width, height, slots, 1, -1)
+
+        self._surfaces = []
+        self._sequences = [0] * slots
+        for slot in range(slots):
+            pixels = self._slot_offset(slot) + ALIGNMENT
+            view = buffer[pixels:pixels + width * height * BYTES_PER_PIXEL]
+            self._surfaces.append(pygame.image.frombuffer(view, self.size, PIXEL_FORMAT))
+            SLOT_HEADER.pack_into(buffer, self._slot_offset(slot), 0, -1, 0.0)
+        self.published = 0
+
+    def _slot_offset(self, slot):
+        return _slot_offset(slot, self._slot_size)
+
+    def publish(self, surface, frame, timestamp=None):
+        """Копирует поверхность (размера кольца) в очередной слот"""
+        timestamp = time.time() if timestamp is None else timestamp
+        slot = frame % self.slots
+        offset = self._slot_offset(slot)
+        buffer = self._memory.buf
+
+        sequence = self._sequences[slot] + 1
+        SLOT_HEADER.pack_into(buffer, offset, sequence, frame, timestamp)  # нечетный: пишется
+        self._surfaces[slot].blit(surface, (0, 0))
+        sequence += 1
+        SLOT_HEADER.pack_into(buffer, offset, sequence, frame, timestamp)
+        self._sequences[slot] = sequence
+
+        struct.pack_into('<q', buffer, _LATEST, frame)
+        self.published += 1
+
+    def close(self):
+        """Помечает кольцо закрытым и удаляет сегмент (подключенные читатели это увидят)"""
+        if self._memory is None:
+            return
+        struct.pack_into('<I', self._memory.buf, _OPEN, 0)
+        self._surfaces = []
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+
+class FrameRingReader:
+    """Читатель кольца FrameRing: забирает последний кадр, пропуская те, что не успел"""
+
+    def __init__(self, name):
+        """name: имя сегмента общей памяти"""
+        self._memory = _attach(name)
+        magic, version, bytes_per_pixel, width, height, slots, _, _ = HEADER.unpack_from(self._memory.buf)
+        if magic != MAGIC or version != VERSION:
+            self._memory.close()
+            raise ValueError(f"{name} is not a frame ring (version {VERSION})")
+        self.size = (width, height)
+        self.slots = slots
+        self._slot_size = _slot_size(width, height)
+        self._frame_bytes = width * height * bytes_per_pixel
+        self.last_frame = -1
+        self.frames = 0
+        self.dropped = 0
+        self.torn = 0
+
+    @property
+    def closed(self):
+        """Игра закрыла кольцо (выход или смена размера окна)"""
+        return struct.unpack_from('<I', self._memory.buf, _OPEN)[0] == 0
+
+    def latest(self):
+        """
+        Последний опубликованный кадр: (номер, время, пиксели) или None, если нового нет
+        Пиксели - массив (высота, ширина, 4) при наличии NumPy, иначе bytes
+        """
+        buffer = self._memory.buf
+        frame = struct.unpack_from('<q', buffer, _LATEST)[0]
+        if frame <= self.last_frame:
+            return None
+
+        offset = _slot_offset(frame % self.slots, self._slot_size)
+        before, slot_frame, timestamp = SLOT_HEADER.unpack_from(buffer, offset)
+        pixels = bytes(buffer[offset + ALIGNMENT:offset + ALIGNMENT + self._frame_bytes])
+        after = SLOT_HEADER.unpack_from(buffer, offset)[0]
+        if before % 2 or before != after or slot_frame != frame:
+            # Слот переписан во время чтения - кадр пропускается
+            self.torn += 1
+            return None
+
+        if self.last_frame >= 0:
+            self.dropped += frame - self.last_frame - 1
+        self.last_frame = frame
+        self.frames += 1
+        if np is not None:
+            width, height = self.size
+            pixels = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, BYTES_PER_PIXEL)
+        return frame, timestamp, pixels
+
+    def close(self):
+        self._memory.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture frames from the game's shared-memory ring")
+    parser.add_argument('name', nargs='?', default='blackjack_frames', help="Shared memory segment name")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--save-every', type=int, default=0, help="Save every Nth captured frame as PNG")
+    parser.add_argument('--out', default='frames', help="Directory for saved frames")
+    args = parser.parse_args()
+
+    reader = FrameRingReader(args.name)
+    if args.save_every:
+        os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds and not reader.closed:
+        captured = reader.latest()
+        if captured is None:
+            time.sleep(0.001)
+            continue
+        frame, _, pixels = captured
+        if args.save_every and reader.frames % args.save_every == 0:
+            image = pygame.image.frombuffer(bytes(pixels), reader.size, PIXEL_FORMAT)
+            pygame.image.save(image, os.path.join(args.out, f"frame_{frame:08d}.png"))
+
+    elapsed = time.perf_counter() - start
+    print(f"Captured {reader.frames} frames in {elapsed:.1f}s ({reader.frames / elapsed:.1f} fps), "
+          f"dropped {reader.dropped}, torn {reader.torn}")
+    reader.close()
+
+
+if __name__ == '__main__':
+    main()
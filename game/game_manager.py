@@ -1,22 +1,48 @@
+import copy
+from collections import namedtuple
+
 import pygame
 from game.deck import Deck
 from game.player import Player, Dealer
 
+# Сообщения об итоге раунда
+RESULT_MESSAGES = {
+    "blackjack": "BLACKJACK!",
+    "win": "YOU WIN!",
+    "lose": "YOU LOSE!",
+    "bust": "BUST!",
+    "push": "PUSH - Tie!",
+}
+
+# Снимок полного состояния раунда (см. GameManager.snapshot)
+GameSnapshot = namedtuple('GameSnapshot', [
+    'deck', 'player', 'dealer', 'game_state', 'result_message',
+    'win_amount', 'last_result', 'round_net', 'round_actions'
+])
+
 
 class GameManager:
     """Менеджер игровой логики Блек Джека"""
 
-    def __init__(self, config, renderer):
+    def __init__(self, config, renderer, record_stats=True, dealer_delay=500, shuffler=None):
         """
         config: объект ConfigLoader
-        renderer: объект Renderer
+        renderer: объект Renderer (None - без отрисовки)
+        record_stats: сохранять ли итоги раундов в статистику конфига
+        dealer_delay: задержка между картами дилера в мс (0 - без задержки)
+        shuffler: движок тасования колоды (None - из конфига)
         """
         self.config = config
         self.renderer = renderer
+        self.record_stats = record_stats
+        self.dealer_delay = dealer_delay
 
         # Создаем колоду и игроков
-        num_decks = config.get('difficulty', 'medium', 'decks')
-        self.deck = Deck(config, num_decks)
+        self.difficulty = config.get('game', 'difficulty', default='medium')
+        num_decks = config.get('difficulty', self.difficulty, 'decks')
+        prefetch = config.get('game', 'prefetch_shoe', default=False)
+        continuous = config.get('game', 'continuous_shuffler', default=False)
+        self.deck = Deck(config, num_decks, prefetch, shuffler, continuous)
         self.deck.shuffle()
 
         self.player = Player("Player", config)
@@ -26,27 +52,41 @@ class GameManager:
         self.game_state = "betting"  # betting, playing, dealer_turn, game_over
         self.result_message = ""
         self.win_amount = 0
+        self.last_result = None  # Исход последнего раунда ('win', 'lose', ...)
+        self.round_net = 0  # Чистый результат последнего раунда
+        self.round_actions = []  # Действия игрока в текущем раунде ('hit', 'stand')
 
         # Параметры игры
         self.min_bet = config.get('game', 'min_bet')
         self.max_bet = config.get('game', 'max_bet')
         self.blackjack_payout = config.get('game', 'blackjack_payout')
 
+        # Слушатели конца раунда: функции (game_manager, result)
+        self.round_listeners = []
+        # Слушатели изменений стола после каждого действия: функции (game_manager)
+        self.change_listeners = []
+
     def start_new_round(self):
         """Начало нового раунда"""
         # Проверяем, может ли игрок продолжать
         if not self.player.can_play():
             self.game_state = "game_over"
             self.result_message = "Game Over - No money left!"
+            self._notify_change()
             return
 
-        # Сбрасываем руки
+        # Сбрасываем руки (в режиме CSM карты возвращаются в машину)
+        self.deck.discard(self.player.hand + self.dealer.hand)
         self.player.reset_hand()
         self.dealer.reset_hand()
 
         self.game_state = "betting"
         self.result_message = ""
         self.win_amount = 0
+        self.last_result = None
+        self.round_net = 0
+        self.round_actions = []
+        self._notify_change()
 
     def place_bet(self, amount):
         """Делает ставку и раздает карты"""
@@ -62,12 +102,14 @@ class GameManager:
         self.player.add_card(self.deck.deal_card())
         self.dealer.add_card(self.deck.deal_card())
 
-        # Прячем первую карту дилера
+        # Прячем первую карту дилера: до открытия она не входит в счет колоды
         self.dealer.hide_first_card()
+        self.deck.hide(self.dealer.hand[0])
 
         # Проверяем блекджек у игрока
         if self.player.has_blackjack:
             self.dealer.reveal_cards()
+            self.deck.reveal()
             if self.dealer.has_blackjack:
                 self.end_round("push")
             else:
@@ -75,6 +117,7 @@ class GameManager:
         else:
             self.game_state = "playing"
 
+        self._notify_change()
         return True
 
     def player_hit(self):
@@ -82,29 +125,36 @@ class GameManager:
         if self.game_state != "playing":
             return
 
+        self.round_actions.append("hit")
         self.player.add_card(self.deck.deal_card())
 
         # Проверяем перебор
         if self.player.is_busted:
             self.end_round("bust")
 
+        self._notify_change()
+
     def player_stand(self):
         """Игрок останавливается"""
         if self.game_state != "playing":
             return
 
+        self.round_actions.append("stand")
         self.player.is_standing = True
         self.game_state = "dealer_turn"
         self.dealer.reveal_cards()
+        self.deck.reveal()
 
         # Дилер берет карты по правилам
         self.dealer_play()
+        self._notify_change()
 
     def dealer_play(self):
         """Дилер играет по правилам (берет до 17+)"""
         while self.dealer.should_hit():
             self.dealer.add_card(self.deck.deal_card())
-            pygame.time.wait(500)  # Задержка для анимации
+            if self.dealer_delay:
+                pygame.time.wait(self.dealer_delay)  # Задержка для анимации
 
         # Определяем победителя
         self.determine_winner()
@@ -129,28 +179,58 @@ class GameManager:
         result: 'win', 'lose', 'push', 'blackjack', 'bust'
         """
         self.game_state = "round_over"
+        self.last_result = result
+        self.result_message = RESULT_MESSAGES[result]
 
         if result == "blackjack":
             self.win_amount = self.player.win(self.blackjack_payout)
-            self.result_message = "BLACKJACK!"
-            self.config.update_stats('blackjacks')
-            self.config.update_stats('wins')
 
         elif result == "win":
             self.win_amount = self.player.win(1.0)
-            self.result_message = "YOU WIN!"
-            self.config.update_stats('wins')
 
         elif result == "lose" or result == "bust":
-            self.result_message = "YOU LOSE!" if result == "lose" else "BUST!"
             self.win_amount = 0
-            self.config.update_stats('losses')
 
         elif result == "push":
             self.player.push()
-            self.result_message = "PUSH - Tie!"
             self.win_amount = 0
 
+        self.round_net = -self.player.bet if result in ("lose", "bust") else self.win_amount
+
+        if self.record_stats:
+            self._update_stats(result)
+
+        for listener in self.round_listeners:
+            listener(self, result)
+
+    def add_round_listener(self, listener):
+        """Подписывает функцию (game_manager, result) на конец раунда"""
+        self.round_listeners.append(listener)
+
+    def remove_round_listener(self, listener):
+        """Отписывает функцию от конца раунда"""
+        if listener in self.round_listeners:
+            self.round_listeners.remove(listener)
+
+    def add_change_listener(self, listener):
+        """Подписывает функцию (game_manager) на изменения стола"""
+        self.change_listeners.append(listener)
+
+    def _notify_change(self):
+        """Уведомляет слушателей об изменении стола"""
+        for listener in self.change_listeners:
+            listener(self)
+
+    def _update_stats(self, result):
+        """Записывает итог раунда в сохраненную статистику"""
+        if result == "blackjack":
+            self.config.update_stats('blackjacks')
+            self.config.update_stats('wins')
+        elif result == "win":
+            self.config.update_stats('wins')
+        elif result == "lose" or result == "bust":
+            self.config.update_stats('losses')
+
         # Обновляем статистику
         self.config.update_stats('total_games')
 
@@ -186,6 +266,45 @@ class GameManager:
         if self.game_state == "game_over":
             self.renderer.draw_message(self.result_message, (255, 0, 0))
 
+    def snapshot(self):
+        """
+        Снимок состояния раунда: колода, руки, баланс и состояние игры
+        Башмак не копируется, поэтому снимок стоит O(размер рук), а не O(колода)
+        """
+        return GameSnapshot(
+            self.deck.snapshot(), self.player.snapshot(), self.dealer.snapshot(),
+            self.game_state, self.result_message, self.win_amount,
+            self.last_result, self.round_net, tuple(self.round_actions)
+        )
+
+    def restore(self, snapshot):
+        """Восстанавливает состояние из snapshot()"""
+        self.deck.restore(snapshot.deck)
+        self.player.restore(snapshot.player)
+        self.dealer.restore(snapshot.dealer)
+        self.game_state = snapshot.game_state
+        self.result_message = snapshot.result_message
+        self.win_amount = snapshot.win_amount
+        self.last_result = snapshot.last_result
+        self.round_net = snapshot.round_net
+        self.round_actions = list(snapshot.round_actions)
+
+    def fork(self):
+        """
+        Независимая копия текущей позиции для анализа "что если"
+        Копия не пишет статистику, не ждет анимацию дилера и не уведомляет слушателей
+        """
+        forked = copy.copy(self)
+        forked.deck = self.deck.fork()
+        forked.player = self.player.clone()
+        forked.dealer = self.dealer.clone()
+        forked.round_actions = list(self.round_actions)
+        forked.round_listeners = []
+        forked.change_listeners = []
+        forked.record_stats = False
+        forked.dealer_delay = 0
+        return forked
+
     def get_state(self):
         """Возвращает текущее состояние игры"""
         return self.game_state
@@ -0,0 +1,316 @@
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+from game.deck import SUITS, RANKS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Заголовок файла: сигнатура, версия, размер записи
+MAGIC = b'BJHH'
+VERSION = 2
+HEADER = struct.Struct('<4sHH8x')
+
+# Запись фиксированной длины (144 байта):
+# сессия, раунд, позиция в башмаке, место, исход, число карт игрока/дилера,
+# число действий, резерв, карты игрока, карты дилера, действия, ставка, выплата, баланс
+# Поля рассчитаны на самую длинную возможную руку при любом числе колод: до последней
+# карты сумма не больше 21, каждая карта - хотя бы 1 (туз), значит карт не больше 22;
+# действий - до 20 добора (2 + 20 карт) или 19 добора и остановка
+MAX_CARDS = 22
+MAX_ACTIONS = 20
+RECORD = struct.Struct('<IIHBBBBBB%ds%ds%dsiiq4x' % (MAX_CARDS * 2, MAX_CARDS * 2, MAX_ACTIONS))
+
+# Разреженный индекс: на каждый непрерывный отрезок раундов сессии одна запись
+INDEX_ENTRY = struct.Struct('<IIQQ')
+
+OUTCOMES = [None, 'win', 'lose', 'push', 'blackjack', 'bust']
+ACTIONS = [None, 'hit', 'stand']
+
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+_RANK_CODES = {rank: code for code, rank in enumerate(RANKS)}
+_SUIT_CODES = {suit: code for code, suit in enumerate(SUITS)}
+
+HandRecord = namedtuple('HandRecord', [
+    'session', 'round', 'shoe_position', 'seat', 'outcome',
+    'player_cards', 'dealer_cards', 'actions', 'bet', 'payout', 'balance'
+])
+
+if np is not None:
+    # Тот же формат записи как структурный dtype - для колонок без копирования
+    RECORD_DTYPE = np.dtype({
+        'names': ['session', 'round', 'shoe_position', 'seat', 'outcome', 'player_count',
+                  'dealer_count', 'action_count', 'player_cards', 'dealer_cards', 'actions',
+                  'bet', 'payout', 'balance'],
+        'formats': ['<u4', '<u4', '<u2', 'u1', 'u1', 'u1', 'u1', 'u1',
+                    ('u1', (MAX_CARDS, 2)), ('u1', (MAX_CARDS, 2)), ('u1', MAX_ACTIONS),
+                    '<i4', '<i4', '<i8'],
+        'offsets': [0, 4, 8, 10, 11, 12, 13, 14, 16, 60, 104, 124, 128, 132],
+        'itemsize': RECORD.size,
+    })
+
+
+def encode_cards(cards):
+    """
+    Кодирует карты в байты (ранг, масть)
+    cards: объекты Card или пары (rank, suit)
+    """
+    if len(cards) > MAX_CARDS:
+        raise ValueError(f"Too many cards in hand: {len(cards)}")
+
+    encoded = bytearray()
+    for card in cards:
+        rank, suit = (card.rank, card.suit) if hasattr(card, 'rank') else card
+        encoded.append(_RANK_CODES[rank])
+        encoded.append(_SUIT_CODES[suit])
+    return bytes(encoded)
+
+
+def decode_cards(data, count):
+    """Декодирует байты в список пар (rank, suit)"""
+    return [(RANKS[data[i * 2]], SUITS[data[i * 2 + 1]]) for i in range(count)]
+
+
+def _index_path(path):
+    return path + '.idx'
+
+
+class HandHistoryWriter:
+    """Дописывает раунды в бинарный файл истории крупными буферизованными блоками"""
+
+    def __init__(self, path, buffer_records=4096):
+        """
+        path: путь к файлу истории
+        buffer_records: сколько записей копить в памяти перед записью на диск
+        """
+        self.path = path
+        self.buffer_records = buffer_records
+        self._buffer = bytearray()
+        self._pending = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            # Дописываем в существующий файл - продолжаем его индекс
+            with HandHistoryReader(path) as reader:
+                self.count = len(reader)
+                self._segments = {session: [list(s) for s in segments]
+                                  for session, segments in reader.index.items()}
+        else:
+            self.count = 0
+            self._segments = {}
+
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def append(self, session, round_no, player_cards, dealer_cards, actions=(),
+               bet=0, payout=0, balance=0, shoe_position=0, seat=0, outcome=None):
+        """
+        Добавляет запись о раунде
+        player_cards, dealer_cards: объекты Card или пары (rank, suit)
+        actions: последовательность 'hit'/'stand'
+        payout: чистый результат раунда (отрицательный при проигрыше)
+        """
+        if len(actions) > MAX_ACTIONS:
+            raise ValueError(f"Too many actions in round: {len(actions)}")
+
+        self._buffer += RECORD.pack(
+            session, round_no, shoe_position, seat, _OUTCOME_CODES[outcome],
+            len(player_cards), len(dealer_cards), len(actions), 0,
+            encode_cards(player_cards), encode_cards(dealer_cards),
+            bytes(_ACTION_CODES[action] for action in actions),
+            bet, payout, balance
+        )
+        self._add_to_index(session, round_no)
+        self.count += 1
+        self._pending += 1
+
+        if self._pending >= self.buffer_records:
+            self.flush()
+
+    def append_round(self, game_manager, session, round_no, seat=0):
+        """Добавляет завершенный раунд GameManager"""
+        player = game_manager.player
+        deck = game_manager.deck
+        shoe_position = deck.num_decks * 52 - deck.cards_remaining()
+
+        self.append(session, round_no, player.hand, game_manager.dealer.hand,
+                    game_manager.round_actions, player.bet, game_manager.round_net, player.balance,
+                    shoe_position, seat, game_manager.last_result)
+
+    def _add_to_index(self, session, round_no):
+        """Продлевает текущий отрезок сессии или открывает новый"""
+        segments = self._segments.setdefault(session, [])
+        if segments:
+            first_round, first_record, count = segments[-1]
+            if first_round + count == round_no and first_record + count == self.count:
+                segments[-1][2] += 1
+                return
+        segments.append([round_no, self.count, 1])
+
+    def flush(self):
+        """Сбрасывает буфер и индекс на диск"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+            self._pending = 0
+        self._file.flush()
+
+        # Индекс заменяется целиком: читатель не увидит наполовину записанный файл
+        directory = os.path.dirname(self.path) or '.'
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.index', delete=False) as index_file:
+            for session, segments in self._segments.items():
+                for first_round, first_record, count in segments:
+                    index_file.write(INDEX_ENTRY.pack(session, first_round, first_record, count))
+        os.replace(index_file.name, _index_path(self.path))
+
+    def close(self):
+        """Сбрасывает данные и закрывает файл"""
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class HandHistoryReader:
+    """
+    Читает файл истории через mmap
+    Записи и колонки отдаются как представления над отображенной памятью, без копирования
+    """
+
+    def __init__(self, path):
+        """path: путь к файлу истории"""
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, record_size = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a hand history file: {path}")
+        if version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"Unsupported hand history version: {version}")
+
+        self.count = (len(self._view) - HEADER.size) // RECORD.size
+        self.index = self._load_index()
+        # Для поиска: сегменты сессии по возрастанию первого раунда и их первые раунды
+        self._segments = {}
+        for session, segments in self.index.items():
+            segments = sorted(segments)
+            self._segments[session] = ([segment[0] for segment in segments], segments)
+
+    def _load_index(self):
+        """Загружает индекс {сессия: [(первый раунд, первая запись, кол-во), ...]}"""
+        index = {}
+        index_path = _index_path(self.path)
+
+        # Индекс пишется при flush; если он отстал от данных - строим заново
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as index_file:
+                for session, first_round, first_record, count in INDEX_ENTRY.iter_unpack(index_file.read()):
+                    index.setdefault(session, []).append((first_round, first_record, count))
+            indexed = sum(count for segments in index.values() for _, _, count in segments)
+            if indexed == self.count:
+                return index
+
+        return self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Строит индекс сканированием полей сессии и раунда"""
+        index = {}
+        last = {}
+        for record_no in range(self.count):
+            session, round_no = struct.unpack_from('<II', self._view, HEADER.size + record_no * RECORD.size)
+            segment = last.get(session)
+            if segment and segment[0] + segment[2] == round_no and segment[1] + segment[2] == record_no:
+                segment[2] += 1
+            else:
+                segment = [round_no, record_no, 1]
+                index.setdefault(session, []).append(segment)
+                last[session] = segment
+        return {session: [tuple(s) for s in segments] for session, segments in index.items()}
+
+    def __len__(self):
+        return self.count
+
+    def seek(self, session, round_no):
+        """Номер записи для (сессия, раунд) или None: двоичный поиск по сегментам сессии"""
+        if session not in self._segments:
+            return None
+        first_rounds, segments = self._segments[session]
+        position = bisect.bisect_right(first_rounds, round_no) - 1
+        if position < 0:
+            return None
+        first_round, first_record, count = segments[position]
+        if round_no < first_round + count:
+            return first_record + round_no - first_round
+        return None
+
+    def raw(self, record_no):
+        """Байты записи как memoryview без копирования"""
+        if not 0 <= record_no < self.count:
+            raise IndexError(record_no)
+        offset = HEADER.size + record_no * RECORD.size
+        return self._view[offset:offset + RECORD.size]
+
+    def record(self, record_no):
+        """Декодированная запись HandRecord"""
+        (session, round_no, shoe_position, seat, outcome, player_count, dealer_count,
+         action_count, _, player_cards, dealer_cards, actions, bet, payout, balance) = RECORD.unpack(self.raw(record_no))
+
+        return HandRecord(
+            session, round_no, shoe_position, seat, OUTCOMES[outcome],
+            decode_cards(player_cards, player_count), decode_cards(dealer_cards, dealer_count),
+            [ACTIONS[code] for code in actions[:action_count]], bet, payout, balance
+        )
+
+    def get(self, session, round_no):
+        """Запись по сессии и раунду или None"""
+        record_no = self.seek(session, round_no)
+        return self.record(record_no) if record_no is not None else None
+
+    def __iter__(self):
+        for record_no in range(self.count):
+            yield self.record(record_no)
+
+    def columns(self):
+        """Все записи как структурный массив NumPy поверх mmap (без копирования)"""
+        if np is None:
+            raise RuntimeError("NumPy is required for column views")
+        return np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=self.count, offset=HEADER.size)
+
+    def column(self, name):
+        """Одна колонка ('bet', 'balance', ...) как представление NumPy"""
+        return self.columns()[name]
+
+    def close(self):
+        """
+        Закрывает файл
+        Представления из columns() должны быть освобождены до закрытия
+        """
+        if self._mmap.closed:
+            return
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
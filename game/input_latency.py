@@ -0,0 +1,68 @@
+import logging
+import time
+
+from simulation.streaming import Welford, TDigest
+
+logger = logging.getLogger(__name__)
+
+
+class InputLatencyTracker:
+    """
+    Задержка от нажатия кнопки мыши до кадра, который показал результат
+    Нажатие отмечается в момент выборки из очереди событий, действие
+    (ставка, hit, stand, меню) назначает обработчик кнопки, а замер
+    закрывается после ближайшего pygame.display.flip(). Так видны и
+    остановки внутри обработчика: запись статистики, ожидание дилера
+    """
+
+    def __init__(self, limit=0.1):
+        """limit: задержка в секундах, о которой пишется предупреждение"""
+        self.limit = limit
+        self.timings = {}  # действие -> Welford
+        self.digests = {}  # действие -> TDigest
+        self.slow = 0
+        self._pending = []  # [время нажатия, действие] до ближайшего показа
+        self._current = None
+
+    def click(self, timestamp):
+        """Нажатие кнопки мыши, выбранное из очереди в момент timestamp"""
+        self._current = [timestamp, None]
+        self._pending.append(self._current)
+
+    def action(self, name):
+        """Последнее нажатие вызвало действие name (нажатия мимо кнопок не учитываются)"""
+        if self._current is not None and self._current[1] is None:
+            self._current[1] = name
+
+    def presented(self, timestamp=None):
+        """Кадр показан (вызывается сразу после flip): закрывает ожидающие нажатия"""
+        if not self._pending:
+            return
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        for clicked, name in self._pending:
+            if name is None:
+                continue
+            latency = (timestamp - clicked) * 1000
+            if name not in self.timings:
+                self.timings[name] = Welford()
+                self.digests[name] = TDigest()
+            self.timings[name].add(latency)
+            self.digests[name].add(latency)
+            if latency > self.limit * 1000:
+                self.slow += 1
+                logger.warning("Input latency for %s: %.1f ms", name, latency)
+        self._pending = []
+        self._current = None
+
+    def report(self):
+        """Строки отчета: перцентили задержки по действиям"""
+        lines = [f"Input-to-display latency ({self.slow} over {self.limit * 1000:.0f} ms):"]
+        for name in sorted(self.timings):
+            percentiles = self.digests[name].percentiles((50, 95, 99))
+            lines.append(f"  {name}: {self.timings[name].count} clicks, "
+                         + ", ".join(f"p{point} {value:.1f} ms" for point, value in percentiles.items())
+                         + f", max {self.timings[name].max:.1f} ms")
+        return lines
+
+    def stop(self):
+        """Ничего не удерживает; для единообразия с остальной диагностикой"""
@@ -0,0 +1,137 @@
+import json
+
+import pygame
+
+TRACE_VERSION = 1
+
+
+def _encode_event(event):
+    """Событие pygame -> [тип, атрибуты] (несериализуемые атрибуты пропускаются)"""
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, tuple):
+            value = list(value)
+        if value is None or isinstance(value, (bool, int, float, str, list)):
+            attributes[name] = value
+    return [event.type, attributes]
+
+
+def _decode_event(encoded):
+    event_type, attributes = encoded
+    attributes = {name: tuple(value) if isinstance(value, list) else value
+                  for name, value in attributes.items()}
+    return pygame.event.Event(event_type, attributes)
+
+
+class InputRecorder:
+    """
+    Записывает поток событий pygame по кадрам с отметками времени
+    Формат - JSON по строке: заголовок, затем {кадр, время, события}
+    для кадров, в которых были события. Строки сбрасываются на диск сразу,
+    поэтому запись переживает аварийное завершение игры
+    """
+
+    def __init__(self, path, seed, size, config):
+        """
+        path: путь к файлу записи
+        seed: зерно тасования, с которым шла сессия
+        size: размер окна (ширина, высота)
+        config: объект ConfigLoader - настройки игры и статистика на момент начала записи
+        """
+        self.path = path
+        self.frames = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'version': TRACE_VERSION, 'seed': seed, 'size': list(size),
+                     'difficulty': config.get('game', 'difficulty'),
+                     'balance': config.get('game', 'starting_balance'),
+                     'game': config.get('game'), 'stats': config.get('stats', default={}),
+                     'pygame': pygame.version.ver})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def record(self, frame, elapsed, events):
+        """Сохраняет события кадра (пустые кадры не пишутся)"""
+        if not events:
+            return
+        self._write({'frame': frame, 't': round(elapsed, 6), 'events': [_encode_event(e) for e in events]})
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class InputReplayer:
+    """
+    Воспроизводит запись InputRecorder
+    realtime: события выдаются по исходным отметкам времени;
+    иначе - по номерам кадров (как можно быстрее, кадр в кадр)
+    Файл читается построчно, память не зависит от длины записи
+    """
+
+    def __init__(self, path, realtime=True):
+        """
+        path: путь к файлу записи
+        realtime: воспроизводить в исходном темпе
+        """
+        self.path = path
+        self.realtime = realtime
+        self._file = open(path, 'r', encoding='utf-8')
+
+        header = json.loads(self._file.readline())
+        if header.get('version') != TRACE_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported input trace version: {header.get('version')}")
+        self.seed = header['seed']
+        self.size = tuple(header['size'])
+        self.difficulty = header.get('difficulty')
+        self.balance = header.get('balance')
+        self.game = header.get('game')
+        self.stats = header.get('stats')
+
+        self.events_replayed = 0
+        self._next = None
+        self._advance()
+
+    def apply(self, config):
+        """
+        Возвращает настройки на момент записи
+        config: копия конфига из ConfigLoader.detached() - воспроизведение не должно
+            менять настройки игрока (сложность из меню, статистику)
+        """
+        if self.game is not None:
+            config.set('game', value=dict(self.game))
+        if self.stats is not None:
+            config.set('stats', value=dict(self.stats))
+        # Записи без раздела game хранят только сложность
+        if self.difficulty:
+            config.set('game', 'difficulty', value=self.difficulty)
+        if self.balance is not None:
+            config.set('game', 'starting_balance', value=self.balance)
+
+    def _advance(self):
+        line = self._file.readline()
+        self._next = json.loads(line) if line else None
+
+    @property
+    def finished(self):
+        """Все записанные события выданы"""
+        return self._next is None
+
+    def events(self, frame, elapsed):
+        """События, которые пора выдать на кадре frame / в момент elapsed"""
+        events = []
+        while self._next is not None:
+            due = self._next['t'] <= elapsed if self.realtime else self._next['frame'] <= frame
+            if not due:
+                break
+            events.extend(_decode_event(encoded) for encoded in self._next['events'])
+            self._advance()
+        self.events_replayed += len(events)
+        return events
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,75 @@
+import pygame
+
+# События мыши, координаты которых переводятся в виртуальные
+_MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+
+class Layout:
+    """
+    Перевод виртуальных координат в пиксели окна
+    Интерфейс размечен в виртуальном размере (screen_width x screen_height
+    из конфига) и масштабируется в окно любого размера с сохранением
+    пропорций (поля по краям). При смене размера растет generation -
+    по нему отрисовщики сбрасывают свои кэши
+    """
+
+    def __init__(self, virtual_size, window_size=None):
+        """
+        virtual_size: (ширина, высота) разметки
+        window_size: размер окна в пикселях (None - равен виртуальному)
+        """
+        self.virtual_size = tuple(virtual_size)
+        self.generation = 0
+        self.resize(window_size if window_size else virtual_size)
+
+    def resize(self, window_size):
+        """Пересчитывает масштаб под новый размер окна"""
+        self.window_size = tuple(window_size)
+        virtual_width, virtual_height = self.virtual_size
+        window_width, window_height = self.window_size
+        self.scale = min(window_width / virtual_width, window_height / virtual_height)
+        self.offset = ((window_width - virtual_width * self.scale) / 2,
+                       (window_height - virtual_height * self.scale) / 2)
+        self.generation += 1
+        self._fonts = {}
+
+    @property
+    def identity(self):
+        """Окно совпадает с разметкой"""
+        return self.window_size == self.virtual_size
+
+    def point(self, x, y):
+        """Виртуальная точка -> пиксель окна"""
+        return (round(self.offset[0] + x * self.scale), round(self.offset[1] + y * self.scale))
+
+    def rect(self, rect):
+        """Виртуальный прямоугольник -> pygame.Rect окна (по краям, без щелей между соседями)"""
+        rect = pygame.Rect(rect)
+        left, top = self.point(rect.left, rect.top)
+        right, bottom = self.point(rect.right, rect.bottom)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def length(self, value):
+        """Виртуальная длина (толщина линии, радиус) -> пиксели, не меньше 1"""
+        return max(1, round(value * self.scale))
+
+    def to_virtual(self, pos):
+        """Пиксель окна -> виртуальная точка"""
+        return (int((pos[0] - self.offset[0]) // self.scale), int((pos[1] - self.offset[1]) // self.scale))
+
+    def event(self, event):
+        """Событие мыши с виртуальными координатами (остальные - без изменений)"""
+        if self.identity or event.type not in _MOUSE_EVENTS:
+            return event
+        attributes = dict(event.dict, pos=self.to_virtual(event.pos))
+        if 'rel' in attributes:
+            attributes['rel'] = (round(event.rel[0] / self.scale), round(event.rel[1] / self.scale))
+        return pygame.event.Event(event.type, attributes)
+
+    def font(self, size):
+        """Шрифт виртуального размера size в текущем масштабе (кэшируется до смены размера)"""
+        font = self._fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, self.length(size))
+            self._fonts[size] = font
+        return font
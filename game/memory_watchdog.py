@@ -0,0 +1,192 @@
+import fnmatch
+import gc
+import logging
+import os
+import re
+import time
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class FrameAllocationTracker:
+    """
+    Отслеживание выделений памяти по кадрам через tracemalloc
+    Снимки соседних кадров сравниваются по месту вызова; пик выделений
+    внутри кадра показывает временные объекты (строки, поверхности, Rect)
+    """
+
+    def __init__(self, budget=64 * 1024, every=1, top=10, frames=1):
+        """
+        budget: допустимый рост/пик памяти за кадр в байтах
+        every: снимать каждый N-й кадр (снимок кучи недешев)
+        top: сколько мест вызова показывать в отчете
+        frames: глубина стека для группировки
+        """
+        self.budget = budget
+        self.every = every
+        self.top = top
+        self.frame = 0
+        self.over_budget = 0
+
+        # Накопленные выделения по месту вызова: {трасса: [байты, количество]}
+        self.sites = {}
+        self.peak = 0
+        self.samples = 0
+
+        # Исключаем сам tracemalloc, этот модуль и сопоставление фильтров (fnmatch/re)
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, fnmatch.__file__),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(re.__file__), '*')),
+        ]
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._previous = self._take_snapshot()
+        tracemalloc.reset_peak()
+        self._frame_start = tracemalloc.get_traced_memory()[0]
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def end_frame(self):
+        """Вызывается в конце каждого кадра"""
+        self.frame += 1
+        if self.frame % self.every:
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        transient = peak - self._frame_start
+        self.peak = max(self.peak, transient)
+
+        snapshot = self._take_snapshot()
+        grown = 0
+        for stat in snapshot.compare_to(self._previous, 'traceback'):
+            if stat.size_diff <= 0:
+                continue
+            grown += stat.size_diff
+            site = self.sites.setdefault(stat.traceback, [0, 0])
+            site[0] += stat.size_diff
+            site[1] += max(stat.count_diff, 0)
+        self._previous = snapshot
+        self.samples += 1
+
+        if grown > self.budget or transient > self.budget:
+            self.over_budget += 1
+            logger.warning("Frame %d over allocation budget: retained %d B, peak %d B (budget %d B)",
+                           self.frame, grown, transient, self.budget)
+
+        # Снимок сам выделяет память - начинаем следующий кадр после него
+        tracemalloc.reset_peak()
+        self._frame_start = tracemalloc.get_traced_memory()[0]
+
+    def report(self):
+        """Строки отчета: места вызова с наибольшими выделениями за кадр"""
+        samples = max(self.samples, 1)
+        lines = [f"Frames sampled: {self.samples}, over budget: {self.over_budget}, "
+                 f"max in-frame peak: {self.peak} B"]
+        ranked = sorted(self.sites.items(), key=lambda item: item[1][0], reverse=True)
+        for traceback, (size, count) in ranked[:self.top]:
+            frame = traceback[0]
+            lines.append(f"  {frame.filename}:{frame.lineno}: "
+                         f"{size / samples:.0f} B/frame, {count / samples:.1f} blocks/frame")
+        return lines
+
+    def stop(self):
+        """Останавливает трассировку"""
+        tracemalloc.stop()
+
+
+def current_rss():
+    """Текущий RSS процесса в байтах"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        if resource is None:
+            return 0
+        # Не Linux: максимальный RSS (в КБ на BSD, в байтах на macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+class MemoryWatchdog:
+    """
+    Сторож долгих сессий: раз в interval секунд замеряет RSS и
+    следит за паузами сборщика мусора; предупреждает при превышении порогов
+    """
+
+    def __init__(self, interval=60.0, rss_growth_limit=64 * 1024 * 1024, gc_pause_limit=0.02, history=1440):
+        """
+        interval: период замера RSS в секундах
+        rss_growth_limit: допустимый рост RSS от начального в байтах
+        gc_pause_limit: допустимая пауза сборщика мусора в секундах
+        history: сколько последних замеров хранить
+        """
+        self.interval = interval
+        self.rss_growth_limit = rss_growth_limit
+        self.gc_pause_limit = gc_pause_limit
+
+        self.baseline_rss = current_rss()
+        self.samples = deque(maxlen=history)  # (время, RSS)
+        self._last_sample = time.monotonic()
+
+        # Паузы сборщика мусора
+        self.gc_pauses = 0
+        self.gc_total_pause = 0.0
+        self.gc_max_pause = 0.0
+        self._gc_start = None
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        """Обратный вызов gc: замеряет длительность сборки"""
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+            return
+        if self._gc_start is None:
+            return
+
+        pause = time.perf_counter() - self._gc_start
+        self._gc_start = None
+        self.gc_pauses += 1
+        self.gc_total_pause += pause
+        if pause > self.gc_max_pause:
+            self.gc_max_pause = pause
+        if pause > self.gc_pause_limit:
+            logger.warning("GC pause %.1f ms (generation %d)", pause * 1000, info['generation'])
+
+    def tick(self):
+        """Вызывается каждый кадр; замеряет RSS не чаще чем раз в interval"""
+        now = time.monotonic()
+        if now - self._last_sample < self.interval:
+            return
+        self._last_sample = now
+
+        rss = current_rss()
+        self.samples.append((now, rss))
+        growth = rss - self.baseline_rss
+        if growth > self.rss_growth_limit:
+            logger.warning("RSS grew by %.1f MB since start (%.1f MB now)",
+                           growth / 1024 / 1024, rss / 1024 / 1024)
+
+    def report(self):
+        """Строки отчета о памяти и паузах сборщика"""
+        rss = self.samples[-1][1] if self.samples else current_rss()
+        average = self.gc_total_pause / self.gc_pauses if self.gc_pauses else 0.0
+        return [
+            f"RSS: {rss / 1024 / 1024:.1f} MB (start {self.baseline_rss / 1024 / 1024:.1f} MB)",
+            f"GC: {self.gc_pauses} collections, avg {average * 1000:.2f} ms, max {self.gc_max_pause * 1000:.2f} ms",
+        ]
+
+    def stop(self):
+        """Отключает обратный вызов сборщика мусора"""
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
@@ -1,4 +1,4 @@
-import pygame
+import copy
 
 
 class Player:
@@ -56,6 +56,24 @@ class Player:
 
         return total
 
+    def is_soft(self):
+        """Мягкая ли рука (туз считается за 11)"""
+        total = 0
+        aces = 0
+
+        for card in self.hand:
+            if card.rank == 'A':
+                aces += 1
+                total += 11
+            else:
+                total += card.value
+
+        while total > 21 and aces > 0:
+            total -= 10
+            aces -= 1
+
+        return aces > 0
+
     def place_bet(self, amount):
         """Делает ставку"""
         min_bet = self.config.get('game', 'min_bet')
@@ -93,6 +111,25 @@ class Player:
         self.has_blackjack = False
         self.is_standing = False
 
+    def snapshot(self):
+        """Снимок руки и флагов; карты не копируются, запоминается только их открытость"""
+        hand = tuple((card, card.face_up) for card in self.hand)
+        return hand, self.bet, self.balance, self.is_busted, self.has_blackjack, self.is_standing
+
+    def restore(self, snapshot):
+        """Восстанавливает состояние из snapshot()"""
+        hand, self.bet, self.balance, self.is_busted, self.has_blackjack, self.is_standing = snapshot
+        self.hand = []
+        for card, face_up in hand:
+            card.face_up = face_up
+            self.hand.append(card)
+
+    def clone(self):
+        """Независимая копия игрока (копируются только карты на руках)"""
+        cloned = copy.copy(self)
+        cloned.hand = [copy.copy(card) for card in self.hand]
+        return cloned
+
     def can_play(self):
         """Может ли игрок продолжать играть"""
         min_bet = self.config.get('game', 'min_bet')
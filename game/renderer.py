@@ -1,18 +1,31 @@
 import pygame
+from game.layout import Layout
+
+# Размер шрифтов в виртуальных пикселях
+FONT_SIZES = {'large': 48, 'medium': 36, 'small': 28}
+
+# Сколько надписей держать в кэше (баланс, суммы рук и т.п. меняются редко)
+TEXT_CACHE_LIMIT = 512
 
 
 class Renderer:
-    """Класс для отрисовки всех игровых элементов"""
+    """
+    Класс для отрисовки всех игровых элементов
+    Координаты методов - виртуальные (см. Layout); карты, надписи и фон
+    рисуются сразу в размере окна и кэшируются до смены разрешения
+    """
 
-    def __init__(self, screen, config):
+    def __init__(self, screen, config, layout=None):
         """
         screen: объект pygame.display
         config: объект ConfigLoader
+        layout: разметка окна (None - виртуальный размер из конфига в размер screen)
         """
         self.screen = screen
         self.config = config
         self.width = config.get('game', 'screen_width')
         self.height = config.get('game', 'screen_height')
+        self.layout = layout if layout else Layout((self.width, self.height), screen.get_size())
 
         # Цвета из конфига
         self.bg_color = config.get('colors', 'background')
@@ -21,25 +34,66 @@ class Renderer:
         self.text_gold = config.get('colors', 'text_gold')
         self.card_bg = config.get('colors', 'card_background')
         self.card_border = config.get('colors', 'card_border')
-
-        # Шрифты
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 28)
+        self.table_border = config.get('colors', 'table_border')
 
         # Размеры карты
         self.card_width = 80
         self.card_height = 120
         self.card_spacing = 20
 
+        self._generation = None
+        self._sync()
+
+    def resize(self, screen):
+        """Новое окно или новый размер окна: масштаб пересчитывается, кэши сбрасываются"""
+        self.screen = screen
+        self.layout.resize(screen.get_size())
+        self._sync()
+
+    def _sync(self):
+        """Пересоздает шрифты и кэши, если изменился масштаб разметки"""
+        if self._generation == self.layout.generation:
+            return
+        self._generation = self.layout.generation
+
+        # Шрифты
+        self.font_large = self.layout.font(FONT_SIZES['large'])
+        self.font_medium = self.layout.font(FONT_SIZES['medium'])
+        self.font_small = self.layout.font(FONT_SIZES['small'])
+        self._fonts = {'large': self.font_large, 'medium': self.font_medium, 'small': self.font_small}
+
+        self._background = None
+        self._cards = {}
+        self._texts = {}
+
+    def _text(self, text, font, color):
+        """Поверхность надписи из кэша"""
+        key = (text, font, tuple(color))
+        surface = self._texts.get(key)
+        if surface is None:
+            if len(self._texts) >= TEXT_CACHE_LIMIT:
+                self._texts.clear()
+            surface = self._fonts.get(font, self.font_medium).render(text, True, color)
+            self._texts[key] = surface
+        return surface
+
     def draw_background(self):
         """Отрисовка фона игрового стола"""
-        self.screen.fill(self.bg_color)
+        self._sync()
+        if self._background is None:
+            self._background = self._render_background()
+        self.screen.blit(self._background, (0, 0))
+
+    def _render_background(self):
+        """Фон в размере окна (поля вокруг разметки - цвета фона)"""
+        background = pygame.Surface(self.layout.window_size)
+        background.fill(self.bg_color)
 
         # Рисуем овал стола
-        table_rect = pygame.Rect(100, 150, self.width - 200, self.height - 300)
-        pygame.draw.ellipse(self.screen, (0, 100, 0), table_rect)
-        pygame.draw.ellipse(self.screen, self.config.get('colors', 'table_border'), table_rect, 5)
+        table_rect = self.layout.rect((100, 150, self.width - 200, self.height - 300))
+        pygame.draw.ellipse(background, (0, 100, 0), table_rect)
+        pygame.draw.ellipse(background, self.table_border, table_rect, self.layout.length(5))
+        return background
 
     def draw_card(self, card, x, y):
         """
@@ -47,36 +101,50 @@ class Renderer:
         card: объект Card
         x, y: координаты левого верхнего угла
         """
-        # Прямоугольник карты
-        card_rect = pygame.Rect(x, y, self.card_width, self.card_height)
+        self._sync()
+        key = (card.rank, card.suit) if card.face_up else None
+        surface = self._cards.get(key)
+        if surface is None:
+            surface = self._render_card(card)
+            self._cards[key] = surface
+        self.screen.blit(surface, self.layout.point(x, y))
+
+    def _render_card(self, card):
+        """Изображение карты в размере окна"""
+        layout = self.layout
+        surface = pygame.Surface(layout.rect((0, 0, self.card_width, self.card_height)).size)
+        card_rect = surface.get_rect()
+        border = layout.length(2)
+
+        def point(x, y):
+            return round(x * layout.scale), round(y * layout.scale)
 
         if card.face_up:
             # Открытая карта - белый фон
-            pygame.draw.rect(self.screen, self.card_bg, card_rect)
-            pygame.draw.rect(self.screen, self.card_border, card_rect, 2)
+            surface.fill(self.card_bg)
+            pygame.draw.rect(surface, self.card_border, card_rect, border)
 
             # Ранг карты (A, K, Q, J или число)
             rank_text = self.font_medium.render(card.rank, True, card.color)
-            self.screen.blit(rank_text, (x + 10, y + 10))
+            surface.blit(rank_text, point(10, 10))
 
             # Масть карты (♥, ♦, ♣, ♠)
             suit_text = self.font_large.render(card.suit_symbol, True, card.color)
-            suit_rect = suit_text.get_rect(center=(x + self.card_width // 2, y + self.card_height // 2))
-            self.screen.blit(suit_text, suit_rect)
+            suit_rect = suit_text.get_rect(center=card_rect.center)
+            surface.blit(suit_text, suit_rect)
 
             # Ранг в правом нижнем углу (перевернутый)
-            rank_text_bottom = self.font_medium.render(card.rank, True, card.color)
-            self.screen.blit(rank_text_bottom, (x + self.card_width - 30, y + self.card_height - 40))
+            surface.blit(rank_text, point(self.card_width - 30, self.card_height - 40))
         else:
             # Закрытая карта - синий паттерн
-            pygame.draw.rect(self.screen, (0, 0, 150), card_rect)
-            pygame.draw.rect(self.screen, self.card_border, card_rect, 2)
+            surface.fill((0, 0, 150))
+            pygame.draw.rect(surface, self.card_border, card_rect, border)
 
             # Рисуем паттерн на рубашке
             for i in range(5):
                 for j in range(7):
-                    pygame.draw.circle(self.screen, (0, 0, 200),
-                                       (x + 15 + i * 15, y + 15 + j * 15), 3)
+                    pygame.draw.circle(surface, (0, 0, 200), point(15 + i * 15, 15 + j * 15), layout.length(3))
+        return surface
 
     def draw_hand(self, hand, x, y, show_value=True, value=0):
         """
@@ -93,9 +161,8 @@ class Renderer:
 
         # Показываем сумму карт
         if show_value and len(hand) > 0:
-            value_text = self.font_medium.render(f"Value: {value}", True, self.text_white)
             value_x = x + len(hand) * (self.card_width + self.card_spacing) + 20
-            self.screen.blit(value_text, (value_x, y + 50))
+            self.draw_text(f"Value: {value}", value_x, y + 50, 'medium', self.text_white)
 
     def draw_text(self, text, x, y, font='medium', color=None):
         """
@@ -108,28 +175,17 @@ class Renderer:
         if color is None:
             color = self.text_white
 
-        if font == 'large':
-            text_surface = self.font_large.render(text, True, color)
-        elif font == 'small':
-            text_surface = self.font_small.render(text, True, color)
-        else:
-            text_surface = self.font_medium.render(text, True, color)
-
-        self.screen.blit(text_surface, (x, y))
+        self._sync()
+        self.screen.blit(self._text(text, font, color), self.layout.point(x, y))
 
     def draw_text_centered(self, text, y, font='medium', color=None):
         """Отрисовка текста по центру экрана"""
         if color is None:
             color = self.text_white
 
-        if font == 'large':
-            text_surface = self.font_large.render(text, True, color)
-        elif font == 'small':
-            text_surface = self.font_small.render(text, True, color)
-        else:
-            text_surface = self.font_medium.render(text, True, color)
-
-        text_rect = text_surface.get_rect(center=(self.width // 2, y))
+        self._sync()
+        text_surface = self._text(text, font, color)
+        text_rect = text_surface.get_rect(center=self.layout.point(self.width // 2, y))
         self.screen.blit(text_surface, text_rect)
 
     def draw_player_info(self, player, x, y):
@@ -182,16 +238,34 @@ class Renderer:
             win_text = f"+${win_amount}"
             self.draw_text_centered(win_text, self.height // 2 + 10, 'large', (0, 255, 0))
 
+    def _draw_panel(self, x, y, width, height):
+        """Темная панель с золотой рамкой"""
+        rect = self.layout.rect((x, y, width, height))
+        pygame.draw.rect(self.screen, (20, 20, 20), rect)
+        pygame.draw.rect(self.screen, self.text_gold, rect, self.layout.length(3))
+
     def draw_deck_info(self, cards_remaining):
         """Отрисовка информации о колоде"""
         # Фон для индикатора (правый верхний угол)
-        info_rect = pygame.Rect(820, 20, 160, 80)
-        pygame.draw.rect(self.screen, (20, 20, 20), info_rect)
-        pygame.draw.rect(self.screen, self.text_gold, info_rect, 3)
+        x = self.width - 180
+        self._draw_panel(x, 20, 160, 80)
 
         # Заголовок "DECK"
-        self.draw_text("DECK", 850, 30, 'small', self.text_gold)
+        self.draw_text("DECK", x + 30, 30, 'small', self.text_gold)
 
         # Количество карт
         cards_text = f"{cards_remaining} cards"
-        self.draw_text(cards_text, 835, 60, 'small', self.text_white)
+        self.draw_text(cards_text, x + 15, 60, 'small', self.text_white)
+
+    def draw_advice(self, advice):
+        """
+        Отрисовка подсказки советника
+        advice: объект Advice (лучшее действие, EV, уверенность)
+        """
+        # Под индикатором колоды
+        x = self.width - 180
+        self._draw_panel(x, 110, 160, 80)
+
+        best_ev = advice.ev_hit if advice.action == "HIT" else advice.ev_stand
+        self.draw_text(f"HINT: {advice.action}", x + 15, 120, 'small', self.text_gold)
+        self.draw_text(f"EV {best_ev:+.2f} {advice.confidence * 100:.0f}%", x + 15, 150, 'small', self.text_white)
@@ -0,0 +1,139 @@
+from collections import deque
+
+
+class RollingWindow:
+    """Скользящее окно последних раундов с поддержкой сумм за O(1)"""
+
+    def __init__(self, size):
+        self.size = size
+        self._results = deque()
+        self.wins = 0
+        self.losses = 0
+        self.pushes = 0
+        self.net = 0
+
+    def add(self, outcome, net):
+        """outcome: 1 - выигрыш, -1 - проигрыш, 0 - ничья"""
+        self._results.append((outcome, net))
+        self._count(outcome, net, 1)
+
+        # Вытесняем самый старый раунд
+        if len(self._results) > self.size:
+            old_outcome, old_net = self._results.popleft()
+            self._count(old_outcome, old_net, -1)
+
+    def _count(self, outcome, net, sign):
+        if outcome > 0:
+            self.wins += sign
+        elif outcome < 0:
+            self.losses += sign
+        else:
+            self.pushes += sign
+        self.net += sign * net
+
+    def __len__(self):
+        return len(self._results)
+
+    def win_rate(self):
+        """Процент выигрышей в окне"""
+        return self.wins / len(self._results) * 100 if self._results else 0.0
+
+
+class RoundStatsAggregator:
+    """
+    Статистика раундов, обновляемая за O(1) в конце каждого раунда
+    Подключается к GameManager как слушатель end_round; экран статистики
+    только читает готовые значения
+    """
+
+    def __init__(self, config, windows=(100, 1000)):
+        """
+        config: объект ConfigLoader (начальные значения общей статистики)
+        windows: размеры скользящих окон
+        """
+        stats = config.get('stats', default={})
+        self.total_games = stats.get('total_games', 0)
+        self.wins = stats.get('wins', 0)
+        self.losses = stats.get('losses', 0)
+        self.blackjacks = stats.get('blackjacks', 0)
+        self.highest_balance = stats.get('highest_balance', 0)
+        self.win_rate = self.wins / self.total_games * 100 if self.total_games else 0.0
+
+        self.windows = {size: RollingWindow(size) for size in windows}
+
+        # Серии: положительная длина - выигрыши подряд, отрицательная - проигрыши
+        self.streak = 0
+        self.longest_win_streak = 0
+        self.longest_loss_streak = 0
+
+        # Текущая сессия
+        self.session_difficulty = None
+        self.session_start_balance = 0
+        self.session_net = 0
+        self.session_rounds = 0
+
+        # Разбивка по сложности: {сложность: {'rounds', 'wins', 'losses', 'net'}}
+        self.by_difficulty = {}
+
+        self.version = 0  # Растет при каждом изменении
+
+    def start_session(self, difficulty, starting_balance):
+        """Начинает новую игровую сессию"""
+        self.session_difficulty = difficulty
+        self.session_start_balance = starting_balance
+        self.session_net = 0
+        self.session_rounds = 0
+        self.version += 1
+
+    def on_round_end(self, game_manager, result):
+        """Слушатель GameManager.end_round"""
+        self.record(result, game_manager.round_net, game_manager.player.balance, game_manager.difficulty)
+
+    def record(self, result, net, balance, difficulty=None):
+        """
+        Учитывает завершенный раунд
+        result: 'win', 'lose', 'push', 'blackjack', 'bust'
+        net: чистый результат раунда
+        """
+        if result in ("win", "blackjack"):
+            outcome = 1
+        elif result in ("lose", "bust"):
+            outcome = -1
+        else:
+            outcome = 0
+
+        # Общая статистика (как GameManager._update_stats)
+        self.total_games += 1
+        if outcome > 0:
+            self.wins += 1
+        elif outcome < 0:
+            self.losses += 1
+        if result == "blackjack":
+            self.blackjacks += 1
+        if balance > self.highest_balance:
+            self.highest_balance = balance
+        self.win_rate = self.wins / self.total_games * 100
+
+        for window in self.windows.values():
+            window.add(outcome, net)
+
+        # Серии; ничья серию не прерывает
+        if outcome > 0:
+            self.streak = self.streak + 1 if self.streak > 0 else 1
+            self.longest_win_streak = max(self.longest_win_streak, self.streak)
+        elif outcome < 0:
+            self.streak = self.streak - 1 if self.streak < 0 else -1
+            self.longest_loss_streak = max(self.longest_loss_streak, -self.streak)
+
+        self.session_net += net
+        self.session_rounds += 1
+
+        split = self.by_difficulty.setdefault(difficulty, {'rounds': 0, 'wins': 0, 'losses': 0, 'net': 0})
+        split['rounds'] += 1
+        split['net'] += net
+        if outcome > 0:
+            split['wins'] += 1
+        elif outcome < 0:
+            split['losses'] += 1
+
+        self.version += 1
@@ -0,0 +1,181 @@
+import operator
+import os
+import random
+import secrets
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_WORD_LIMIT = 1 << 64
+
+
+class SeededShuffler:
+    """Тасование генератором random.Random (Mersenne Twister); с seed - воспроизводимое"""
+
+    name = "seeded"
+
+    def __init__(self, seed=None):
+        """seed: зерно генератора (None - из энтропии ОС)"""
+        self.rng = random.Random(seed)
+        self._forks = 0
+
+    def shuffle(self, items):
+        """Тасует список на месте"""
+        self.rng.shuffle(items)
+
+    def randbelow(self, n):
+        """Случайное целое 0..n-1"""
+        return self.rng.randrange(n)
+
+    def permutation(self, n):
+        """Случайная перестановка индексов 0..n-1"""
+        indices = list(range(n))
+        self.shuffle(indices)
+        return indices
+
+    def permutations(self, n, count):
+        """count перестановок подряд (список списков)"""
+        return [self.permutation(n) for _ in range(count)]
+
+    def fork(self):
+        """
+        Независимый движок для копии колоды: зерно - из состояния генератора
+        и номера копии, поэтому копии одной позиции получают разные потоки,
+        а поток игры не расходуется (при заданном зерне все воспроизводимо)
+        """
+        self._forks += 1
+        forked = SeededShuffler.__new__(type(self))
+        forked.rng = random.Random(f"{hash(self.rng.getstate())}:{self._forks}")
+        forked._forks = 0
+        return forked
+
+
+class SystemShuffler(SeededShuffler):
+    """
+    Криптостойкое тасование для игры на деньги: Фишер-Йейтс на байтах os.urandom
+    Случайные слова берутся одним блоком на тасование; выбор без смещения
+    (слова из неполного последнего диапазона отбрасываются)
+    """
+
+    name = "system"
+
+    def __init__(self, seed=None):
+        """seed не используется: криптостойкий источник не воспроизводим"""
+
+    def randbelow(self, n):
+        return secrets.randbelow(n)
+
+    def fork(self):
+        """Состояния нет - копии колод могут делить движок"""
+        return self
+
+    def shuffle(self, items):
+        n = len(items)
+        if n < 2:
+            return
+        words = memoryview(os.urandom(8 * (n - 1))).cast('Q')
+        for position, i in enumerate(range(n - 1, 0, -1)):
+            bound = i + 1
+            word = words[position]
+            # Отбрасывание: остаток неполного диапазона дал бы смещение
+            if word >= _WORD_LIMIT - _WORD_LIMIT % bound:
+                j = secrets.randbelow(bound)
+            else:
+                j = word % bound
+            items[i], items[j] = items[j], items[i]
+
+
+class PCG64Shuffler:
+    """
+    Быстрое тасование NumPy: PCG64 и пакетная генерация перестановок
+    Перестановки готовятся блоками по batch штук одним вызовом
+    Generator.permuted (Фишер-Йейтс в C) и выдаются по одной
+    """
+
+    name = "pcg64"
+
+    def __init__(self, seed=None, batch=1024):
+        """
+        seed: зерно генератора (None - из энтропии ОС)
+        batch: сколько перестановок готовить за раз
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for the pcg64 shuffler")
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+        self.batch = batch
+        self._forks = 0
+        self._size = None
+        self._block = None
+        self._next = 0
+        self._words = []
+
+    def fork(self):
+        """
+        Независимый движок для копии колоды: n-я копия - генератор, сдвинутый
+        на n * 2^127 шагов (jumped(n)), поэтому копии одной позиции получают
+        разные потоки; поток игры и заготовленные блоки не затрагиваются
+        """
+        self._forks += 1
+        forked = PCG64Shuffler.__new__(PCG64Shuffler)
+        forked.rng = np.random.Generator(self.rng.bit_generator.jumped(self._forks))
+        forked.batch = self.batch
+        forked._forks = 0
+        forked._size = None
+        forked._block = None
+        forked._next = 0
+        forked._words = []
+        return forked
+
+    def randbelow(self, n):
+        """
+        Случайное целое 0..n-1 из заготовленных 64-битных слов
+        (умножение со сдвигом Лемира, с отбрасыванием для точной равномерности)
+        """
+        while True:
+            if not self._words:
+                self._words = self.rng.integers(0, _WORD_LIMIT, self.batch, dtype=np.uint64, endpoint=False).tolist()
+            product = self._words.pop() * n
+            low = product & (_WORD_LIMIT - 1)
+            if low >= n or low >= (_WORD_LIMIT - n) % n:
+                return product >> 64
+
+    def permutations(self, n, count):
+        """count перестановок как массив (count, n)"""
+        base = np.broadcast_to(np.arange(n, dtype=np.int32), (count, n))
+        return self.rng.permuted(base, axis=1)
+
+    def permutation(self, n):
+        """Очередная перестановка из заготовленного блока"""
+        if n != self._size or self._next == len(self._block):
+            self._block = self.permutations(n, self.batch)
+            self._size = n
+            self._next = 0
+        row = self._block[self._next]
+        self._next += 1
+        return row
+
+    def shuffle(self, items):
+        """Переставляет список на месте по очередной перестановке"""
+        n = len(items)
+        if n < 2:
+            return
+        items[:] = operator.itemgetter(*self.permutation(n).tolist())(items)
+
+
+SHUFFLERS = {
+    SeededShuffler.name: SeededShuffler,
+    SystemShuffler.name: SystemShuffler,
+    PCG64Shuffler.name: PCG64Shuffler,
+}
+
+
+def create_shuffler(name="seeded", seed=None):
+    """
+    Создает движок тасования по имени
+    name: 'seeded', 'system' или 'pcg64'
+    """
+    if name not in SHUFFLERS:
+        raise ValueError(f"Unknown shuffler: {name}")
+    return SHUFFLERS[name](seed)
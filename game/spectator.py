@@ -0,0 +1,330 @@
+import argparse
+import os
+import selectors
+import socket
+import struct
+
+from game.deck import SUITS, RANKS
+
+# Типы сообщений
+SNAPSHOT = 1  # Полное состояние стола (первое сообщение для нового наблюдателя)
+CARD = 2      # Карта сдана: место, ранг, масть
+REVEAL = 3    # Открыта карта дилера: индекс, ранг, масть
+BET = 4       # Ставка и баланс
+SETTLE = 5    # Итог раунда: исход, чистый результат, баланс
+CLEAR = 6     # Новый раунд: руки очищены, карт в колоде
+STATE = 7     # Состояние игры
+
+STATES = ["betting", "playing", "dealer_turn", "round_over", "game_over"]
+OUTCOMES = [None, "win", "lose", "push", "blackjack", "bust"]
+
+PLAYER_SEAT = 0
+DEALER_SEAT = 1
+HIDDEN = 0xFF  # Ранг/масть закрытой карты не передаются
+
+# Кадр: длина сообщения, затем тип и данные
+FRAME = struct.Struct('<HB')
+CARD_MESSAGE = struct.Struct('<BBB')
+REVEAL_MESSAGE = struct.Struct('<BBB')
+BET_MESSAGE = struct.Struct('<ii')
+SETTLE_MESSAGE = struct.Struct('<Bii')
+STATE_MESSAGE = struct.Struct('<B')
+CLEAR_MESSAGE = struct.Struct('<H')
+SNAPSHOT_HEADER = struct.Struct('<BiiHBB')
+
+_RANK_CODES = {rank: code for code, rank in enumerate(RANKS)}
+_SUIT_CODES = {suit: code for code, suit in enumerate(SUITS)}
+
+
+def _frame(message_type, payload=b''):
+    return FRAME.pack(len(payload) + 1, message_type) + payload
+
+
+class TableView:
+    """Состояние стола с точки зрения наблюдателя (закрытые карты неизвестны)"""
+
+    def __init__(self):
+        self.state = "betting"
+        self.bet = 0
+        self.balance = 0
+        self.cards_remaining = 0
+        self.player_cards = []  # (ранг, масть)
+        self.dealer_cards = []  # (ранг, масть) или None для закрытой карты
+        self.last_outcome = None
+        self.last_net = 0
+
+    @classmethod
+    def from_game(cls, game_manager):
+        """Снимает вид стола с GameManager"""
+        view = cls()
+        view.state = game_manager.game_state
+        view.bet = game_manager.player.bet
+        view.balance = game_manager.player.balance
+        view.cards_remaining = game_manager.deck.cards_remaining()
+        view.player_cards = [(card.rank, card.suit) for card in game_manager.player.hand]
+        view.dealer_cards = [(card.rank, card.suit) if card.face_up else None for card in game_manager.dealer.hand]
+        view.last_outcome = game_manager.last_result
+        view.last_net = game_manager.round_net
+        return view
+
+    def encode_snapshot(self):
+        """Полное состояние одним сообщением"""
+        payload = bytearray(SNAPSHOT_HEADER.pack(STATES.index(self.state), self.bet, self.balance,
+                                                 self.cards_remaining, len(self.player_cards),
+                                                 len(self.dealer_cards)))
+        for card in self.player_cards + self.dealer_cards:
+            payload += _encode_card(card)
+        return _frame(SNAPSHOT, bytes(payload))
+
+    def diff(self, new):
+        """Кадры изменений от этого вида к новому"""
+        frames = []
+
+        # Руки стали короче - начался новый раунд
+        if len(new.player_cards) < len(self.player_cards) or len(new.dealer_cards) < len(self.dealer_cards):
+            frames.append(_frame(CLEAR, CLEAR_MESSAGE.pack(new.cards_remaining)))
+            old_player, old_dealer = [], []
+        else:
+            old_player, old_dealer = self.player_cards, self.dealer_cards
+
+        if new.bet != self.bet or new.balance != self.balance:
+            frames.append(_frame(BET, BET_MESSAGE.pack(new.bet, new.balance)))
+
+        for card in new.player_cards[len(old_player):]:
+            frames.append(_frame(CARD, CARD_MESSAGE.pack(PLAYER_SEAT, *_encode_card(card))))
+
+        for index, card in enumerate(old_dealer):
+            if card is None and new.dealer_cards[index] is not None:
+                frames.append(_frame(REVEAL, REVEAL_MESSAGE.pack(index, *_encode_card(new.dealer_cards[index]))))
+        for card in new.dealer_cards[len(old_dealer):]:
+            frames.append(_frame(CARD, CARD_MESSAGE.pack(DEALER_SEAT, *_encode_card(card))))
+
+        if new.state != self.state:
+            if new.state == "round_over":
+                frames.append(_frame(SETTLE, SETTLE_MESSAGE.pack(OUTCOMES.index(new.last_outcome),
+                                                                 new.last_net, new.balance)))
+            frames.append(_frame(STATE, STATE_MESSAGE.pack(STATES.index(new.state))))
+
+        return frames
+
+    def apply(self, message_type, payload):
+        """Применяет одно сообщение (на стороне наблюдателя)"""
+        if message_type == SNAPSHOT:
+            state, self.bet, self.balance, self.cards_remaining, players, dealers = SNAPSHOT_HEADER.unpack_from(payload)
+            self.state = STATES[state]
+            cards = payload[SNAPSHOT_HEADER.size:]
+            decoded = [_decode_card(cards[i * 2], cards[i * 2 + 1]) for i in range(players + dealers)]
+            self.player_cards = decoded[:players]
+            self.dealer_cards = decoded[players:]
+        elif message_type == CARD:
+            seat, rank, suit = CARD_MESSAGE.unpack(payload)
+            hand = self.player_cards if seat == PLAYER_SEAT else self.dealer_cards
+            hand.append(_decode_card(rank, suit))
+            self.cards_remaining -= 1
+        elif message_type == REVEAL:
+            index, rank, suit = REVEAL_MESSAGE.unpack(payload)
+            self.dealer_cards[index] = _decode_card(rank, suit)
+        elif message_type == BET:
+            self.bet, self.balance = BET_MESSAGE.unpack(payload)
+        elif message_type == SETTLE:
+            outcome, self.last_net, self.balance = SETTLE_MESSAGE.unpack(payload)
+            self.last_outcome = OUTCOMES[outcome]
+        elif message_type == CLEAR:
+            self.cards_remaining = CLEAR_MESSAGE.unpack(payload)[0]
+            self.player_cards = []
+            self.dealer_cards = []
+            self.last_outcome = None
+            self.last_net = 0
+        elif message_type == STATE:
+            self.state = STATES[STATE_MESSAGE.unpack(payload)[0]]
+
+    def __str__(self):
+        dealer = ', '.join(f"{rank}{suit[0]}" if rank else "??" for rank, suit in
+                           ((card if card else (None, None)) for card in self.dealer_cards))
+        player = ', '.join(f"{rank}{suit[0]}" for rank, suit in self.player_cards)
+        return (f"[{self.state}] Dealer: {dealer} | Player: {player} | "
+                f"Bet: ${self.bet} Balance: ${self.balance}")
+
+
+def _encode_card(card):
+    if card is None:
+        return bytes((HIDDEN, HIDDEN))
+    rank, suit = card
+    return bytes((_RANK_CODES[rank], _SUIT_CODES[suit]))
+
+
+def _decode_card(rank, suit):
+    if rank == HIDDEN:
+        return None
+    return RANKS[rank], SUITS[suit]
+
+
+def parse_address(text):
+    """Адрес из строки: 'host:port' - TCP, иначе путь Unix-сокета"""
+    if ':' in text:
+        host, port = text.rsplit(':', 1)
+        return host, int(port)
+    return text
+
+
+def _create_socket(address):
+    """Сокет по адресу: строка - путь Unix-сокета, кортеж - (host, port) TCP"""
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+class SpectatorPublisher:
+    """
+    Публикует состояние стола наблюдателям через локальный сокет
+    Новый наблюдатель получает снимок, дальше - только компактные изменения.
+    Каждое изменение кодируется один раз и рассылается всем без блокировки;
+    наблюдатель, отставший больше чем на max_backlog байт, отключается
+    """
+
+    def __init__(self, address, max_backlog=256 * 1024):
+        """
+        address: путь Unix-сокета или (host, port)
+        max_backlog: предел неотправленных байт на одного наблюдателя
+        """
+        self.address = address
+        self.max_backlog = max_backlog
+        self._view = TableView()
+        self._subscribers = {}  # сокет -> неотправленные байты
+        self._selector = selectors.DefaultSelector()
+
+        if isinstance(address, str):
+            try:
+                os.unlink(address)
+            except OSError:
+                pass
+        self._server = _create_socket(address)
+        if not isinstance(address, str):
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen(128)
+        self._server.setblocking(False)
+        self._selector.register(self._server, selectors.EVENT_READ)
+
+    def attach(self, game_manager):
+        """Подписывается на изменения стола GameManager"""
+        game_manager.add_change_listener(self.on_change)
+        self.on_change(game_manager)
+
+    def on_change(self, game_manager):
+        """Слушатель GameManager: рассылает изменения с прошлой публикации"""
+        view = TableView.from_game(game_manager)
+        frames = self._view.diff(view)
+        self._view = view
+        if frames:
+            self._broadcast(b''.join(frames))
+
+    def _broadcast(self, data):
+        for subscriber in list(self._subscribers):
+            self._subscribers[subscriber] += data
+            self._flush(subscriber)
+
+    def poll(self):
+        """Вызывается каждый кадр: принимает наблюдателей и досылает данные без ожидания"""
+        for key, _ in self._selector.select(timeout=0):
+            if key.fileobj is self._server:
+                self._accept()
+        for subscriber in list(self._subscribers):
+            if self._subscribers[subscriber]:
+                self._flush(subscriber)
+
+    def _accept(self):
+        while True:
+            try:
+                subscriber, _ = self._server.accept()
+            except BlockingIOError:
+                return
+            subscriber.setblocking(False)
+            self._subscribers[subscriber] = bytearray(self._view.encode_snapshot())
+            self._flush(subscriber)
+
+    def _flush(self, subscriber):
+        """Отправляет сколько примет сокет; медленного наблюдателя отключает"""
+        pending = self._subscribers[subscriber]
+        try:
+            sent = subscriber.send(pending)
+            del pending[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(subscriber)
+            return
+
+        if len(pending) > self.max_backlog:
+            self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        self._subscribers.pop(subscriber, None)
+        subscriber.close()
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def close(self):
+        """Закрывает все соединения"""
+        for subscriber in list(self._subscribers):
+            self._drop(subscriber)
+        self._selector.close()
+        self._server.close()
+
+
+class SpectatorClient:
+    """Наблюдатель: подключается к публикатору и поддерживает свой TableView"""
+
+    def __init__(self, address):
+        self.view = TableView()
+        self._socket = _create_socket(address)
+        self._socket.connect(address)
+        self._buffer = bytearray()
+
+    def receive(self, timeout=None):
+        """
+        Читает доступные данные и применяет сообщения
+        timeout: ожидание в секундах (0 - без ожидания, None - до прихода данных)
+        Возвращает список типов примененных сообщений (пустой, если данных нет)
+        """
+        self._socket.settimeout(timeout)
+        try:
+            data = self._socket.recv(65536)
+        except (socket.timeout, BlockingIOError):
+            return []
+        if not data:
+            raise ConnectionError("Publisher closed the stream")
+        self._buffer += data
+
+        applied = []
+        while len(self._buffer) >= FRAME.size:
+            length, message_type = FRAME.unpack_from(self._buffer)
+            end = 2 + length
+            if len(self._buffer) < end:
+                break
+            self.view.apply(message_type, bytes(self._buffer[FRAME.size:end]))
+            del self._buffer[:end]
+            applied.append(message_type)
+        return applied
+
+    def close(self):
+        self._socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectator stream viewer")
+    parser.add_argument('address', help="Unix socket path or host:port")
+    args = parser.parse_args()
+
+    client = SpectatorClient(parse_address(args.address))
+    try:
+        while True:
+            if client.receive():
+                print(client.view)
+    except (ConnectionError, KeyboardInterrupt):
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
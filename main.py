@@ -1,53 +1,196 @@
+import argparse
+import os
+import random
+import time
+
 import pygame
 import sys
 from config.config_loader import ConfigLoader
 from game.renderer import Renderer
+from game.layout import Layout
 from game.game_manager import GameManager
+from game.round_stats import RoundStatsAggregator
+from game.advisor import DecisionAdvisor
+from game.memory_watchdog import FrameAllocationTracker, MemoryWatchdog
+from game.input_latency import InputLatencyTracker
+from game.spectator import SpectatorPublisher, parse_address
+from game.input_trace import InputRecorder, InputReplayer
+from game.frame_export import FrameRing
+from game.shuffler import create_shuffler
+from game.autoplay import AutoPlayer
+from simulation.analytics import load_policy
+from simulation.engine import hit_below_17
+from simulation.streaming import Welford, TDigest
 from ui.menu import Menu
 from ui.button import Button
+from ui.widget_tree import WidgetScreen, coalesce_motion
+
+# Номиналы ставок
+BET_AMOUNTS = [10, 25, 50, 100, 500, 1000]
 
 
 class BlackjackGame:
     """Главный класс игры Блек Джек"""
 
-    def __init__(self):
-        """Инициализация игры"""
+    def __init__(self, record=None, replay=None, fast=False, seed=None, autoplay=False):
+        """
+        Инициализация игры
+        record: путь для записи ввода сессии
+        replay: путь к записи ввода для воспроизведения
+        fast: воспроизводить без ограничения FPS и задержек дилера
+        seed: зерно тасования (при воспроизведении берется из записи)
+        autoplay: сразу начать игру в режиме автоигры
+        """
         # Инициализация pygame
         pygame.init()
 
-        # Загрузка конфигурации
+        # Загрузка конфигурации; воспроизведение идет на копии с настройками
+        # из записи, которая никогда не сохраняется
         self.config = ConfigLoader()
+        self.replayer = InputReplayer(replay, realtime=not fast) if replay else None
+        if self.replayer:
+            self.config = self.config.detached()
+            self.replayer.apply(self.config)
 
-        # Создание окна
+        # Создание окна: интерфейс размечен в виртуальном размере width x height
+        # и масштабируется в окно (раздел display конфига) или на весь экран
         self.width = self.config.get('game', 'screen_width')
         self.height = self.config.get('game', 'screen_height')
-        self.screen = pygame.display.set_mode((self.width, self.height))
+        display = self.config.get('display', default={})
+        self.window_size = (display.get('width', self.width), display.get('height', self.height))
+        self.resizable = display.get('resizable', True)
+        self.fullscreen = display.get('fullscreen', False)
+        self.screen = self._set_display_mode()
         pygame.display.set_caption(self.config.get('game', 'title'))
+        self.layout = Layout((self.width, self.height), self.screen.get_size())
 
         # FPS
         self.clock = pygame.time.Clock()
         self.fps = self.config.get('game', 'fps')
 
         # Создание компонентов
-        self.renderer = Renderer(self.screen, self.config)
-        self.menu = Menu(self.screen, self.config, self.renderer)
+        self.renderer = Renderer(self.screen, self.config, self.layout)
+        self.round_stats = RoundStatsAggregator(self.config)
+        self.menu = Menu(self.screen, self.config, self.renderer, self.round_stats)
         self.game_manager = None
 
         # Состояние приложения
         self.app_state = "menu"  # menu, game
 
+        # Советник HIT/STAND (включается в конфиге или клавишей A)
+        self.advisor = DecisionAdvisor(self.config) if self.config.get('game', 'advisor', default=False) else None
+
+        # Диагностика памяти (включается в разделе diagnostics конфига)
+        self._create_diagnostics()
+
+        # Трансляция стола наблюдателям (раздел spectator конфига)
+        self.spectator = None
+        if self.config.get('spectator', 'enabled', default=False):
+            self.spectator = SpectatorPublisher(parse_address(self.config.get('spectator', 'address')))
+
+        # Публикация кадров в общую память для записи/трансляции (раздел frame_export)
+        self.frame_ring = None
+        if self.config.get('frame_export', 'enabled', default=False):
+            self._create_frame_ring()
+
         # Кнопки управления игрой
         self._create_game_buttons()
 
         # Кнопки ставок
         self._create_bet_buttons()
 
+        # Экраны игры по состояниям с индексом попаданий
+        self._create_game_screens()
+        self.mouse_pos = (0, 0)
+        self._active_screen = None
+        self._quit_requested = False
+
+        # Запись и воспроизведение ввода: при одинаковых событиях и зерне тасования
+        # сессия повторяется кадр в кадр
+        if self.replayer:
+            seed = self.replayer.seed
+        elif record and seed is None:
+            seed = random.randrange(2 ** 32)
+        self.shuffle_seed = seed
+        self.fast = fast and self.replayer is not None
+        self.recorder = None
+        if record:
+            self.recorder = InputRecorder(record, seed, (self.width, self.height), self.config)
+        self.frame = 0
+        self._games_started = 0
+        self._poll_time = 0.0
+        self._loop_start = time.perf_counter()
+
+        # Время кадров при воспроизведении
+        self.frame_times = Welford()
+        self.frame_time_digest = TDigest()
+
+        # Автоигра (клавиша T в игре): стратегия играет раунды без задержек,
+        # кадр рисуется раз в несколько раундов
+        self.autoplay = None
+        self._autoplay_restore = None
+        self._autoplay_summary = None  # Итог последней автоигры и кадр, до которого он виден
+        # Стратегии автоигры {(имя, сложность): стратегия}: загружаются один раз за сессию
+        self._autoplay_policies = {}
+        if autoplay:
+            self.start_game()
+            self._toggle_autoplay()
+
+    def _set_display_mode(self):
+        """Открывает окно (или полный экран) по текущим настройкам"""
+        if self.fullscreen:
+            return pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        return pygame.display.set_mode(self.window_size, pygame.RESIZABLE if self.resizable else 0)
+
+    def _toggle_fullscreen(self):
+        """Переключает окно/полный экран (клавиша F11)"""
+        self.fullscreen = not self.fullscreen
+        self._apply_display(self._set_display_mode())
+
+    def _apply_display(self, screen):
+        """Новое окно или новый размер: масштаб и кэши отрисовки пересчитываются один раз"""
+        self.screen = screen
+        self.menu.screen = screen
+        self.renderer.resize(screen)
+        if self.frame_ring and self.frame_ring.size != screen.get_size():
+            self._create_frame_ring()
+
+    def _create_frame_ring(self):
+        """Кольцо кадров размера окна (при смене размера пересоздается)"""
+        if self.frame_ring:
+            self.frame_ring.close()
+        self.frame_ring = FrameRing(self.config.get('frame_export', 'name', default='blackjack_frames'),
+                                    self.screen.get_size(), self.config.get('frame_export', 'slots', default=4))
+
+    def _create_diagnostics(self):
+        """Создает трекер выделений по кадрам, сторож памяти и замер задержки ввода"""
+        diagnostics = self.config.get('diagnostics', default={})
+
+        self.allocation_tracker = None
+        if diagnostics.get('allocation_tracking'):
+            self.allocation_tracker = FrameAllocationTracker(
+                budget=diagnostics.get('frame_allocation_budget', 64 * 1024),
+                every=diagnostics.get('allocation_sample_every', 1)
+            )
+
+        self.memory_watchdog = None
+        if diagnostics.get('memory_watchdog'):
+            self.memory_watchdog = MemoryWatchdog(
+                interval=diagnostics.get('watchdog_interval', 60),
+                rss_growth_limit=diagnostics.get('rss_growth_limit_mb', 64) * 1024 * 1024,
+                gc_pause_limit=diagnostics.get('gc_pause_limit_ms', 20) / 1000
+            )
+
+        self.input_latency = None
+        if diagnostics.get('input_latency'):
+            self.input_latency = InputLatencyTracker(limit=diagnostics.get('input_latency_limit_ms', 100) / 1000)
+
     def _create_game_buttons(self):
         """Создает кнопки для игрового процесса"""
-        self.hit_button = Button(300, 600, 120, 50, "HIT", self.config)
-        self.stand_button = Button(450, 600, 120, 50, "STAND", self.config)
-        self.new_round_button = Button(600, 600, 150, 50, "NEW ROUND", self.config)
-        self.menu_button = Button(780, 600, 120, 50, "MENU", self.config)
+        self.hit_button = Button(300, 600, 120, 50, "HIT", self.config, self._on_hit)
+        self.stand_button = Button(450, 600, 120, 50, "STAND", self.config, self._on_stand)
+        self.new_round_button = Button(600, 600, 150, 50, "NEW ROUND", self.config, self._on_new_round)
+        self.menu_button = Button(780, 600, 120, 50, "MENU", self.config, self._on_menu)
 
     def _create_bet_buttons(self):
         """Создает кнопки для ставок"""
@@ -56,108 +199,258 @@ class BlackjackGame:
         button_width = 100
         button_spacing = 120
 
-        bet_amounts = [10, 25, 50, 100, 500, 1000]
         self.bet_buttons = []
 
-        for i, amount in enumerate(bet_amounts):
+        for i, amount in enumerate(BET_AMOUNTS):
             x = start_x + i * button_spacing
-            button = Button(x, start_y, button_width, 50, f"${amount}", self.config)
+            button = Button(x, start_y, button_width, 50, f"${amount}", self.config,
+                            lambda amount=amount: self._on_bet(amount))
             self.bet_buttons.append(button)
 
+    def _create_game_screens(self):
+        """Собирает кнопки каждого состояния игры в отдельный экран"""
+        state_buttons = {
+            "betting": self.bet_buttons,
+            "playing": [self.hit_button, self.stand_button],
+            "round_over": [self.new_round_button],
+            "game_over": [],
+        }
+
+        self.game_screens = {}
+        for state, buttons in state_buttons.items():
+            screen = WidgetScreen()
+            for button in buttons:
+                screen.add(button)
+            # Кнопка меню активна в любом состоянии
+            screen.add(self.menu_button)
+            self.game_screens[state] = screen
+
     def start_game(self):
         """Запуск игры из меню"""
         self.app_state = "game"
-        self.game_manager = GameManager(self.config, self.renderer)
+
+        # С заданным зерном каждая новая игра тасуется воспроизводимо
+        shuffler = None
+        if self.shuffle_seed is not None:
+            shuffler = create_shuffler(self.config.get('game', 'shuffler', default='seeded'),
+                                       self.shuffle_seed + self._games_started)
+        self._games_started += 1
+        # Воспроизведение не пишет статистику игрока
+        dealer_delay = 0 if self.fast else 500
+        self.game_manager = GameManager(self.config, self.renderer, record_stats=self.replayer is None,
+                                        dealer_delay=dealer_delay, shuffler=shuffler)
+        self.game_manager.add_round_listener(self.round_stats.on_round_end)
+        self.round_stats.start_session(self.game_manager.difficulty, self.game_manager.player.balance)
+        if self.spectator:
+            self.spectator.attach(self.game_manager)
         self.game_manager.start_new_round()
 
+    def _poll_events(self):
+        """
+        События кадра: из очереди pygame или из записи; при записи - сохраняются
+        Координаты мыши переводятся в виртуальные, поэтому запись не зависит от размера окна
+        """
+        events = [self.layout.event(event) for event in pygame.event.get()]
+        self._poll_time = time.perf_counter()
+        elapsed = self._poll_time - self._loop_start
+
+        if self.replayer:
+            # Живой ввод при воспроизведении игнорируется, кроме закрытия окна
+            live_quit = [event for event in events if event.type == pygame.QUIT]
+            events = self.replayer.events(self.frame, elapsed) + live_quit
+            if self.replayer.finished and not events:
+                events = [pygame.event.Event(pygame.QUIT)]
+
+        if self.recorder:
+            self.recorder.record(self.frame, elapsed, events)
+        return events
+
     def handle_events(self):
         """Обработка всех событий"""
-        for event in pygame.event.get():
+        for event in coalesce_motion(self._poll_events()):
             if event.type == pygame.QUIT:
                 return False
 
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = event.pos
+
+            if self.input_latency and event.type == pygame.MOUSEBUTTONDOWN:
+                self.input_latency.click(self._poll_time)
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_a:
+                self._toggle_advisor()
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                self._toggle_fullscreen()
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_t and self.app_state == "game":
+                self._toggle_autoplay()
+
             # Обработка событий в зависимости от состояния
             if self.app_state == "menu":
                 self._handle_menu_events(event)
             elif self.app_state == "game":
                 self._handle_game_events(event)
 
+            if self._quit_requested:
+                return False
+
         return True
 
     def _handle_menu_events(self, event):
         """Обработка событий меню"""
+        if self.input_latency and event.type == pygame.MOUSEBUTTONDOWN:
+            if self.menu.screens[self.menu.current_screen].hit_test(event.pos):
+                self.input_latency.action("menu")
+
         action = self.menu.handle_event(event)
 
         if action == "play":
             self.start_game()
         elif action == "exit":
-            pygame.quit()
-            sys.exit()
+            self._quit_requested = True
 
     def _handle_game_events(self, event):
         """Обработка событий в игре"""
-        game_state = self.game_manager.get_state()
-
-        # Кнопка возврата в меню (всегда активна)
-        self.menu_button.handle_event(event)
-        if event.type == pygame.MOUSEBUTTONDOWN and self.menu_button.is_hovered():
-            self.app_state = "menu"
-            self.menu.reset_to_main()
+        screen = self.game_screens.get(self.game_manager.get_state())
+        if screen is None:
             return
 
-        # Состояние: делаем ставку
-        if game_state == "betting":
-            self._handle_betting_events(event)
-
-        # Состояние: игра идет
-        elif game_state == "playing":
-            self._handle_playing_events(event)
-
-        # Состояние: раунд окончен
-        elif game_state == "round_over":
-            self._handle_round_over_events(event)
-
-    def _handle_betting_events(self, event):
-        """Обработка ставок"""
-        bet_amounts = [10, 25, 50, 100, 500, 1000]
-
-        for i, button in enumerate(self.bet_buttons):
-            button.handle_event(event)
-
-            if event.type == pygame.MOUSEBUTTONDOWN and button.is_hovered():
-                # Проверяем, достаточно ли у игрока денег для этой ставки
-                if self.game_manager.player.balance >= bet_amounts[i]:
-                    self.game_manager.place_bet(bet_amounts[i])
-                # Если денег недостаточно - кнопка просто не сработает
-
-    def _handle_playing_events(self, event):
-        """Обработка хода игрока"""
-        # Кнопка HIT
-        self.hit_button.handle_event(event)
-        if event.type == pygame.MOUSEBUTTONDOWN and self.hit_button.is_hovered():
-            if self.game_manager.can_hit():
-                self.game_manager.player_hit()
-
-        # Кнопка STAND
-        self.stand_button.handle_event(event)
-        if event.type == pygame.MOUSEBUTTONDOWN and self.stand_button.is_hovered():
-            if self.game_manager.can_stand():
-                self.game_manager.player_stand()
-
-    def _handle_round_over_events(self, event):
-        """Обработка конца раунда"""
-        self.new_round_button.handle_event(event)
+        # При смене состояния обновляем подсветку кнопок нового экрана
+        if screen is not self._active_screen:
+            screen.update_hover(self.mouse_pos)
+            self._active_screen = screen
+
+        screen.dispatch(event)
+
+    def _toggle_advisor(self):
+        """Включает/выключает советника"""
+        if self.advisor:
+            self.advisor.close()
+            self.advisor = None
+        else:
+            self.advisor = DecisionAdvisor(self.config)
+
+    def _toggle_autoplay(self):
+        """Включает/выключает автоигру"""
+        if self.autoplay:
+            self._stop_autoplay()
+            return
 
-        if event.type == pygame.MOUSEBUTTONDOWN and self.new_round_button.is_hovered():
-            self.game_manager.start_new_round()
+        self.autoplay = AutoPlayer(self.config, self.game_manager.difficulty,
+                                   self._autoplay_policy(self.game_manager.difficulty))
+        # Без задержек дилера; раунды автоигры не попадают ни в статистику игрока,
+        # ни в счетчики экрана STATS
+        self._autoplay_restore = (self.game_manager.dealer_delay, self.game_manager.record_stats)
+        self.game_manager.dealer_delay = 0
+        self.game_manager.record_stats = False
+        self.game_manager.remove_round_listener(self.round_stats.on_round_end)
+        self._autoplay_summary = None
+        if self.advisor:
+            self.advisor.cancel()
+
+    def _autoplay_policy(self, difficulty):
+        """
+        (имя, стратегия) для автоигры по настройке autoplay.policy
+        Таблица 'chart' компилируется в фоновом потоке аналитики меню (при первом
+        запуске он пересчитывает кэш аналитики): пока она не готова, играет hit17.
+        При записи и воспроизведении ввода смена стратегии посреди сессии сломала бы
+        повтор, поэтому таблица загружается сразу
+        """
+        name = self.config.get('autoplay', default={}).get('policy', 'hit17')
+        key = (name, difficulty)
+        if key not in self._autoplay_policies:
+            if name == 'chart' and self.recorder is None and self.replayer is None:
+                self.menu.start_analytics()
+                policy = self.menu.chart_policies.get(difficulty)
+                if policy is None:
+                    return 'hit17', hit_below_17
+            else:
+                policy = load_policy(self.config, name, difficulty)
+            self._autoplay_policies[key] = policy
+        return name, self._autoplay_policies[key]
+
+    def _stop_autoplay(self):
+        """Выключает автоигру и возвращает настройки стола"""
+        self.game_manager.dealer_delay, self.game_manager.record_stats = self._autoplay_restore
+        self.game_manager.add_round_listener(self.round_stats.on_round_end)
+        # Итог показывается на столе несколько секунд
+        summary = (f"AUTO {self.autoplay.policy_name} stopped: {self.autoplay.rounds:,} rounds, "
+                   f"{self.autoplay.rate():,.0f}/s, balance ${self.game_manager.player.balance}")
+        self._autoplay_summary = (summary, self.frame + self.fps * 5)
+        self.autoplay = None
+
+    def _mark_action(self, name):
+        """Отмечает действие последнего нажатия для замера задержки"""
+        if self.input_latency:
+            self.input_latency.action(name)
+
+    def _on_menu(self):
+        """Кнопка возврата в меню"""
+        self._mark_action("menu")
+        if self.autoplay:
+            self._stop_autoplay()
+        self.app_state = "menu"
+        self.menu.reset_to_main(self.mouse_pos)
+
+    def _on_bet(self, amount):
+        """Кнопка ставки"""
+        # Проверяем, достаточно ли у игрока денег для этой ставки
+        if self.game_manager.player.balance >= amount:
+            self._mark_action("bet")
+            self.game_manager.place_bet(amount)
+        # Если денег недостаточно - кнопка просто не сработает
+
+    def _on_hit(self):
+        """Кнопка HIT"""
+        if self.game_manager.can_hit():
+            self._mark_action("hit")
+            if self.advisor:
+                self.advisor.cancel()
+            self.game_manager.player_hit()
+
+    def _on_stand(self):
+        """Кнопка STAND"""
+        if self.game_manager.can_stand():
+            self._mark_action("stand")
+            if self.advisor:
+                self.advisor.cancel()
+            self.game_manager.player_stand()
+
+    def _on_new_round(self):
+        """Кнопка NEW ROUND"""
+        self._mark_action("new_round")
+        self.game_manager.start_new_round()
 
     def update(self):
         """Обновление логики игры"""
-        # Пока обновлять нечего, но можно добавить анимации
-        pass
+        # Автоигра до следующего кадра; при записи и воспроизведении ввода -
+        # ровно render_every раундов на кадр, чтобы сессия повторялась
+        if self.autoplay and self.app_state == "game":
+            if self.autoplay.policy_name == 'hit17':
+                # Таблица стратегии могла догрузиться в фоне
+                policy = self._autoplay_policy(self.game_manager.difficulty)
+                if policy[0] != 'hit17':
+                    self.autoplay.set_policy(policy)
+            self.autoplay.play(self.game_manager, timed=self.recorder is None and self.replayer is None)
+            if self.game_manager.get_state() == "game_over":
+                self._stop_autoplay()
+
+        # Забираем последнюю оценку советника (без ожидания)
+        elif self.advisor and self.app_state == "game":
+            self.advisor.update(self.game_manager)
+
+        # Принимаем наблюдателей и досылаем им изменения
+        if self.spectator:
+            self.spectator.poll()
 
     def draw(self):
         """Отрисовка всего"""
+        # Окно изменило размер (перетаскивание рамки, смена режима)
+        screen = pygame.display.get_surface()
+        if screen is not self.screen or screen.get_size() != self.layout.window_size:
+            self._apply_display(screen)
+
         if self.app_state == "menu":
             self.menu.draw()
 
@@ -178,25 +471,32 @@ class BlackjackGame:
                 self._draw_round_over_screen()
 
             # Кнопка меню всегда видна
-            self.menu_button.draw(self.screen)
+            self.menu_button.draw(self.screen, self.layout)
+
+            if self.autoplay:
+                self.renderer.draw_text(f"AUTO {self.autoplay.policy_name}: {self.autoplay.rounds:,} rounds, "
+                                        f"{self.autoplay.rate():,.0f}/s (T - stop)",
+                                        20, 670, 'small', self.renderer.text_gold)
+            elif self._autoplay_summary and self.frame < self._autoplay_summary[1]:
+                self.renderer.draw_text(self._autoplay_summary[0], 20, 670, 'small', self.renderer.text_gold)
 
         pygame.display.flip()
+        if self.input_latency:
+            self.input_latency.presented()
+        if self.frame_ring:
+            self.frame_ring.publish(self.screen, self.frame)
 
     def _draw_betting_screen(self):
         """Отрисовка экрана ставок"""
         self.renderer.draw_text_centered("Place Your Bet", 250, 'large', self.renderer.text_gold)
 
         # Отрисовываем кнопки ставок
-        bet_amounts = [10, 25, 50, 100, 500, 1000]
         player_balance = self.game_manager.player.balance
 
         # Активируем/деактивируем кнопки в зависимости от баланса
-        for i, button in enumerate(self.bet_buttons):
-            if bet_amounts[i] <= player_balance:
-                button.set_enabled(True)
-            else:
-                button.set_enabled(False)
-            button.draw(self.screen)
+        for amount, button in zip(BET_AMOUNTS, self.bet_buttons):
+            button.set_enabled(amount <= player_balance)
+            button.draw(self.screen, self.layout)
 
     def _draw_playing_screen(self):
         """Отрисовка экрана игры"""
@@ -205,18 +505,25 @@ class BlackjackGame:
         self.stand_button.set_enabled(self.game_manager.can_stand())
 
         # Рисуем кнопки
-        self.hit_button.draw(self.screen)
-        self.stand_button.draw(self.screen)
+        self.hit_button.draw(self.screen, self.layout)
+        self.stand_button.draw(self.screen, self.layout)
+
+        # Подсказка советника
+        if self.advisor and self.advisor.advice:
+            self.renderer.draw_advice(self.advisor.advice)
 
     def _draw_round_over_screen(self):
         """Отрисовка экрана конца раунда"""
-        self.new_round_button.draw(self.screen)
+        self.new_round_button.draw(self.screen, self.layout)
 
     def run(self):
         """Главный игровой цикл"""
         running = True
+        self._loop_start = time.perf_counter()
 
         while running:
+            frame_start = time.perf_counter()
+
             # Обработка событий
             running = self.handle_events()
 
@@ -226,15 +533,71 @@ class BlackjackGame:
             # Отрисовка
             self.draw()
 
-            # Ограничение FPS
-            self.clock.tick(self.fps)
+            # Диагностика памяти
+            if self.allocation_tracker:
+                self.allocation_tracker.end_frame()
+            if self.memory_watchdog:
+                self.memory_watchdog.tick()
+
+            if self.replayer:
+                frame_time = (time.perf_counter() - frame_start) * 1000
+                self.frame_times.add(frame_time)
+                self.frame_time_digest.add(frame_time)
+            self.frame += 1
+
+            # Ограничение FPS (быстрое воспроизведение и автоигра - без ограничения,
+            # частоту кадров автоигры задает AutoPlayer.play)
+            if not self.fast and not self.autoplay:
+                self.clock.tick(self.fps)
 
         # Выход
+        if self.recorder:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.frames} input frames to {self.recorder.path}")
+        if self.replayer:
+            self.replayer.close()
+            print("\n".join(self.replay_report()))
+        if self.advisor:
+            self.advisor.close()
+        if self.spectator:
+            self.spectator.close()
+        if self.frame_ring:
+            self.frame_ring.close()
+        for diagnostic in (self.allocation_tracker, self.memory_watchdog, self.input_latency):
+            if diagnostic:
+                print("\n".join(diagnostic.report()))
+                diagnostic.stop()
         pygame.quit()
         sys.exit()
 
+    def replay_report(self):
+        """Строки отчета о времени кадров при воспроизведении"""
+        percentiles = self.frame_time_digest.percentiles((50, 95, 99))
+        return [
+            f"Replayed {self.replayer.events_replayed} events over {self.frame} frames",
+            f"Frame time: mean {self.frame_times.mean:.2f} ms, "
+            + ", ".join(f"p{point} {value:.2f} ms" for point, value in percentiles.items())
+            + f", max {self.frame_times.max:.2f} ms",
+        ]
 
-# Точка входа
 
-game = BlackjackGame()
-game.run()
+def main():
+    parser = argparse.ArgumentParser(description="Blackjack")
+    parser.add_argument('--record', metavar='PATH', help="Record the input stream of this session")
+    parser.add_argument('--replay', metavar='PATH', help="Replay a recorded input stream")
+    parser.add_argument('--fast', action='store_true', help="Replay as fast as possible")
+    parser.add_argument('--seed', type=int, default=None, help="Shuffle seed")
+    parser.add_argument('--headless', action='store_true', help="Use the dummy video driver")
+    parser.add_argument('--autoplay', action='store_true', help="Start a game in turbo auto-play mode")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+    game = BlackjackGame(args.record, args.replay, args.fast, args.seed, args.autoplay)
+    game.run()
+
+
+# Точка входа
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from config.config_loader import ConfigLoader
+from simulation.engine import OutcomeDistribution, HeadlessRound, estimate_outcomes, hit_below_17
+from simulation.policy_table import PolicyTable
+
+# Заголовок файла кэша: сигнатура, версия, число пресетов, хэш правил
+MAGIC = b'BJAC'
+VERSION = 1
+HEADER = struct.Struct('<4sHH32s')
+
+# Открытые карты дилера: очки 2..11 (туз = 11)
+UPCARDS = range(2, 12)
+# Итоговые суммы дилера: индексы 0..21 - сумма, BUST_SLOT - перебор
+BUST_SLOT = 22
+TOTAL_SLOTS = 23
+
+# Строки таблицы стратегии: жесткие суммы 4..21, затем мягкие 12..21
+HARD_TOTALS = range(4, 22)
+SOFT_TOTALS = range(12, 22)
+CHART_ROWS = len(HARD_TOTALS) + len(SOFT_TOTALS)
+
+# Запись пресета: имя, колоды, исходы (стратегия "до 17" и по таблице),
+# таблица исходов дилера по открытой карте, таблица стратегии (1 = брать карту)
+RECORD = struct.Struct('<16sI4d4d%dd%ds' % (len(UPCARDS) * TOTAL_SLOTS, CHART_ROWS * len(UPCARDS)))
+
+# Раундов на оценку исходов - погрешность около 0.3%
+ROUNDS = 200000
+
+
+def _default_path(config):
+    """Файл кэша рядом с конфигом"""
+    name = config.get('analytics', 'cache_file', default='analytics.cache')
+    return os.path.join(os.path.dirname(config.config_path), name)
+
+
+def rules_key(config):
+    """
+    Хэш разделов конфига, от которых зависит аналитика
+    Статистика и настройки интерфейса в ключ не входят
+    """
+    rules = {
+        'version': VERSION,
+        'rounds': ROUNDS,
+        'card_values': config.get('card_values'),
+        'dealer_stand_value': config.get('game', 'dealer_stand_value'),
+        'blackjack_payout': config.get('game', 'blackjack_payout'),
+        'decks': {name: preset['decks'] for name, preset in config.get('difficulty').items()},
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).digest()
+
+
+def shoe_counts(config, num_decks):
+    """Число карт каждого достоинства (индекс = очки - 2) в башмаке"""
+    counts = [0] * len(UPCARDS)
+    for value in config.get('card_values').values():
+        if value not in UPCARDS:
+            raise ValueError(f"Unsupported card value for analytics: {value}")
+        counts[value - 2] += 4 * num_decks
+    return counts
+
+
+def dealer_outcomes(counts, upcard, stand_value):
+    """
+    Точные вероятности итоговой суммы дилера при открытой карте upcard
+    counts: состав башмака без открытой карты; дилер берет до stand_value
+    Возвращает список TOTAL_SLOTS вероятностей (последняя - перебор)
+    """
+    add = HeadlessRound._add
+    memo = {}
+
+    def final(counts, total, soft):
+        if total >= stand_value:
+            result = [0.0] * TOTAL_SLOTS
+            result[BUST_SLOT if total > 21 else total] = 1.0
+            return result
+
+        key = (counts, total, soft)
+        if key in memo:
+            return memo[key]
+
+        remaining = sum(counts)
+        result = [0.0] * TOTAL_SLOTS
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            probability = count / remaining
+            new_total, new_soft = add(total, soft, index + 2)
+            rest = counts[:index] + (count - 1,) + counts[index + 1:]
+            for slot, value in enumerate(final(rest, new_total, new_soft)):
+                result[slot] += probability * value
+
+        memo[key] = result
+        return result
+
+    total, soft = add(0, 0, upcard)
+    return final(tuple(counts), total, soft)
+
+
+def strategy_chart(counts, dealer_tables):
+    """
+    Таблица HIT/STAND: для каждой суммы игрока и открытой карты сравниваются
+    EV остановки (по точной таблице дилера) и EV добора
+    Вероятности карт игрока берутся из состава башмака без открытой карты
+    Возвращает bytes: строки CHART_ROWS x столбцы UPCARDS, 1 = брать карту
+    """
+    add = HeadlessRound._add
+    chart = bytearray(CHART_ROWS * len(UPCARDS))
+
+    for column, upcard in enumerate(UPCARDS):
+        dealer = dealer_tables[column]
+        rest = list(counts)
+        if rest[upcard - 2]:
+            rest[upcard - 2] -= 1
+        remaining = sum(rest)
+        draws = [(index + 2, count / remaining) for index, count in enumerate(rest) if count]
+
+        def stand_ev(total):
+            win = dealer[BUST_SLOT] + sum(dealer[:total])
+            lose = sum(dealer[total + 1:BUST_SLOT])
+            return win - lose
+
+        memo = {}
+
+        def best(total, soft):
+            """EV лучшего действия и решение брать ли карту"""
+            if total > 21:
+                return -1.0, False
+            key = (total, soft)
+            if key not in memo:
+                hit = sum(probability * best(*add(total, soft, value))[0] for value, probability in draws)
+                stand = stand_ev(total)
+                memo[key] = (hit, True) if hit > stand else (stand, False)
+            return memo[key]
+
+        rows = [(total, 0) for total in HARD_TOTALS] + [(total, 1) for total in SOFT_TOTALS]
+        for row, (total, soft) in enumerate(rows):
+            chart[row * len(UPCARDS) + column] = 1 if best(total, soft)[1] else 0
+
+    return bytes(chart)
+
+
+def chart_row(total, is_soft):
+    """Номер строки таблицы стратегии для суммы игрока"""
+    if is_soft and total >= SOFT_TOTALS.start:
+        return len(HARD_TOTALS) + total - SOFT_TOTALS.start
+    return max(total, HARD_TOTALS.start) - HARD_TOTALS.start
+
+
+def chart_policy(chart):
+    """Стратегия (сумма, мягкая ли рука, открытая карта) -> брать ли карту по таблице"""
+    columns = len(UPCARDS)
+
+    def policy(total, is_soft, upcard):
+        if total >= 21:
+            return False
+        return chart[chart_row(total, is_soft) * columns + upcard - UPCARDS.start] == 1
+
+    return policy
+
+
+def house_edge(outcomes, blackjack_payout):
+    """Преимущество казино в долях ставки"""
+    return outcomes.lose - outcomes.win - outcomes.blackjack * blackjack_payout
+
+
+def build(config, path):
+    """Считает аналитику для всех пресетов и атомарно записывает файл кэша"""
+    stand_value = config.get('game', 'dealer_stand_value')
+    presets = config.get('difficulty')
+
+    data = bytearray(HEADER.pack(MAGIC, VERSION, len(presets), rules_key(config)))
+    for name, preset in presets.items():
+        decks = preset['decks']
+        counts = shoe_counts(config, decks)
+
+        tables = []
+        for upcard in UPCARDS:
+            rest = list(counts)
+            rest[upcard - 2] -= 1
+            tables.append(dealer_outcomes(rest, upcard, stand_value))
+        chart = strategy_chart(counts, tables)
+
+        outcomes = estimate_outcomes(config, decks, ROUNDS)
+        strategy_outcomes = estimate_outcomes(config, decks, ROUNDS, policy=chart_policy(chart))
+
+        data += RECORD.pack(name.encode('utf-8'), decks, *outcomes, *strategy_outcomes,
+                            *(value for table in tables for value in table), chart)
+
+    # Пишем во временный файл и подменяем - читатели не увидят половину файла;
+    # имя временного файла уникально, если кэш строят несколько процессов сразу
+    directory = os.path.dirname(path) or '.'
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='.analytics', delete=False) as cache_file:
+        cache_file.write(data)
+    os.replace(cache_file.name, path)
+
+
+class AnalyticsCache:
+    """
+    Аналитика правил (исходы и преимущество казино, таблицы дилера, стратегия)
+    Считается один раз и хранится на диске; файл отображается через mmap,
+    при изменении правил в конфиге пересчитывается автоматически
+    """
+
+    def __init__(self, config, path=None):
+        """
+        config: объект ConfigLoader
+        path: путь к файлу кэша (по умолчанию рядом с конфигом)
+        """
+        self.config = config
+        self.path = path if path else _default_path(config)
+        self.blackjack_payout = config.get('game', 'blackjack_payout')
+        self.rebuilt = False
+
+        if not self._open():
+            build(config, self.path)
+            self.rebuilt = True
+            if not self._open():
+                raise ValueError(f"Failed to build analytics cache: {self.path}")
+
+    def _open(self):
+        """Отображает файл и проверяет ключ правил; False - файл нужно пересобрать"""
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            return False
+
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Пустой файл
+            self._file.close()
+            return False
+
+        valid = len(self._mmap) >= HEADER.size
+        if valid:
+            magic, version, count, key = HEADER.unpack_from(self._mmap)
+            valid = (magic == MAGIC and version == VERSION and key == rules_key(self.config)
+                     and len(self._mmap) == HEADER.size + count * RECORD.size)
+        if not valid:
+            self.close()
+            return False
+
+        # Смещения записей по имени пресета
+        self._offsets = {}
+        for number in range(count):
+            offset = HEADER.size + number * RECORD.size
+            name = struct.unpack_from('<16s', self._mmap, offset)[0].rstrip(b'\0').decode('utf-8')
+            self._offsets[name] = offset
+        return True
+
+    def difficulties(self):
+        return list(self._offsets)
+
+    def _unpack(self, difficulty, fields_offset, fmt):
+        return struct.unpack_from(fmt, self._mmap, self._offsets[difficulty] + fields_offset)
+
+    def decks(self, difficulty):
+        return self._unpack(difficulty, 16, '<I')[0]
+
+    def outcomes(self, difficulty):
+        """Исходы раунда при стратегии по умолчанию (брать до 17)"""
+        return OutcomeDistribution(*self._unpack(difficulty, 20, '<4d'))
+
+    def strategy_outcomes(self, difficulty):
+        """Исходы раунда при игре по таблице стратегии"""
+        return OutcomeDistribution(*self._unpack(difficulty, 52, '<4d'))
+
+    def house_edge(self, difficulty, strategy=False):
+        """Преимущество казино (доля ставки) для стратегии по умолчанию или по таблице"""
+        outcomes = self.strategy_outcomes(difficulty) if strategy else self.outcomes(difficulty)
+        return house_edge(outcomes, self.blackjack_payout)
+
+    def dealer_table(self, difficulty, upcard):
+        """Вероятности итога дилера {сумма или 'bust': вероятность} для открытой карты"""
+        offset = 84 + (upcard - UPCARDS.start) * TOTAL_SLOTS * 8
+        table = self._unpack(difficulty, offset, '<%dd' % TOTAL_SLOTS)
+        result = {total: probability for total, probability in enumerate(table[:BUST_SLOT]) if probability}
+        result['bust'] = table[BUST_SLOT]
+        return result
+
+    def chart(self, difficulty):
+        """Таблица стратегии: bytes CHART_ROWS x UPCARDS, 1 = брать карту"""
+        offset = self._offsets[difficulty] + 84 + len(UPCARDS) * TOTAL_SLOTS * 8
+        return self._mmap[offset:offset + CHART_ROWS * len(UPCARDS)]
+
+    def policy(self, difficulty):
+        """Стратегия по таблице для HeadlessRound"""
+        return chart_policy(self.chart(difficulty))
+
+    def close(self):
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Имена стратегий игрока для исследований и автоигры (кроме них - путь к файлу PolicyTable)
+POLICIES = ('hit17', 'chart')
+POLICY_FILES = ('.policy', '.json')
+
+
+def load_policy(config, name, difficulty):
+    """
+    Стратегия по имени: 'hit17', 'chart' (таблица из кэша аналитики, скомпилированная
+    в PolicyTable) или путь к файлу таблицы (.policy - через mmap, .json - исходник)
+    """
+    if name.endswith(POLICY_FILES):
+        return PolicyTable.load(name)
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy: {name}")
+    if name == 'chart':
+        with AnalyticsCache(config) as cache:
+            return PolicyTable.compile(cache.policy(difficulty))
+    return hit_below_17
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-set analytics (cached)")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute even if the cache is valid")
+    args = parser.parse_args()
+
+    config = ConfigLoader()
+    if args.rebuild:
+        build(config, _default_path(config))
+
+    with AnalyticsCache(config) as cache:
+        for difficulty in cache.difficulties():
+            print(f"{difficulty} ({cache.decks(difficulty)} decks): "
+                  f"house edge {cache.house_edge(difficulty) * 100:.2f}% hitting to 17, "
+                  f"{cache.house_edge(difficulty, strategy=True) * 100:.2f}% with chart")
+
+            busts = [cache.dealer_table(difficulty, upcard)['bust'] for upcard in UPCARDS]
+            print("  dealer bust: " + " ".join(f"{'A' if upcard == 11 else upcard}:{bust * 100:.0f}%"
+                                               for upcard, bust in zip(UPCARDS, busts)))
+
+            chart = cache.chart(difficulty)
+            for row, total in enumerate(HARD_TOTALS):
+                if 12 <= total <= 17:
+                    cells = chart[row * len(UPCARDS):(row + 1) * len(UPCARDS)]
+                    print(f"  hard {total}: " + " ".join('H' if cell else 'S' for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
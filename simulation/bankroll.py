@@ -0,0 +1,218 @@
+import argparse
+import random
+
+from config.config_loader import ConfigLoader
+from simulation.engine import ContinuousShoe, FastShoe, HeadlessRound, clamp_bet
+from simulation.streaming import Welford, Drawdown, TDigest
+
+
+class FlatBet:
+    """Постоянная ставка"""
+
+    name = "flat"
+
+    def __init__(self, unit=10):
+        self.unit = unit
+
+    def reset(self):
+        """Сброс состояния перед новой сессией"""
+        pass
+
+    def next_bet(self, balance, shoe):
+        """Желаемая ставка на следующий раунд (до ограничений min/max)"""
+        return self.unit
+
+    def record(self, net):
+        """Учитывает результат раунда"""
+        pass
+
+
+class KellyBet(FlatBet):
+    """
+    Доля Келли от текущего баланса
+    Преимущество оценивается по истинному счету: edge + edge_per_count * TC
+    """
+
+    name = "kelly"
+
+    def __init__(self, fraction=0.5, edge=-0.005, edge_per_count=0.005, variance=1.3):
+        super().__init__(unit=0)
+        self.fraction = fraction
+        self.edge = edge
+        self.edge_per_count = edge_per_count
+        self.variance = variance
+
+    def next_bet(self, balance, shoe):
+        advantage = self.edge + self.edge_per_count * shoe.true_count()
+        if advantage <= 0:
+            return 0  # Минимальная ставка после ограничения
+        return int(balance * self.fraction * advantage / self.variance)
+
+
+class MartingaleBet(FlatBet):
+    """Мартингейл: удвоение после проигрыша, возврат к базе после выигрыша"""
+
+    name = "martingale"
+
+    def __init__(self, unit=10):
+        super().__init__(unit)
+        self.current = unit
+
+    def reset(self):
+        self.current = self.unit
+
+    def next_bet(self, balance, shoe):
+        return self.current
+
+    def record(self, net):
+        if net < 0:
+            self.current *= 2
+        elif net > 0:
+            self.current = self.unit
+
+
+class CountRampBet(FlatBet):
+    """Шкала ставок по истинному счету: {истинный счет: множитель базы}"""
+
+    name = "ramp"
+
+    def __init__(self, unit=10, ramp=None):
+        super().__init__(unit)
+        self.ramp = sorted((ramp if ramp else {1: 1, 2: 2, 3: 4, 4: 8, 5: 12}).items())
+
+    def next_bet(self, balance, shoe):
+        true_count = shoe.true_count()
+        multiplier = 1
+        for threshold, units in self.ramp:
+            if true_count >= threshold:
+                multiplier = units
+        return self.unit * multiplier
+
+
+STRATEGIES = {
+    FlatBet.name: FlatBet,
+    KellyBet.name: KellyBet,
+    MartingaleBet.name: MartingaleBet,
+    CountRampBet.name: CountRampBet,
+}
+
+
+class BankrollReport:
+    """Потоковые агрегаты симуляции: память не зависит от числа раундов"""
+
+    def __init__(self):
+        self.round_net = Welford()  # Чистый результат одного раунда
+        self.final_balance = Welford()
+        self.final_balance_digest = TDigest()
+        self.session_drawdown = Welford()
+        self.max_drawdown = 0
+        self.ruined = 0
+        self.sessions = 0
+        self.rounds = 0
+
+    def ruin_probability(self):
+        """Доля разорившихся сессий"""
+        return self.ruined / self.sessions if self.sessions else 0.0
+
+    def __str__(self):
+        lines = [
+            f"Sessions: {self.sessions}, rounds: {self.rounds}",
+            f"Net per round: {self.round_net.mean:.4f} +/- {self.round_net.stddev():.4f}",
+            f"Final balance: mean {self.final_balance.mean:.2f}, sd {self.final_balance.stddev():.2f}",
+            f"Max drawdown: worst {self.max_drawdown}, mean {self.session_drawdown.mean:.2f}",
+            f"Ruin: {self.ruined} ({self.ruin_probability() * 100:.2f}%)",
+        ]
+        for point, value in self.final_balance_digest.percentiles().items():
+            lines.append(f"  p{point}: {value:.0f}")
+        return "\n".join(lines)
+
+
+class BankrollSimulator:
+    """Прогоняет стратегию ставок через много сессий с потоковыми агрегатами"""
+
+    def __init__(self, config, strategy, difficulty='medium', policy=None, seed=None, continuous=False):
+        """
+        config: объект ConfigLoader
+        strategy: стратегия ставок (FlatBet, KellyBet, ...)
+        difficulty: пресет сложности ('easy', 'medium', 'hard')
+        policy: стратегия игрока для HeadlessRound
+        seed: зерно генератора
+        continuous: машина непрерывного тасования вместо башмака
+        """
+        preset = config.get('difficulty', difficulty, default={})
+        self.strategy = strategy
+        self.starting_balance = preset.get('starting_balance', config.get('game', 'starting_balance'))
+        self.min_bet = config.get('game', 'min_bet')
+        self.max_bet = preset.get('max_bet', config.get('game', 'max_bet'))
+        shoe_class = ContinuousShoe if continuous else FastShoe
+        self.shoe = shoe_class(config, preset.get('decks', 1), random.Random(seed))
+        self.round = HeadlessRound(config, policy)
+
+    def run_session(self, rounds, report):
+        """Одна сессия: до rounds раундов или до разорения"""
+        strategy = self.strategy
+        shoe = self.shoe
+        play = self.round.play
+        settle = self.round.settle
+        round_net = report.round_net
+        min_bet, max_bet = self.min_bet, self.max_bet
+
+        balance = self.starting_balance
+        drawdown = Drawdown(balance)
+        strategy.reset()
+
+        for _ in range(rounds):
+            # Как Player.can_play: без минимальной ставки играть нельзя
+            if balance < min_bet:
+                report.ruined += 1
+                break
+            bet = clamp_bet(strategy.next_bet(balance, shoe), balance, min_bet, max_bet)
+            net = settle(play(shoe), bet)
+            balance += net
+            strategy.record(net)
+            round_net.add(net)
+            drawdown.add(balance)
+            report.rounds += 1
+        else:
+            if balance < min_bet:
+                report.ruined += 1
+
+        report.sessions += 1
+        report.final_balance.add(balance)
+        report.final_balance_digest.add(balance)
+        report.session_drawdown.add(drawdown.max_drawdown)
+        if drawdown.max_drawdown > report.max_drawdown:
+            report.max_drawdown = drawdown.max_drawdown
+
+    def run(self, sessions, rounds_per_session, report=None):
+        """Прогоняет sessions сессий; report можно передать для продолжения"""
+        report = report if report else BankrollReport()
+        for _ in range(sessions):
+            self.run_session(rounds_per_session, report)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bankroll and betting strategy simulator")
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='flat')
+    parser.add_argument('--unit', type=int, default=10)
+    parser.add_argument('--kelly-fraction', type=float, default=0.5)
+    parser.add_argument('--difficulty', default='medium')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--continuous', action='store_true', help="Continuous shuffling machine instead of a shoe")
+    args = parser.parse_args()
+
+    if args.strategy == KellyBet.name:
+        strategy = KellyBet(args.kelly_fraction)
+    else:
+        strategy = STRATEGIES[args.strategy](args.unit)
+
+    simulator = BankrollSimulator(ConfigLoader(), strategy, args.difficulty, seed=args.seed,
+                                  continuous=args.continuous)
+    print(simulator.run(args.sessions, args.rounds))
+
+
+if __name__ == '__main__':
+    main()
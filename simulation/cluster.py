@@ -0,0 +1,346 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+from config.config_loader import ConfigLoader
+from simulation.engine import FastShoe, HeadlessRound, WIN, LOSE, PUSH, BLACKJACK, BUST
+
+OUTCOMES = [WIN, LOSE, PUSH, BLACKJACK, BUST]
+
+# Башмак играется до отрезной карты: остаток в 1/PENETRATION_RESERVE башмака
+PENETRATION_RESERVE = 4
+
+
+def _study_policy(config, study):
+    """Стратегия игрока для исследования"""
+    from simulation.analytics import load_policy
+    return load_policy(config, study['policy'], study['difficulty'])
+
+
+def study_keys(config, policy):
+    """
+    Отпечатки того, что определяет результат исследования, кроме параметров командной строки:
+    (хэш правил конфига, хэш скомпилированной таблицы стратегии) - hex-строки
+    """
+    from simulation.analytics import rules_key
+    from simulation.policy_table import PolicyTable
+    table = policy if hasattr(policy, 'decide') else PolicyTable.compile(policy)
+    digest = hashlib.sha256(repr(table.count_edges).encode('utf-8'))
+    digest.update(table.cells[table.offset:])
+    return rules_key(config).hex(), digest.hexdigest()
+
+
+def play_shoes(config, study, start, end, policy=None):
+    """
+    Играет башмаки с номерами start..end-1
+    Каждый башмак тасуется своим генератором от (seed, номер), поэтому
+    результат отрезка не зависит от того, где и в каком порядке он считался
+    Возвращает {'rounds': ..., исход: количество}
+    """
+    decks = config.get('difficulty', study['difficulty'], 'decks')
+    round_logic = HeadlessRound(config, policy if policy else _study_policy(config, study))
+    play = round_logic.play
+    counts = dict.fromkeys(OUTCOMES, 0)
+    rounds = 0
+
+    for shoe_no in range(start, end):
+        shoe = FastShoe(config, decks, random.Random((study['seed'] << 40) | shoe_no))
+        reserve = len(shoe) // PENETRATION_RESERVE
+        while len(shoe) > reserve:
+            counts[play(shoe)] += 1
+            rounds += 1
+
+    counts['rounds'] = rounds
+    return counts
+
+
+def _send(stream, message):
+    stream.write((json.dumps(message) + '\n').encode('utf-8'))
+    stream.flush()
+
+
+def _receive(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Connection closed")
+    return json.loads(line)
+
+
+class Checkpoint:
+    """
+    Прогресс исследования: итоги и номера завершенных отрезков
+    Сохраняется атомарно после каждого результата
+    """
+
+    def __init__(self, path, study):
+        """
+        path: путь к файлу (None - без сохранения)
+        study: параметры исследования вместе с хэшами правил и стратегии;
+        при продолжении должны совпадать (правка конфига или таблицы - другое исследование)
+        """
+        self.path = path
+        self.study = study
+        self.totals = dict.fromkeys(OUTCOMES + ['rounds'], 0)
+        self.finished = set()
+
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if saved['study'] != study:
+                raise ValueError(f"Checkpoint {path} belongs to a different study: {saved['study']}")
+            self.totals = saved['totals']
+            self.finished = set(saved['finished'])
+
+    def add(self, task_start, counts):
+        """Учитывает результат отрезка; повтор уже учтенного отрезка игнорируется"""
+        if task_start in self.finished:
+            return False
+        for key, value in counts.items():
+            self.totals[key] += value
+        self.finished.add(task_start)
+        self.save()
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory,
+                                         prefix='.checkpoint', delete=False) as file:
+            json.dump({'study': self.study, 'totals': self.totals, 'finished': sorted(self.finished)}, file)
+        os.replace(file.name, self.path)
+
+
+class Coordinator:
+    """
+    Раздает рабочим отрезки башмаков по TCP и сводит результаты
+    Итоги - целые счетчики исходов, поэтому слияние точное и не зависит
+    от порядка; отрезок отключившегося рабочего отдается заново
+    """
+
+    def __init__(self, study, shoes, chunk=1000, checkpoint=None, address=('0.0.0.0', 5555)):
+        """
+        study: {'difficulty', 'policy', 'seed', 'rules', 'policy_table'}
+        (rules и policy_table - хэши из study_keys; рабочие сверяют их со своими)
+        shoes: всего башмаков
+        chunk: башмаков в одном задании
+        checkpoint: путь к файлу прогресса (продолжение после остановки)
+        address: (host, port) для рабочих
+        """
+        self.study = study
+        self.checkpoint = Checkpoint(checkpoint, dict(study, shoes=shoes, chunk=chunk))
+        self.chunk = chunk
+        self.shoes = shoes
+
+        self._lock = threading.Lock()
+        self._finished_event = threading.Event()
+        self._pending = [start for start in range(0, shoes, chunk) if start not in self.checkpoint.finished]
+        self._pending.reverse()
+        self._in_flight = {}  # начало отрезка -> имя рабочего
+        if not self._pending:
+            self._finished_event.set()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._serve_worker(self.rfile, self.wfile)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer(address, Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+
+    def _next_task(self, worker):
+        with self._lock:
+            if self._pending:
+                start = self._pending.pop()
+                self._in_flight[start] = worker
+                return start
+            return None
+
+    def _return_task(self, start):
+        """Отрезок не досчитан - возвращаем в очередь"""
+        with self._lock:
+            if self._in_flight.pop(start, None) is not None and start not in self.checkpoint.finished:
+                self._pending.append(start)
+
+    def _complete(self, start, counts):
+        with self._lock:
+            self._in_flight.pop(start, None)
+            self.checkpoint.add(start, counts)
+            if not self._pending and not self._in_flight:
+                self._finished_event.set()
+
+    def _serve_worker(self, rfile, wfile):
+        """Диалог с одним рабочим: задание -> результат, пока задания есть"""
+        try:
+            worker = _receive(rfile).get('name', '?')
+            while True:
+                start = self._next_task(worker)
+                if start is None:
+                    if self._finished_event.is_set():
+                        _send(wfile, {'type': 'done'})
+                        return
+                    # Все отрезки розданы, но не досчитаны: рабочий подождет возможного возврата
+                    _send(wfile, {'type': 'wait', 'seconds': 1})
+                    _receive(rfile)
+                    continue
+
+                try:
+                    _send(wfile, {'type': 'task', 'study': self.study,
+                                  'start': start, 'end': min(start + self.chunk, self.shoes)})
+                    result = _receive(rfile)
+                except (ConnectionError, OSError, ValueError):
+                    self._return_task(start)
+                    raise
+                if result['type'] == 'refused':
+                    print(f"Worker {worker} refused the study: {result['reason']}")
+                    self._return_task(start)
+                    return
+                self._complete(start, result['counts'])
+        except (ConnectionError, OSError, ValueError):
+            # Рабочий отключился; его отрезок уже возвращен в очередь
+            return
+
+    def progress(self):
+        """(завершено отрезков, всего отрезков)"""
+        total = (self.shoes + self.chunk - 1) // self.chunk
+        return len(self.checkpoint.finished), total
+
+    def run(self, report_every=10.0):
+        """Обслуживает рабочих до завершения всех отрезков; возвращает итоги"""
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            while not self._finished_event.wait(report_every):
+                done, total = self.progress()
+                print(f"{done}/{total} ranges, {self.checkpoint.totals['rounds']:,} rounds")
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+        return self.checkpoint.totals
+
+
+def house_edge(totals, blackjack_payout):
+    """Преимущество казино и его стандартная ошибка (по доле исходов)"""
+    rounds = totals['rounds']
+    lose = totals[LOSE] + totals[BUST]
+    edge = (lose - totals[WIN] - blackjack_payout * totals[BLACKJACK]) / rounds
+    second_moment = (lose + totals[WIN] + blackjack_payout ** 2 * totals[BLACKJACK]) / rounds
+    stderr = ((second_moment - edge ** 2) / rounds) ** 0.5
+    return edge, stderr
+
+
+def run_worker(host, port, name=None, retry=30.0):
+    """
+    Рабочий: берет отрезки у координатора и считает их, пока есть задания
+    Если правила его конфига или таблица стратегии отличаются от исследования,
+    отказывается от задания и завершается - иначе итоги смешали бы разные игры
+    """
+    config = ConfigLoader()
+    name = name if name else f"{socket.gethostname()}:{os.getpid()}"
+    policies = {}
+
+    deadline = time.monotonic() + retry
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    with connection, connection.makefile('rb') as rfile, connection.makefile('wb') as wfile:
+        try:
+            _send(wfile, {'type': 'hello', 'name': name})
+            while True:
+                message = _receive(rfile)
+                if message['type'] == 'done':
+                    return
+                if message['type'] == 'wait':
+                    time.sleep(message['seconds'])
+                    _send(wfile, {'type': 'ready'})
+                    continue
+
+                study = message['study']
+                key = (study['difficulty'], study['policy'])
+                if key not in policies:
+                    policy = _study_policy(config, study)
+                    policies[key] = policy, study_keys(config, policy)
+                policy, (rules, policy_table) = policies[key]
+                if (rules, policy_table) != (study['rules'], study['policy_table']):
+                    reason = "config rules differ" if rules != study['rules'] else "policy table differs"
+                    _send(wfile, {'type': 'refused', 'reason': reason})
+                    print(f"Refusing the study: {reason}")
+                    return
+                counts = play_shoes(config, study, message['start'], message['end'], policy)
+                _send(wfile, {'type': 'result', 'counts': counts})
+        except (ConnectionError, OSError):
+            # Координатор завершился или остановлен; незавершенный отрезок он раздаст заново
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed house edge study over seeded shoe ranges")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinate = commands.add_parser('coordinate', help="Hand out shoe ranges and merge results")
+    coordinate.add_argument('--shoes', type=int, default=100000)
+    coordinate.add_argument('--chunk', type=int, default=1000)
+    coordinate.add_argument('--difficulty', default='medium')
+    coordinate.add_argument('--policy', default='hit17', help="'hit17', 'chart' or a policy table file")
+    coordinate.add_argument('--seed', type=int, default=0)
+    coordinate.add_argument('--checkpoint', default=None, help="Progress file; rerun with it to resume")
+    coordinate.add_argument('--bind', default='0.0.0.0')
+    coordinate.add_argument('--port', type=int, default=5555)
+    coordinate.add_argument('--local-workers', type=int, default=0, help="Start this many workers on localhost")
+
+    worker = commands.add_parser('worker', help="Compute shoe ranges for a coordinator")
+    worker.add_argument('--connect', default='127.0.0.1:5555', help="host:port of the coordinator")
+
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        host, port = args.connect.rsplit(':', 1)
+        run_worker(host, int(port))
+        return
+
+    config = ConfigLoader()
+    rules, policy_table = study_keys(config, _study_policy(config, {'difficulty': args.difficulty,
+                                                                    'policy': args.policy}))
+    study = {'difficulty': args.difficulty, 'policy': args.policy, 'seed': args.seed,
+             'rules': rules, 'policy_table': policy_table}
+    coordinator = Coordinator(study, args.shoes, args.chunk, args.checkpoint, (args.bind, args.port))
+    done, total = coordinator.progress()
+    print(f"Serving on {coordinator.address[0]}:{coordinator.address[1]}, {done}/{total} ranges already done")
+
+    context = multiprocessing.get_context('spawn')
+    local_workers = args.local_workers if done < total else 0
+    workers = [context.Process(target=run_worker, args=('127.0.0.1', coordinator.address[1]))
+               for _ in range(local_workers)]
+    for process in workers:
+        process.start()
+
+    start = time.perf_counter()
+    totals = coordinator.run()
+    for process in workers:
+        process.join()
+
+    edge, stderr = house_edge(totals, config.get('game', 'blackjack_payout'))
+    print(f"{totals['rounds']:,} rounds in {time.perf_counter() - start:.1f}s: "
+          f"house edge {edge * 100:.3f}% +/- {stderr * 100:.3f}%")
+    print("  " + ", ".join(f"{outcome} {totals[outcome]:,}" for outcome in OUTCOMES))
+
+
+if __name__ == '__main__':
+    main()
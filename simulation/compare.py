@@ -0,0 +1,311 @@
+import argparse
+import math
+import random
+import statistics
+import time
+
+from config.config_loader import ConfigLoader
+from simulation.analytics import POLICIES, load_policy
+from simulation.engine import FastShoe, HeadlessRound, WIN, PUSH, BLACKJACK
+from simulation.streaming import Comoments
+
+# Башмак играется до отрезной карты: остаток в 1/PENETRATION_RESERVE башмака (как в cluster)
+PENETRATION_RESERVE = 4
+
+
+class Variant:
+    """Сравниваемый вариант: стратегия игрока и пресет сложности"""
+
+    def __init__(self, config, policy, difficulty):
+        """
+        config: объект ConfigLoader
+        policy: имя стратегии ('hit17', 'chart') или путь к файлу PolicyTable
+        difficulty: пресет сложности (число колод)
+        """
+        self.name = f"{policy}:{difficulty}"
+        self.decks = config.get('difficulty', difficulty, 'decks')
+        self.round = HeadlessRound(config, load_policy(config, policy, difficulty))
+        # Чистый результат раунда в ставках (блекджек - без округления Player.win)
+        self.payouts = {WIN: 1.0, PUSH: 0.0, BLACKJACK: self.round.blackjack_payout}
+
+    @classmethod
+    def parse(cls, config, text):
+        """Вариант из строки 'стратегия:сложность'"""
+        policy, _, difficulty = text.partition(':')
+        return cls(config, policy, difficulty or config.get('game', 'difficulty', default='medium'))
+
+    def net(self, shoe):
+        """Результат одного раунда в ставках"""
+        return self.payouts.get(self.round.play(shoe), -1.0)
+
+    def play_shoe(self, config, seed, mirror=False):
+        """Один башмак с зерном seed: (сумма результатов в ставках, число раундов)"""
+        shoe = FastShoe(config, self.decks, random.Random(seed), mirror)
+        reserve = len(shoe) // PENETRATION_RESERVE
+        net = 0.0
+        rounds = 0
+        while len(shoe) > reserve:
+            net += self.net(shoe)
+            rounds += 1
+        return net, rounds
+
+
+class SharedShoe:
+    """
+    Башмак, который варианты играют синхронно по раундам: каждый раунд
+    все варианты начинают с одной и той же карты, следующий раунд - после
+    самого длинного из них. Начальные руки и карты дилера совпадают, разность
+    возникает только из-за разных решений; пропущенные карты не видны
+    ни одному варианту и на EV не влияют
+    """
+
+    def __init__(self, shoe):
+        """shoe: перетасованный FastShoe (карты выдаются в его порядке)"""
+        self._shoe = shoe
+        self.cards = []
+        self.position = 0
+        self._counts = [0]  # Счет Hi-Lo перед каждой картой (для стратегий со счетом)
+        self._shoe_starts = []  # Позиции, с которых начинается очередной башмак
+        self._hidden = None  # Позиция закрытой карты дилера в текущем раунде
+        self._extend()
+
+    def _extend(self):
+        cards = self._shoe.cards[::-1]
+        self._shoe_starts.append(len(self.cards))
+        self.cards.extend(cards)
+        running = 0
+        for value in cards[:-1]:
+            running += 1 if value <= 6 else -1 if value >= 10 else 0
+            self._counts.append(running)
+        self._counts.append(0)
+
+    def deal(self):
+        if self.position == len(self.cards):
+            # Башмак кончился посреди раунда: продолжение общее для всех вариантов
+            self._shoe.reshuffle()
+            self._extend()
+        value = self.cards[self.position]
+        self.position += 1
+        return value
+
+    def hide(self, value):
+        """Только что сданная карта закрыта (см. FastShoe.hide)"""
+        self._hidden = self.position - 1
+
+    def true_count(self):
+        """Истинный счет Hi-Lo в текущей позиции без закрытой карты (как FastShoe.true_count)"""
+        position = self.position
+        if position == len(self.cards):
+            return 0.0
+        start = 0
+        end = len(self.cards)
+        for shoe_start in self._shoe_starts:
+            if shoe_start > position:
+                end = shoe_start
+                break
+            start = shoe_start
+        running = self._counts[position]
+        unseen = end - position
+        hidden = self._hidden
+        if hidden is not None and hidden >= start:
+            # Закрытая карта из этого же башмака: ее вклад убирается, сама она - среди невидимых
+            value = self.cards[hidden]
+            running -= 1 if value <= 6 else -1 if value >= 10 else 0
+            unseen += 1
+        return running / max(unseen / 52, 0.5)
+
+    def end_round(self):
+        """Карты раунда не возвращаются; закрытая карта открывается"""
+        self._hidden = None
+
+
+class Comparison:
+    """
+    Разница EV двух вариантов по башмакам с уменьшением дисперсии
+    common: общие случайные числа - оба варианта играют одни и те же башмаки
+        (при одинаковом числе колод - синхронно по раундам, см. SharedShoe),
+        поэтому удача раздачи сокращается в разности
+    antithetic: каждый башмак в паре со своим зеркальным (FastShoe mirror),
+        наблюдение - сумма по паре; по замерам почти ничего не добавляет к общим
+        случайным числам (x4.7 против x4.4 на chart vs hit17), поэтому по умолчанию выключено
+    EV варианта - отношение суммы результатов к сумме раундов (а не среднее
+    по башмакам, которое смещено к коротким башмакам); доверительный интервал -
+    по линеаризованной дисперсии оценки-отношения, наблюдения независимы
+    """
+
+    def __init__(self, config, variant_a, variant_b, seed=0, common=True, antithetic=False, confidence=0.95):
+        """
+        config: объект ConfigLoader
+        variant_a, variant_b: сравниваемые варианты (Variant)
+        seed: зерно последовательности башмаков
+        common: общие случайные числа
+        antithetic: антитетические пары башмаков
+        confidence: уровень доверия интервала
+        """
+        self.config = config
+        self.a = variant_a
+        self.b = variant_b
+        self.seed = seed
+        self.common = common
+        self.antithetic = antithetic
+        self.confidence = confidence
+        self.z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+        # Наблюдения: результат и раунды A, результат и раунды B
+        self.observations = Comoments(4)
+        # Отдельные башмаки вариантов (результат, раунды) - для сравнения с независимыми прогонами
+        self.shoes_a = Comoments(2)
+        self.shoes_b = Comoments(2)
+        self.shoes = 0
+
+    def _seed(self, stream, shoe_no):
+        """Зерно башмака: при общих случайных числах поток у вариантов один"""
+        if self.common:
+            stream = 0
+        return ((self.seed * 2 + stream) << 40) | shoe_no
+
+    def _play_shared_shoe(self, seed, mirror):
+        """Оба варианта на одном башмаке, синхронно по раундам: (результат A, результат B, раунды)"""
+        shoe = SharedShoe(FastShoe(self.config, self.a.decks, random.Random(seed), mirror))
+        end = len(shoe.cards) - len(shoe.cards) // PENETRATION_RESERVE
+        net_a = net_b = 0.0
+        rounds = 0
+        start = 0
+        while start < end:
+            net_a += self.a.net(shoe)
+            used = shoe.position
+            shoe.position = start
+            net_b += self.b.net(shoe)
+            start = max(used, shoe.position)
+            shoe.position = start
+            rounds += 1
+        return net_a, net_b, rounds
+
+    @property
+    def count(self):
+        """Число наблюдений"""
+        return self.observations.count
+
+    def step(self):
+        """Одно наблюдение разности (башмак или антитетическая пара)"""
+        shoe_no = self.count
+        mirrors = (False, True) if self.antithetic else (False,)
+        synced = self.common and self.a.decks == self.b.decks
+        total = [0.0, 0, 0.0, 0]
+        for mirror in mirrors:
+            if synced:
+                net_a, net_b, rounds = self._play_shared_shoe(self._seed(0, shoe_no), mirror)
+                rounds_a = rounds_b = rounds
+            else:
+                net_a, rounds_a = self.a.play_shoe(self.config, self._seed(0, shoe_no), mirror)
+                net_b, rounds_b = self.b.play_shoe(self.config, self._seed(1, shoe_no), mirror)
+            self.shoes_a.add((net_a, rounds_a))
+            self.shoes_b.add((net_b, rounds_b))
+            for i, value in enumerate((net_a, rounds_a, net_b, rounds_b)):
+                total[i] += value
+        self.shoes += len(mirrors)
+        self.observations.add(total)
+
+    def ev_a(self):
+        """EV варианта A на раунд"""
+        mean = self.observations.mean
+        return mean[0] / mean[1] if mean[1] else 0.0
+
+    def ev_b(self):
+        """EV варианта B на раунд"""
+        mean = self.observations.mean
+        return mean[2] / mean[3] if mean[3] else 0.0
+
+    def difference(self):
+        """Разность EV на раунд"""
+        return self.ev_a() - self.ev_b()
+
+    def variance(self):
+        """Дисперсия оценки разности (линеаризация отношений) на одно наблюдение"""
+        mean = self.observations.mean
+        if not mean[1] or not mean[3]:
+            return math.inf
+        weights = (1 / mean[1], -self.ev_a() / mean[1], -1 / mean[3], self.ev_b() / mean[3])
+        return self.observations.linear_variance(weights)
+
+    @staticmethod
+    def _shoe_variance(shoes):
+        """Дисперсия отношения по отдельным башмакам варианта на один башмак"""
+        net, rounds = shoes.mean
+        ratio = net / rounds
+        return shoes.linear_variance((1 / rounds, -ratio / rounds))
+
+    def half_width(self):
+        """Полуширина доверительного интервала разности"""
+        if self.count < 2:
+            return math.inf
+        return self.z * math.sqrt(self.variance() / self.count)
+
+    def run(self, target, max_shoes=1000000, min_observations=100, progress=None):
+        """
+        Наблюдения до полуширины интервала target (в ставках на раунд)
+        или до max_shoes башмаков на вариант
+        progress: функция (comparison), вызывается каждые min_observations наблюдений
+        Возвращает True, если точность достигнута
+        """
+        while self.shoes < max_shoes:
+            self.step()
+            count = self.count
+            if count >= min_observations and self.half_width() <= target:
+                return True
+            if progress and count % min_observations == 0:
+                progress(self)
+        return False
+
+    def variance_reduction(self):
+        """
+        Во сколько раз меньше башмаков нужно, чем независимым прогонам
+        (дисперсия разности независимых прогонов на тот же расход башмаков)
+        """
+        shoes_per_observation = 2 if self.antithetic else 1
+        naive = (self._shoe_variance(self.shoes_a) + self._shoe_variance(self.shoes_b)) / shoes_per_observation
+        observed = self.variance()
+        return naive / observed if observed > 0 else float('inf')
+
+    def report(self):
+        """Строки отчета"""
+        difference = self.difference()
+        half = self.half_width()
+        methods = [name for name, enabled in (("common random numbers", self.common),
+                                              ("antithetic shoes", self.antithetic)) if enabled]
+        return [
+            f"{self.a.name}: EV {self.ev_a() * 100:+.3f}%, {self.b.name}: EV {self.ev_b() * 100:+.3f}%",
+            f"Difference: {difference * 100:+.3f}% +/- {half * 100:.3f}% "
+            f"({self.confidence * 100:.0f}% CI, {self.shoes:,} shoes per variant)",
+            f"Variance reduction: x{self.variance_reduction():.1f} vs independent runs "
+            f"({', '.join(methods) if methods else 'none'})",
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two strategy/preset variants with variance reduction")
+    parser.add_argument('--a', default='chart:medium', help="Variant A as policy:difficulty "
+                                                           f"(policies: {', '.join(POLICIES)} or a policy table file)")
+    parser.add_argument('--b', default='hit17:medium', help="Variant B as policy:difficulty")
+    parser.add_argument('--target', type=float, default=0.002, help="CI half-width on the EV difference, per round")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--max-shoes', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--independent', action='store_true', help="Disable common random numbers")
+    parser.add_argument('--antithetic', action='store_true',
+                        help="Pair each shoe with its mirrored shoe (measured gain over common random numbers is small)")
+    args = parser.parse_args()
+
+    config = ConfigLoader()
+    comparison = Comparison(config, Variant.parse(config, args.a), Variant.parse(config, args.b), args.seed,
+                            not args.independent, args.antithetic, args.confidence)
+
+    start = time.perf_counter()
+    reached = comparison.run(args.target, args.max_shoes)
+    print("\n".join(comparison.report()))
+    status = "target reached" if reached else "shoe limit reached"
+    print(f"{status} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+import random
+from collections import namedtuple
+
+from game.deck import SUITS, RANKS
+
+# Исходы раунда (как в GameManager.end_round)
+WIN = "win"
+LOSE = "lose"
+PUSH = "push"
+BLACKJACK = "blackjack"
+BUST = "bust"
+
+# Вероятности исходов одного раунда (перебор входит в проигрыш)
+OutcomeDistribution = namedtuple('OutcomeDistribution', ['win', 'lose', 'push', 'blackjack'])
+
+
+def hit_below_17(player_total, is_soft, dealer_upcard):
+    """Стратегия по умолчанию: игрок берет карту до 17, как дилер"""
+    return player_total < 17
+
+
+def clamp_bet(amount, balance, min_bet, max_bet):
+    """Ограничивает ставку так же, как Player.place_bet"""
+    if amount < min_bet:
+        amount = min_bet
+    if amount > max_bet:
+        amount = max_bet
+    if amount > balance:
+        amount = balance
+    return amount
+
+
+class FastShoe:
+    """
+    Облегченный башмак для симуляций: карты хранятся как очки (int),
+    без объектов Card. Пересоздается и тасуется, когда карты кончились,
+    как Deck.deal_card. Ведет счет Hi-Lo для стратегий со счетом карт:
+    закрытая карта дилера (hide) в счет не входит до конца раунда.
+    """
+
+    def __init__(self, config, num_decks=1, rng=None, mirror=False):
+        """
+        config: объект ConfigLoader
+        num_decks: количество колод
+        rng: генератор random.Random или движок тасования game.shuffler (нужен метод shuffle)
+        mirror: антитетический башмак - при том же генераторе на месте каждого
+            ранга лежит зеркальный (A <-> K, 2 <-> Q, ..., 7 <-> 7); состав не меняется,
+            но богатые старшими картами участки становятся бедными
+        """
+        card_values = config.get('card_values')
+        self.num_decks = num_decks
+        self.rng = rng if rng else random.Random()
+        ranks = RANKS[::-1] if mirror else RANKS
+        self._template = [card_values[rank] for rank in ranks] * len(SUITS) * num_decks
+        self.cards = []
+        self.running_count = 0
+        self._hidden = 0  # Закрытых карт раунда
+        self._hidden_count = 0  # Их вклад в счет (вернется в конце раунда)
+        self.reshuffle()
+
+    def reshuffle(self):
+        """Пересоздает и тасует башмак"""
+        self.cards = self._template[:]
+        self.rng.shuffle(self.cards)
+        self.running_count = 0
+        # Закрытая карта из прежнего башмака в новый счет не попадает
+        self._hidden = 0
+        self._hidden_count = 0
+
+    def deal(self):
+        """Выдает очки одной карты"""
+        if not self.cards:
+            self.reshuffle()
+        value = self.cards.pop()
+
+        # Hi-Lo: 2-6 = +1, 10/туз = -1
+        if value <= 6:
+            self.running_count += 1
+        elif value >= 10:
+            self.running_count -= 1
+        return value
+
+    def hide(self, value):
+        """Только что сданная карта закрыта: игрок не видит ее до конца раунда"""
+        tag = 1 if value <= 6 else -1 if value >= 10 else 0
+        self.running_count -= tag
+        self._hidden_count += tag
+        self._hidden += 1
+
+    def true_count(self):
+        """Истинный счет: счет видимых карт на невидимую часть колоды (остаток и закрытые карты)"""
+        decks_left = max((len(self.cards) + self._hidden) / 52, 0.5)
+        return self.running_count / decks_left
+
+    def end_round(self):
+        """Конец раунда: закрытые карты открываются, сброс остается вне башмака до пересоздания"""
+        if self._hidden:
+            self.running_count += self._hidden_count
+            self._hidden = 0
+            self._hidden_count = 0
+
+    def __len__(self):
+        return len(self.cards)
+
+
+class ContinuousShoe:
+    """
+    Машина непрерывного тасования для симуляций: карты раунда возвращаются
+    в машину в конце раунда. Машина хранит не карты, а число карт каждого
+    достоинства (10 счетчиков), поэтому память постоянна при любом числе колод;
+    раздача - случайный номер среди оставшихся карт и проход по счетчикам
+    (самые частые - десятки - проверяются первыми)
+    """
+
+    def __init__(self, config, num_decks=1, rng=None):
+        """
+        config: объект ConfigLoader
+        num_decks: количество колод в машине
+        rng: генератор random.Random или движок тасования game.shuffler (нужен randrange или randbelow)
+        """
+        card_values = config.get('card_values')
+        self.num_decks = num_decks
+        self.rng = rng if rng else random.Random()
+        self._randbelow = getattr(self.rng, 'randbelow', None) or self.rng.randrange
+
+        full = {}
+        for rank in RANKS:
+            value = card_values[rank]
+            full[value] = full.get(value, 0) + len(SUITS) * num_decks
+        ordered = sorted(full.items(), key=lambda item: -item[1])
+        self._values = [value for value, _ in ordered]
+        self._full = [count for _, count in ordered]
+        self._counts = self._full[:]
+        self._size = sum(self._full)
+        self._remaining = self._size
+        # Счет не накапливается: сброс сразу возвращается в машину
+        self.running_count = 0
+
+    def deal(self):
+        """Выдает очки случайной карты из машины"""
+        counts = self._counts
+        position = self._randbelow(self._remaining)
+        index = 0
+        while position >= counts[index]:
+            position -= counts[index]
+            index += 1
+        counts[index] -= 1
+        self._remaining -= 1
+        return self._values[index]
+
+    def end_round(self):
+        """Возвращает карты раунда в машину"""
+        self._counts[:] = self._full
+        self._remaining = self._size
+
+    def hide(self, value):
+        """Закрытая карта: счет в машине не ведется"""
+
+    def true_count(self):
+        return 0.0
+
+    def __len__(self):
+        return self._remaining
+
+
+class HeadlessRound:
+    """
+    Правила раунда GameManager без pygame, рендера и записи статистики:
+    раздача по 2 карты, блекджек игрока, ход игрока по стратегии,
+    дилер берет до dealer_stand_value
+    """
+
+    def __init__(self, config, policy=None):
+        """
+        config: объект ConfigLoader
+        policy: функция (сумма игрока, мягкая ли рука, открытая карта дилера) -> брать ли карту
+            или PolicyTable (решение берется напрямую, таблице со счетом передается истинный счет
+            без закрытой карты дилера)
+        """
+        self.stand_value = config.get('game', 'dealer_stand_value')
+        self.blackjack_payout = config.get('game', 'blackjack_payout')
+        policy = policy if policy else hit_below_17
+        self.policy = getattr(policy, 'decide', policy)
+        self.counted = getattr(policy, 'counted', False)
+
+    @staticmethod
+    def _add(total, soft_aces, value):
+        """Добавляет карту к сумме, пересчитывая тузы 11 -> 1 при переборе"""
+        total += value
+        if value == 11:
+            soft_aces += 1
+        while total > 21 and soft_aces > 0:
+            total -= 10
+            soft_aces -= 1
+        return total, soft_aces
+
+    def play(self, shoe):
+        """
+        Играет один раунд
+        Возвращает исход: 'win', 'lose', 'push', 'blackjack', 'bust'
+        """
+        outcome = self._play(shoe)
+        shoe.end_round()
+        return outcome
+
+    def _play(self, shoe):
+        add = self._add
+
+        # Порядок раздачи как в GameManager.place_bet: игрок, дилер, игрок, дилер
+        player, player_soft = add(0, 0, shoe.deal())
+        hole = shoe.deal()
+        if self.counted:
+            shoe.hide(hole)
+        dealer, dealer_soft = add(0, 0, hole)
+        player, player_soft = add(player, player_soft, shoe.deal())
+        upcard = shoe.deal()
+        dealer, dealer_soft = add(dealer, dealer_soft, upcard)
+
+        if player == 21:
+            return PUSH if dealer == 21 else BLACKJACK
+
+        # Ход игрока
+        policy = self.policy
+        if self.counted:
+            while policy(player, player_soft > 0, upcard, shoe.true_count()):
+                player, player_soft = add(player, player_soft, shoe.deal())
+                if player > 21:
+                    return BUST
+        else:
+            while policy(player, player_soft > 0, upcard):
+                player, player_soft = add(player, player_soft, shoe.deal())
+                if player > 21:
+                    return BUST
+
+        # Ход дилера
+        while dealer < self.stand_value:
+            dealer, dealer_soft = add(dealer, dealer_soft, shoe.deal())
+
+        if dealer > 21 or dealer < player:
+            return WIN
+        if dealer > player:
+            return LOSE
+        return PUSH
+
+    def settle(self, outcome, bet):
+        """Чистый выигрыш по исходу, с округлением как в Player.win"""
+        if outcome == BLACKJACK:
+            return int(bet * self.blackjack_payout)
+        if outcome == WIN:
+            return bet
+        if outcome == PUSH:
+            return 0
+        return -bet
+
+
+def estimate_outcomes(config, num_decks=1, rounds=100000, policy=None, seed=0, continuous=False):
+    """
+    Оценивает распределение исходов раунда прогоном HeadlessRound
+    continuous: машина непрерывного тасования вместо башмака
+    """
+    shoe_class = ContinuousShoe if continuous else FastShoe
+    shoe = shoe_class(config, num_decks, random.Random(seed))
+    round_logic = HeadlessRound(config, policy)
+    counts = {WIN: 0, LOSE: 0, PUSH: 0, BLACKJACK: 0, BUST: 0}
+
+    for _ in range(rounds):
+        counts[round_logic.play(shoe)] += 1
+
+    return OutcomeDistribution(
+        counts[WIN] / rounds,
+        (counts[LOSE] + counts[BUST]) / rounds,
+        counts[PUSH] / rounds,
+        counts[BLACKJACK] / rounds,
+    )
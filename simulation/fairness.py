@@ -0,0 +1,158 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from game.deck import SUITS, RANKS
+from game.shuffler import SHUFFLERS, create_shuffler
+
+
+def _chi_square_p_value(statistic, degrees):
+    """Правый хвост хи-квадрат (аппроксимация Уилсона-Хилферти)"""
+    if degrees <= 0:
+        return 1.0
+    z = ((statistic / degrees) ** (1 / 3) - (1 - 2 / (9 * degrees))) / math.sqrt(2 / (9 * degrees))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _normal_p_value(z):
+    """Двусторонний p-value нормального распределения"""
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+class FairnessTest:
+    """
+    Потоковая проверка равномерности тасования
+    Хранит только таблицу позиция x ранг и суммы для автокорреляции,
+    поэтому память постоянна при любом числе сданных карт
+    """
+
+    def __init__(self, num_decks=1):
+        """num_decks: размер башмака в колодах"""
+        self.size = 52 * num_decks
+        # Ранг карты в исходном (неперетасованном) порядке башмака
+        self.ranks = np.tile(np.arange(len(RANKS)), len(SUITS) * num_decks)
+        self.rank_share = np.bincount(self.ranks, minlength=len(RANKS)) / self.size
+
+        self.table = np.zeros((self.size, len(RANKS)), dtype=np.int64)
+        self.shuffles = 0
+
+        # Автокорреляция соседних карт внутри башмака (лаг 1)
+        self.pairs = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_yy = 0.0
+        self.sum_xy = 0.0
+
+    def add(self, permutations):
+        """
+        Учитывает пакет перестановок
+        permutations: массив (count, size): индексы карт в порядке сдачи
+        """
+        dealt = self.ranks[permutations]
+        cells = np.arange(self.size) * len(RANKS) + dealt
+        self.table += np.bincount(cells.ravel(), minlength=self.table.size).reshape(self.table.shape)
+        self.shuffles += len(dealt)
+
+        x = dealt[:, :-1].astype(np.float64)
+        y = dealt[:, 1:].astype(np.float64)
+        self.pairs += x.size
+        self.sum_x += x.sum()
+        self.sum_y += y.sum()
+        self.sum_xx += (x * x).sum()
+        self.sum_yy += (y * y).sum()
+        self.sum_xy += (x * y).sum()
+
+    @property
+    def cards(self):
+        return self.shuffles * self.size
+
+    def chi_square(self):
+        """Статистика хи-квадрат позиция x ранг, степени свободы и p-value"""
+        expected = self.shuffles * self.rank_share
+        statistic = float((((self.table - expected) ** 2) / expected).sum())
+        degrees = (self.size - 1) * (len(RANKS) - 1)
+        return statistic, degrees, _chi_square_p_value(statistic, degrees)
+
+    def serial_correlation(self):
+        """
+        Корреляция рангов соседних карт, ожидаемое значение и p-value
+        Без возвращения ожидаемая корреляция равна -1/(size - 1), а не нулю
+        """
+        n = self.pairs
+        covariance = self.sum_xy / n - (self.sum_x / n) * (self.sum_y / n)
+        variance_x = self.sum_xx / n - (self.sum_x / n) ** 2
+        variance_y = self.sum_yy / n - (self.sum_y / n) ** 2
+        correlation = covariance / math.sqrt(variance_x * variance_y)
+
+        expected = -1 / (self.size - 1)
+        # Пары внутри одного башмака зависимы; независимы только башмаки
+        z = (correlation - expected) * math.sqrt(self.shuffles * (self.size - 1))
+        return correlation, expected, _normal_p_value(z)
+
+    def report(self):
+        """Строки отчета"""
+        statistic, degrees, chi_p = self.chi_square()
+        correlation, expected, serial_p = self.serial_correlation()
+        return [
+            f"Cards dealt: {self.cards:,} ({self.shuffles:,} shoes of {self.size})",
+            f"Position x rank chi-square: {statistic:.1f} on {degrees} df, p = {chi_p:.4f}",
+            f"Serial correlation: {correlation:+.6f} (expected {expected:+.6f}), p = {serial_p:.4f}",
+        ]
+
+
+def run_fairness(shuffler, num_decks=1, cards=10 ** 7, batch=4096, progress=None):
+    """
+    Прогоняет тест на cards сданных карт пакетами по batch башмаков
+    progress: функция (test), вызывается после каждого пакета
+    """
+    test = FairnessTest(num_decks)
+    shoes = max(cards // test.size, 1)
+    while test.shuffles < shoes:
+        count = min(batch, shoes - test.shuffles)
+        test.add(np.asarray(shuffler.permutations(test.size, count)))
+        if progress:
+            progress(test)
+    return test
+
+
+def benchmark(name, num_decks=1, seconds=1.0, seed=0):
+    """Тасований башмака в секунду для движка name (список Card-подобных объектов)"""
+    shuffler = create_shuffler(name, seed)
+    items = list(range(52 * num_decks))
+    shuffles = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        for _ in range(100):
+            shuffler.shuffle(items)
+        shuffles += 100
+        elapsed = time.perf_counter() - start
+    return shuffles / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shuffle engine benchmark and fairness suite")
+    parser.add_argument('--backend', choices=sorted(SHUFFLERS), action='append',
+                        help="Backends to test (default: all)")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--benchmark', action='store_true', help="Only measure shuffles per second")
+    parser.add_argument('--cards', type=float, default=1e7, help="Cards to deal for the fairness suite")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    for name in args.backend or sorted(SHUFFLERS):
+        rate = benchmark(name, args.decks, seed=args.seed)
+        print(f"{name}: {rate:,.0f} shuffles/s ({rate * 52 * args.decks:,.0f} cards/s), {args.decks} decks")
+        if args.benchmark:
+            continue
+
+        test = run_fairness(create_shuffler(name, args.seed), args.decks, int(args.cards))
+        for line in test.report():
+            print("  " + line)
+
+
+if __name__ == '__main__':
+    main()
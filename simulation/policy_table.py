@@ -0,0 +1,262 @@
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from config.config_loader import ConfigLoader
+from simulation.engine import hit_below_17
+
+# Файл таблицы: сигнатура, версия, число корзин счета; затем границы корзин (double)
+# и сами решения - по байту на клетку (1 = брать карту)
+MAGIC = b'BJPT'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+# Клетки: корзина счета x мягкая/жесткая x сумма 0..31 x открытая карта 0..11
+# (индексы открытой карты 0 и 1 не используются - так индекс считается без вычитаний)
+TOTALS = 32
+UPCARDS = 12
+CELLS = 2 * TOTALS * UPCARDS
+
+# Суммы, которые задаются в исходнике таблицы
+HARD_TOTALS = range(4, 21)
+SOFT_TOTALS = range(12, 21)
+UPCARD_VALUES = range(2, 12)
+
+_ACTIONS = {'H': 1, 'S': 0}
+
+
+def _cell(bucket, is_soft, total, upcard):
+    return ((bucket * 2 + is_soft) * TOTALS + total) * UPCARDS + upcard
+
+
+class PolicyTable:
+    """
+    Скомпилированная стратегия игрока: плоский массив решений по
+    (корзина истинного счета, мягкая ли рука, сумма, открытая карта)
+    Решение - одно обращение по индексу, без цепочек if/else. Файл
+    таблицы открывается через mmap, поэтому процессы симуляции делят
+    одни и те же страницы памяти
+    """
+
+    def __init__(self, cells, count_edges=(), offset=0):
+        """
+        cells: решения (bytes, bytearray или mmap) длиной CELLS на корзину
+        count_edges: границы корзин истинного счета по возрастанию (пусто - без счета)
+        offset: начало решений в cells (для mmap файла - размер заголовка)
+        """
+        self.count_edges = tuple(count_edges)
+        self.buckets = len(self.count_edges) + 1
+        if len(cells) - offset != self.buckets * CELLS:
+            raise ValueError(f"Policy table must have {self.buckets * CELLS} cells, got {len(cells) - offset}")
+        self.cells = cells
+        self.offset = offset
+        self.counted = self.buckets > 1
+        self._mmap = None
+        self._file = None
+        self.decide = self._compile()
+
+    def _compile(self):
+        """
+        Функция решения для HeadlessRound и ботов (локальные ссылки вместо атрибутов)
+        mmap индексируется напрямую, без memoryview - иначе файл нельзя закрыть,
+        пока жива хоть одна функция решения
+        """
+        cells = self.cells
+        offset = self.offset
+        if not self.counted:
+            def decide(total, is_soft, upcard, true_count=0.0):
+                return cells[offset + ((TOTALS if is_soft else 0) + total) * UPCARDS + upcard] == 1
+            return decide
+
+        edges = self.count_edges
+        bucket_of = bisect.bisect_right
+
+        def decide(total, is_soft, upcard, true_count=0.0):
+            base = bucket_of(edges, true_count) * 2 * TOTALS
+            return cells[offset + (base + (TOTALS if is_soft else 0) + total) * UPCARDS + upcard] == 1
+        return decide
+
+    def __call__(self, total, is_soft, upcard, true_count=0.0):
+        """Брать ли карту"""
+        if total > 21:
+            return False
+        return self.decide(total, is_soft, upcard, true_count)
+
+    @classmethod
+    def compile(cls, policy, count_edges=()):
+        """
+        Таблица из любой стратегии (сумма, мягкая ли рука, открытая карта) -> брать ли карту
+        policy: функция или список функций по корзинам счета
+        """
+        policies = policy if isinstance(policy, (list, tuple)) else [policy] * (len(count_edges) + 1)
+        cells = bytearray(len(policies) * CELLS)
+        for bucket, bucket_policy in enumerate(policies):
+            for is_soft, totals in ((0, HARD_TOTALS), (1, SOFT_TOTALS)):
+                for total in range(TOTALS):
+                    for upcard in UPCARD_VALUES:
+                        if total < totals.start:
+                            # Сумма невозможна (мягкая меньше 12) или слишком мала, чтобы остановиться
+                            hit = total < 12
+                        elif total > totals[-1]:
+                            hit = False
+                        else:
+                            hit = bucket_policy(total, bool(is_soft), upcard)
+                        cells[_cell(bucket, is_soft, total, upcard)] = 1 if hit else 0
+        return cls(bytes(cells), count_edges)
+
+    @classmethod
+    def from_source(cls, source):
+        """
+        Таблица из описания (словарь JSON):
+        {"hard": {"12": "HHSSSHHHHH", ...}, "soft": {"17": "...", ...}}
+        - строки по открытой карте 2..10, A; неуказанные суммы - брать до 17;
+        со счетом: {"count_edges": [-1, 1], "buckets": [{"hard": ..., "soft": ...}, ...]}
+        """
+        count_edges = source.get('count_edges', [])
+        buckets = source.get('buckets', [source])
+        if len(buckets) != len(count_edges) + 1:
+            raise ValueError(f"{len(count_edges)} count edges need {len(count_edges) + 1} buckets")
+
+        policies = []
+        for bucket in buckets:
+            rows = {}
+            for is_soft, key in ((False, 'hard'), (True, 'soft')):
+                for total, actions in bucket.get(key, {}).items():
+                    if len(actions) != len(UPCARD_VALUES) or set(actions) - set(_ACTIONS):
+                        raise ValueError(f"Row {key} {total} must be {len(UPCARD_VALUES)} of H/S: {actions}")
+                    rows[(int(total), is_soft)] = [_ACTIONS[action] for action in actions]
+
+            def policy(total, is_soft, upcard, rows=rows):
+                row = rows.get((total, is_soft))
+                if row is None:
+                    return hit_below_17(total, is_soft, upcard)
+                return row[upcard - UPCARD_VALUES.start] == 1
+            policies.append(policy)
+        return cls.compile(policies, count_edges)
+
+    @classmethod
+    def load(cls, path):
+        """Скомпилированная таблица (.policy) через mmap или исходник (.json)"""
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as file:
+                return cls.from_source(json.load(file))
+
+        file = open(path, 'rb')
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            file.close()
+            raise ValueError(f"Empty policy table: {path}")
+        magic, version, buckets = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            data.close()
+            file.close()
+            raise ValueError(f"{path} is not a policy table (version {VERSION})")
+        count_edges = struct.unpack_from('<%dd' % (buckets - 1), data, HEADER.size)
+        table = cls(data, count_edges, HEADER.size + 8 * len(count_edges))
+        table._mmap = data
+        table._file = file
+        return table
+
+    def save(self, path):
+        """Атомарно записывает скомпилированную таблицу"""
+        directory = os.path.dirname(path) or '.'
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.policy', delete=False) as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.buckets))
+            file.write(struct.pack('<%dd' % len(self.count_edges), *self.count_edges))
+            file.write(self.cells[self.offset:])
+        os.replace(file.name, path)
+
+    def rows(self, bucket=0):
+        """Строки для просмотра: (подпись, 'HHSS...') по жестким и мягким суммам"""
+        for is_soft, totals in ((0, HARD_TOTALS), (1, SOFT_TOTALS)):
+            for total in totals:
+                actions = ''.join('H' if self.cells[self.offset + _cell(bucket, is_soft, total, upcard)] else 'S'
+                                  for upcard in UPCARD_VALUES)
+                yield f"{'soft' if is_soft else 'hard'} {total}", actions
+
+    def close(self):
+        if self._mmap is not None:
+            self.decide = None
+            self.cells = None
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and inspect strategy policy tables")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_command = commands.add_parser('compile', help="Compile a policy into a .policy table")
+    compile_command.add_argument('source', help="'hit17', 'chart' or a JSON source file")
+    compile_command.add_argument('output')
+    compile_command.add_argument('--difficulty', default='medium', help="Preset for the 'chart' policy")
+
+    show = commands.add_parser('show', help="Print a policy table")
+    show.add_argument('path')
+
+    bench = commands.add_parser('bench', help="Decisions per second: compiled table vs the source policy")
+    bench.add_argument('source', help="'hit17', 'chart' or a policy file")
+    bench.add_argument('--difficulty', default='medium')
+    bench.add_argument('--decisions', type=int, default=1000000)
+    args = parser.parse_args()
+
+    config = ConfigLoader()
+    if args.command == 'show':
+        table = PolicyTable.load(args.path)
+        for bucket in range(table.buckets):
+            if table.counted:
+                low = table.count_edges[bucket - 1] if bucket else '-inf'
+                high = table.count_edges[bucket] if bucket < len(table.count_edges) else 'inf'
+                print(f"true count [{low}, {high}):")
+            for label, actions in table.rows(bucket):
+                print(f"  {label:>7}: {' '.join(actions)}")
+        return
+
+    from simulation.analytics import load_policy
+    source = load_policy(config, args.source, args.difficulty)
+    # Загруженная таблица (.policy, .json, 'chart') берется как есть, со всеми корзинами счета;
+    # проверка по атрибуту, а не isinstance: при запуске через -m этот класс - __main__.PolicyTable
+    table = source if hasattr(source, 'decide') else PolicyTable.compile(source)
+    if args.command == 'compile':
+        table.save(args.output)
+        print(f"Wrote {args.output} ({table.buckets} count buckets, {table.buckets * CELLS} cells)")
+        return
+
+    # Смесь позиций, как в раунде: суммы 12..20, обе руки, все открытые карты,
+    # истинный счет от -3 до 3 (таблица со счетом выбирает корзину на каждом решении)
+    positions = [(total, is_soft, upcard, true_count) for true_count in (-3.0, -1.0, 0.0, 1.0, 3.0)
+                 for total in range(12, 21) for is_soft in (False, True)
+                 for upcard in UPCARD_VALUES] * (args.decisions // 900 + 1)
+    positions = positions[:args.decisions]
+    from simulation.analytics import AnalyticsCache
+    with AnalyticsCache(config) as cache:
+        decide = table.decide
+        chart = cache.policy(args.difficulty)
+        candidates = [
+            (f"compiled table ({table.buckets} count buckets)", lambda t, s, u, c: decide(t, s, u, c)),
+            ("chart closure", lambda t, s, u, c: chart(t, s, u)),
+            ("hit17 function", lambda t, s, u, c: hit_below_17(t, s, u)),
+        ]
+        for name, call in candidates:
+            start = time.perf_counter()
+            for total, is_soft, upcard, true_count in positions:
+                call(total, is_soft, upcard, true_count)
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {len(positions) / elapsed:,.0f} decisions/s")
+
+
+if __name__ == '__main__':
+    main()
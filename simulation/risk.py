@@ -0,0 +1,128 @@
+import argparse
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from config.config_loader import ConfigLoader
+from simulation.engine import estimate_outcomes
+
+# Результат расчета: вероятность разорения, накопленная по раундам вероятность разорения,
+# значения баланса и их вероятности после последнего раунда (без разорившихся)
+RuinResult = namedtuple('RuinResult', ['ruin_probability', 'ruin_by_round', 'balances', 'probabilities'])
+
+
+def ruin_distribution(outcomes, starting_balance, bet, rounds, blackjack_payout=1.5, min_bet=None):
+    """
+    Точное распределение баланса после rounds раундов с постоянной ставкой
+    Динамика по состояниям баланса: каждый раунд - свертка с ядром исходов.
+    Как в игре (Player.place_bet, Player.can_play): при балансе меньше ставки
+    ставится весь баланс, а разорение (поглощение) - баланс меньше min_bet
+    min_bet: минимальная ставка (None - равна bet)
+    """
+    min_bet = min_bet if min_bet else bet
+    blackjack_win = int(bet * blackjack_payout)
+
+    # Все достижимые балансы кратны общему делителю шагов - считаем в этих единицах;
+    # выигрыши блекджека урезанных ставок могут уменьшить делитель
+    unit = math.gcd(bet, blackjack_win, starting_balance, min_bet)
+    while True:
+        refined = unit
+        for balance in range(min_bet, bet, unit):
+            refined = math.gcd(refined, int(balance * blackjack_payout))
+        if refined == unit:
+            break
+        unit = refined
+
+    start = starting_balance // unit
+    down = bet // unit
+    floor = min_bet // unit
+    win_up = bet // unit
+    blackjack_up = blackjack_win // unit
+    max_up = max(win_up, blackjack_up)
+    size = start + rounds * max_up + 1
+    # Выигрыш блекджека при ставке всем балансом i < down
+    clamped_blackjack = [int(i * unit * blackjack_payout) // unit for i in range(down)]
+
+    # Ядро свертки: индекс k соответствует изменению баланса на (k - down) единиц
+    kernel = np.zeros(down + max_up + 1)
+    kernel[0] += outcomes.lose
+    kernel[down] += outcomes.push
+    kernel[down + win_up] += outcomes.win
+    kernel[down + blackjack_up] += outcomes.blackjack
+
+    dist = np.zeros(size)
+    dist[start] = 1.0
+    ruin_by_round = np.zeros(rounds + 1)
+
+    if start < floor:
+        ruin_by_round[:] = 1.0
+        dist[start] = 0.0
+        return RuinResult(1.0, ruin_by_round, np.arange(size) * unit, dist)
+
+    ruined = 0.0
+    low, high = start, start + 1  # Диапазон ненулевых состояний
+    for step in range(1, rounds + 1):
+        new = np.zeros(size)
+        new_low, new_high = size, 0
+
+        # Полная ставка: свертка только по активному диапазону
+        full_low = max(low, down)
+        if full_low < high:
+            active = np.convolve(dist[full_low:high], kernel)
+            new[full_low - down:full_low - down + len(active)] = active
+            new_low, new_high = full_low - down, high + max_up
+
+        # Баланс меньше ставки: ставится весь, проигрыш - разорение
+        for i in range(low, min(high, down)):
+            probability = dist[i]
+            if not probability:
+                continue
+            ruined += probability * outcomes.lose
+            new[i] += probability * outcomes.push
+            new[2 * i] += probability * outcomes.win
+            new[i + clamped_blackjack[i]] += probability * outcomes.blackjack
+            new_low = min(new_low, i)
+            new_high = max(new_high, 2 * i + 1, i + clamped_blackjack[i] + 1)
+
+        dist = new
+        low, high = new_low, new_high
+
+        # Поглощение: баланс меньше минимальной ставки
+        if low < floor:
+            ruined += dist[low:floor].sum()
+            dist[low:floor] = 0.0
+            low = floor
+        ruin_by_round[step] = ruined
+
+    return RuinResult(float(ruined), ruin_by_round, np.arange(size) * unit, dist)
+
+
+def preset_ruin(config, difficulty, outcomes, rounds, bet=None):
+    """Расчет разорения для пресета сложности (баланс и ставки из конфига)"""
+    preset = config.get('difficulty', difficulty, default={})
+    starting_balance = preset.get('starting_balance', config.get('game', 'starting_balance'))
+    min_bet = config.get('game', 'min_bet')
+    max_bet = preset.get('max_bet', config.get('game', 'max_bet'))
+    bet = min(max(bet if bet else min_bet, min_bet), max_bet)
+
+    return ruin_distribution(outcomes, starting_balance, bet, rounds, config.get('game', 'blackjack_payout'), min_bet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact risk of ruin per difficulty preset")
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--bet', type=int, default=None)
+    args = parser.parse_args()
+
+    config = ConfigLoader()
+    for difficulty, preset in config.get('difficulty').items():
+        outcomes = estimate_outcomes(config, preset['decks'])
+        result = preset_ruin(config, difficulty, outcomes, args.rounds, args.bet)
+        mean = float((result.balances * result.probabilities).sum() / max(result.probabilities.sum(), 1e-300))
+        print(f"{difficulty}: ruin {result.ruin_probability * 100:.2f}% after {args.rounds} rounds, "
+              f"mean surviving balance {mean:.0f}")
+
+
+if __name__ == '__main__':
+    main()
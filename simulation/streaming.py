@@ -0,0 +1,199 @@
+import math
+
+
+class Welford:
+    """Потоковое среднее и дисперсия (алгоритм Уэлфорда) за O(1) памяти"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Добавляет одно наблюдение"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Объединяет с другим аккумулятором (формула Чана)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count = other.count
+            self.mean = other.mean
+            self._m2 = other._m2
+            self.min = other.min
+            self.max = other.max
+            return
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        """Выборочная дисперсия"""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    def stddev(self):
+        """Стандартное отклонение"""
+        return math.sqrt(self.variance())
+
+    def stderr(self):
+        """Стандартная ошибка среднего"""
+        if self.count < 2:
+            return math.inf
+        return self.stddev() / math.sqrt(self.count)
+
+
+class Comoments:
+    """
+    Потоковые средние и ковариации нескольких величин (многомерный Уэлфорд)
+    Нужны для оценок-отношений вроде суммы выигрышей на сумму раундов
+    """
+
+    def __init__(self, size):
+        """size: число величин в наблюдении"""
+        self.count = 0
+        self.mean = [0.0] * size
+        self._c = [[0.0] * size for _ in range(size)]
+
+    def add(self, values):
+        """Добавляет наблюдение (последовательность из size чисел)"""
+        self.count += 1
+        before = [value - mean for value, mean in zip(values, self.mean)]
+        self.mean = [mean + delta / self.count for mean, delta in zip(self.mean, before)]
+        after = [value - mean for value, mean in zip(values, self.mean)]
+        for i, row in enumerate(self._c):
+            for j in range(len(row)):
+                row[j] += before[i] * after[j]
+
+    def covariance(self, i, j):
+        """Выборочная ковариация величин i и j"""
+        if self.count < 2:
+            return 0.0
+        return self._c[i][j] / (self.count - 1)
+
+    def linear_variance(self, weights):
+        """Выборочная дисперсия линейной комбинации величин с весами weights"""
+        return sum(wi * wj * self.covariance(i, j)
+                   for i, wi in enumerate(weights) for j, wj in enumerate(weights))
+
+
+class Drawdown:
+    """Максимальная просадка баланса от исторического пика"""
+
+    def __init__(self, start=0):
+        self.reset(start)
+
+    def reset(self, start=0):
+        """Начинает отсчет заново с баланса start"""
+        self.peak = start
+        self.max_drawdown = 0
+
+    def add(self, balance):
+        """Учитывает новый баланс"""
+        if balance > self.peak:
+            self.peak = balance
+        elif self.peak - balance > self.max_drawdown:
+            self.max_drawdown = self.peak - balance
+
+
+class TDigest:
+    """
+    Потоковые перцентили (merging t-digest, Dunning)
+    Память ограничена примерно 2 * compression центроидами
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.count = 0
+        self._centroids = []  # [среднее, вес], отсортированы по среднему
+        self._buffer = []
+        self._buffer_limit = compression * 5
+
+    def add(self, value, weight=1):
+        """Добавляет наблюдение"""
+        self._buffer.append((value, weight))
+        self.count += weight
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other):
+        """Объединяет с другим дайджестом"""
+        other._compress()
+        for mean, weight in other._centroids:
+            self._buffer.append((mean, weight))
+        self.count += other.count
+        self._compress()
+
+    def _scale(self, q):
+        """Функция масштаба k1: мелкие центроиды на хвостах, крупные в центре"""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        """Сливает буфер с центроидами"""
+        if not self._buffer:
+            return
+
+        points = sorted(self._centroids + [list(item) for item in self._buffer])
+        self._buffer = []
+
+        merged = [list(points[0])]
+        weight_so_far = 0
+        k_lower = self._scale(0.0)
+        for mean, weight in points[1:]:
+            last = merged[-1]
+            q = (weight_so_far + last[1] + weight) / self.count
+            if self._scale(min(q, 1.0)) - k_lower <= 1.0:
+                # Центроид еще не превысил допустимый размер - вливаем точку
+                total = last[1] + weight
+                last[0] += (mean - last[0]) * weight / total
+                last[1] = total
+            else:
+                weight_so_far += last[1]
+                k_lower = self._scale(weight_so_far / self.count)
+                merged.append([mean, weight])
+
+        self._centroids = merged
+
+    def quantile(self, q):
+        """Возвращает оценку квантиля q (0..1)"""
+        self._compress()
+        if not self._centroids:
+            return math.nan
+        if len(self._centroids) == 1:
+            return self._centroids[0][0]
+
+        # Каждый центроид "стоит" в середине своего веса; интерполируем между соседями
+        target = q * self.count
+        prev_mean, prev_center = None, None
+        cumulative = 0
+        for mean, weight in self._centroids:
+            center = cumulative + weight / 2
+            if target <= center:
+                if prev_mean is None:
+                    return mean
+                return prev_mean + (mean - prev_mean) * (target - prev_center) / (center - prev_center)
+            prev_mean, prev_center = mean, center
+            cumulative += weight
+
+        return self._centroids[-1][0]
+
+    def percentiles(self, points=(1, 5, 25, 50, 75, 95, 99)):
+        """Возвращает словарь {перцентиль: значение}"""
+        return {p: self.quantile(p / 100) for p in points}
@@ -0,0 +1,217 @@
+import argparse
+import time
+
+import numpy as np
+
+from config.config_loader import ConfigLoader
+from game.deck import SUITS, RANKS
+
+STAND = 0
+HIT = 1
+
+# Столбцы наблюдения: сумма игрока, мягкая ли рука, открытая карта дилера
+TOTAL = 0
+SOFT = 1
+UPCARD = 2
+# Далее (если включено) - неизвестные игроку карты по очкам 2..11
+CARD_VALUES = range(2, 12)
+
+
+class BlackjackVectorEnv:
+    """
+    Векторная среда в стиле Gym: N столов, эпизод = один раунд GameManager
+    Состояние столов хранится в массивах NumPy, раздача и ход дилера
+    выполняются сразу для всех столов; завершенные раунды перезапускаются
+    автоматически. Награда - чистый результат раунда в ставках
+    """
+
+    def __init__(self, config, num_envs=1024, difficulty='medium', composition=False, seed=None):
+        """
+        config: объект ConfigLoader
+        num_envs: число столов
+        difficulty: пресет сложности (число колод)
+        composition: добавлять в наблюдение состав неизвестных карт
+        seed: зерно генератора
+        """
+        self.num_envs = num_envs
+        self.composition = composition
+        self.stand_value = config.get('game', 'dealer_stand_value')
+        self.blackjack_payout = config.get('game', 'blackjack_payout')
+        num_decks = config.get('difficulty', difficulty, 'decks', default=1)
+
+        card_values = config.get('card_values')
+        template = np.array([card_values[rank] for rank in RANKS] * len(SUITS) * num_decks, dtype=np.int8)
+        self.shoe_size = len(template)
+        self._template = template
+        self._full_counts = np.bincount(template - CARD_VALUES.start, minlength=len(CARD_VALUES))
+
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+        self._rows = np.arange(num_envs)
+
+        # Башмаки всех столов: строка - перетасованный башмак, pos - следующая карта
+        self.shoes = np.empty((num_envs, self.shoe_size), dtype=np.int8)
+        self.pos = np.zeros(num_envs, dtype=np.int32)
+        self.counts = np.empty((num_envs, len(CARD_VALUES)), dtype=np.int16)
+
+        self.player = np.zeros(num_envs, dtype=np.int32)
+        self.player_soft = np.zeros(num_envs, dtype=np.int32)
+        self.dealer = np.zeros(num_envs, dtype=np.int32)
+        self.dealer_soft = np.zeros(num_envs, dtype=np.int32)
+        self.hole = np.zeros(num_envs, dtype=np.int8)
+        self.upcard = np.zeros(num_envs, dtype=np.int8)
+        self.natural = np.zeros(num_envs, dtype=bool)
+
+        self.observation_size = 3 + (len(CARD_VALUES) if composition else 0)
+        self.episodes = 0
+        self.steps = 0
+
+    def _reshuffle(self, rows):
+        """Новые перетасованные башмаки для столов rows"""
+        self.shoes[rows] = self.rng.permuted(np.broadcast_to(self._template, (len(rows), self.shoe_size)), axis=1)
+        self.pos[rows] = 0
+        self.counts[rows] = self._full_counts
+
+    def _deal(self, rows):
+        """Карта каждому из столов rows; пустой башмак пересоздается, как в Deck"""
+        empty = rows[self.pos[rows] == self.shoe_size]
+        if len(empty):
+            self._reshuffle(empty)
+        values = self.shoes[rows, self.pos[rows]].astype(np.int32)
+        self.pos[rows] += 1
+        self.counts[rows, values - CARD_VALUES.start] -= 1
+        return values
+
+    @staticmethod
+    def _add(total, soft, values):
+        """Добавляет карты к суммам, пересчитывая тузы 11 -> 1 (как HeadlessRound._add)"""
+        total = total + values
+        soft = soft + (values == 11)
+        while True:
+            over = (total > 21) & (soft > 0)
+            if not over.any():
+                return total, soft
+            total -= 10 * over
+            soft -= over
+
+    def _start_rounds(self, rows):
+        """Раздача по 2 карты в порядке GameManager: игрок, дилер, игрок, дилер"""
+        zeros = np.zeros(len(rows), dtype=np.int32)
+        player, player_soft = self._add(zeros, zeros, self._deal(rows))
+        self.hole[rows] = self._deal(rows)
+        player, player_soft = self._add(player, player_soft, self._deal(rows))
+        upcard = self._deal(rows)
+
+        dealer, dealer_soft = self._add(zeros, zeros, self.hole[rows].astype(np.int32))
+        dealer, dealer_soft = self._add(dealer, dealer_soft, upcard)
+
+        self.player[rows] = player
+        self.player_soft[rows] = player_soft
+        self.upcard[rows] = upcard
+        self.dealer[rows] = dealer
+        self.dealer_soft[rows] = dealer_soft
+        self.natural[rows] = player == 21
+
+    def _observe(self, rows=None):
+        rows = self._rows if rows is None else rows
+        columns = [self.player[rows], self.player_soft[rows] > 0, self.upcard[rows]]
+        observation = np.stack(columns, axis=1).astype(np.int32)
+        if not self.composition:
+            return observation
+
+        # Закрытая карта дилера игроку неизвестна - считаем ее среди неизвестных
+        unseen = self.counts[rows].astype(np.int32)
+        unseen[np.arange(len(rows)), self.hole[rows] - CARD_VALUES.start] += 1
+        return np.concatenate([observation, unseen], axis=1)
+
+    def reset(self, seed=None):
+        """Новые башмаки и раунды на всех столах; возвращает наблюдения (N, observation_size)"""
+        if seed is not None:
+            self.rng = np.random.Generator(np.random.PCG64(seed))
+        self._reshuffle(self._rows)
+        self._start_rounds(self._rows)
+        return self._observe()
+
+    def _dealer_play(self, rows):
+        """Дилер берет до stand_value на столах rows"""
+        dealer = self.dealer[rows]
+        dealer_soft = self.dealer_soft[rows]
+        drawing = dealer < self.stand_value
+        while drawing.any():
+            active = rows[drawing]
+            values = self._deal(active)
+            dealer[drawing], dealer_soft[drawing] = self._add(dealer[drawing], dealer_soft[drawing], values)
+            drawing = dealer < self.stand_value
+        self.dealer[rows] = dealer
+        self.dealer_soft[rows] = dealer_soft
+
+    def step(self, actions):
+        """
+        Один ход на всех столах
+        actions: массив (N,) из STAND/HIT; на столах с блекджеком игрока действие не важно
+        Возвращает (наблюдения, награды, завершен ли раунд, info);
+        для завершенных раундов наблюдение уже от нового раунда,
+        последнее наблюдение раунда - в info['final_observation']
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        done = self.natural.copy()
+
+        # Блекджек игрока: ничья при 21 у дилера, иначе выплата blackjack_payout
+        naturals = self._rows[done]
+        rewards[naturals] = np.where(self.dealer[naturals] == 21, 0.0, self.blackjack_payout)
+
+        # Добор
+        hitting = self._rows[~done & (actions == HIT)]
+        if len(hitting):
+            self.player[hitting], self.player_soft[hitting] = self._add(
+                self.player[hitting], self.player_soft[hitting], self._deal(hitting))
+            busted = hitting[self.player[hitting] > 21]
+            rewards[busted] = -1.0
+            done[busted] = True
+
+        # Остановка: ход дилера и сравнение сумм
+        standing = self._rows[~self.natural & (actions != HIT)]
+        if len(standing):
+            self._dealer_play(standing)
+            player = self.player[standing]
+            dealer = self.dealer[standing]
+            rewards[standing] = np.where((dealer > 21) | (dealer < player), 1.0,
+                                         np.where(dealer > player, -1.0, 0.0))
+            done[standing] = True
+
+        info = {}
+        finished = self._rows[done]
+        if len(finished):
+            info['final_observation'] = self._observe(finished)
+            self._start_rounds(finished)
+            self.episodes += len(finished)
+        self.steps += self.num_envs
+        return self._observe(), rewards, done, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized environment throughput check")
+    parser.add_argument('--envs', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--difficulty', default='medium')
+    parser.add_argument('--composition', action='store_true')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    env = BlackjackVectorEnv(ConfigLoader(), args.envs, args.difficulty, args.composition, args.seed)
+    observation = env.reset()
+    total_reward = 0.0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        # Стратегия по умолчанию: брать до 17
+        actions = np.where(observation[:, TOTAL] < 17, HIT, STAND)
+        observation, rewards, done, _ = env.step(actions)
+        total_reward += float(rewards.sum())
+    elapsed = time.perf_counter() - start
+
+    print(f"{env.steps:,} steps in {elapsed:.2f}s: {env.steps / elapsed * 60:,.0f} steps/min, "
+          f"{env.episodes:,} rounds, mean reward per round {total_reward / max(env.episodes, 1):+.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import os
+import threading
+
+import pytest
+
+from config.config_loader import ConfigLoader
+from simulation.cluster import Checkpoint, Coordinator, run_worker, study_keys
+from simulation.engine import hit_below_17
+
+
+def _study(**changes):
+    rules, policy_table = study_keys(ConfigLoader(), hit_below_17)
+    study = {'difficulty': 'easy', 'policy': 'hit17', 'seed': 1, 'rules': rules, 'policy_table': policy_table}
+    study.update(changes)
+    return study
+
+
+def test_checkpoint_rejects_changed_rules(tmp_path):
+    path = str(tmp_path / 'study.json')
+    checkpoint = Checkpoint(path, _study())
+    checkpoint.add(0, {'rounds': 3})
+    assert os.listdir(tmp_path) == ['study.json']
+
+    assert Checkpoint(path, _study()).finished == {0}
+    with pytest.raises(ValueError):
+        Checkpoint(path, _study(rules='0' * 64))
+    with pytest.raises(ValueError):
+        Checkpoint(path, _study(policy_table='0' * 64))
+
+
+def test_worker_refuses_mismatched_study():
+    coordinator = Coordinator(_study(rules='0' * 64), shoes=2, chunk=1, address=('127.0.0.1', 0))
+    server = threading.Thread(target=coordinator._server.serve_forever, daemon=True)
+    server.start()
+    try:
+        run_worker('127.0.0.1', coordinator.address[1], name='test', retry=5.0)
+    finally:
+        coordinator._server.shutdown()
+        coordinator._server.server_close()
+
+    # Отрезок не засчитан и вернулся в очередь
+    assert coordinator.progress() == (0, 2)
+    assert sorted(coordinator._pending) == [0, 1]
@@ -0,0 +1,51 @@
+import os
+
+from game.hand_history import HandHistoryReader, HandHistoryWriter, MAX_ACTIONS, MAX_CARDS, np
+
+SUITS = ['hearts', 'diamonds', 'clubs', 'spades']
+
+
+def _longest_hand():
+    """21 туз из 6 колод и король: самая длинная возможная рука игрока"""
+    aces = [('A', SUITS[i % 4]) for i in range(21)]
+    return aces + [('K', 'spades')]
+
+
+def test_longest_multi_deck_hand_round_trip(tmp_path):
+    path = str(tmp_path / 'history.bjh')
+    player = _longest_hand()
+    dealer = [('A', 'hearts')] * 16 + [('2', 'clubs')]
+    actions = ['hit'] * 20
+    assert len(player) == MAX_CARDS and len(actions) == MAX_ACTIONS
+
+    with HandHistoryWriter(path) as writer:
+        writer.append(1, 0, player, dealer, actions, bet=10, payout=-10, balance=990, outcome='bust')
+        writer.append(1, 1, player[:2], dealer[:2], ['stand'], bet=10, payout=10, balance=1000, outcome='win')
+
+    with HandHistoryReader(path) as reader:
+        record = reader.get(1, 0)
+        assert record.player_cards == player
+        assert record.dealer_cards == dealer
+        assert record.actions == actions
+        assert (record.outcome, record.balance) == ('bust', 990)
+        assert reader.get(1, 1).actions == ['stand']
+        if np is not None:
+            columns = reader.columns()
+            assert list(columns['balance']) == [990, 1000]
+            assert list(columns['player_count']) == [22, 2]
+            del columns
+
+
+def test_index_is_replaced_and_rebuilt_when_stale(tmp_path):
+    path = str(tmp_path / 'history.bjh')
+    with HandHistoryWriter(path, buffer_records=1) as writer:
+        for round_no in range(5):
+            writer.append(7, round_no, [('10', 'hearts'), ('7', 'clubs')], [('9', 'spades'), ('9', 'hearts')])
+    assert sorted(os.listdir(tmp_path)) == ['history.bjh', 'history.bjh.idx']
+
+    # Индекс от более короткого файла - читатель строит его заново
+    with open(path + '.idx', 'r+b') as index_file:
+        index_file.truncate(0)
+    with HandHistoryReader(path) as reader:
+        assert reader.seek(7, 4) == 4
+        assert reader.index == {7: [(0, 0, 5)]}
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+from simulation.policy_table import PolicyTable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Жесткие 16: при счете ниже 0 - брать против 7..A, от 0 и выше - всегда стоять
+COUNTED_SOURCE = {
+    "count_edges": [0],
+    "buckets": [
+        {"hard": {"16": "SSSSSHHHHH"}},
+        {"hard": {"16": "SSSSSSSSSS"}},
+    ],
+}
+
+
+def _check_buckets(table):
+    assert table.counted
+    assert table.buckets == 2
+    assert table.count_edges == (0.0,)
+    assert table(16, False, 10, -1.0)
+    assert not table(16, False, 10, 1.0)
+    assert not table(16, False, 6, -1.0)
+    # Неуказанные суммы - брать до 17 в обеих корзинах
+    assert table(15, False, 10, 1.0)
+    assert not table(17, False, 10, -1.0)
+
+
+def test_counted_json_round_trip(tmp_path):
+    source = tmp_path / "counted.json"
+    source.write_text(json.dumps(COUNTED_SOURCE))
+    compiled = tmp_path / "counted.policy"
+
+    PolicyTable.load(str(source)).save(str(compiled))
+    with PolicyTable.load(str(compiled)) as table:
+        _check_buckets(table)
+
+
+def test_cli_compile_keeps_count_buckets(tmp_path):
+    source = tmp_path / "counted.json"
+    source.write_text(json.dumps(COUNTED_SOURCE))
+    compiled = tmp_path / "counted.policy"
+
+    subprocess.run([sys.executable, '-m', 'simulation.policy_table', 'compile', str(source), str(compiled)],
+                   cwd=ROOT, check=True, capture_output=True)
+    with PolicyTable.load(str(compiled)) as table:
+        _check_buckets(table)
@@ -0,0 +1,38 @@
+import pytest
+
+from config.config_loader import ConfigLoader
+from game.deck import Deck
+from game.shuffler import create_shuffler
+
+SHUFFLERS = ['seeded']
+try:
+    import numpy  # noqa: F401
+    SHUFFLERS.append('pcg64')
+except ImportError:
+    pass
+
+
+def _deal(deck, cards=10):
+    return [(card.rank, card.suit) for card in (deck.deal_card() for _ in range(cards))]
+
+
+@pytest.mark.parametrize('name', SHUFFLERS)
+def test_sibling_forks_get_distinct_streams(name):
+    config = ConfigLoader()
+    deck = Deck(config, 6, shuffler=create_shuffler(name, 5), continuous=True)
+    reference = Deck(config, 6, shuffler=create_shuffler(name, 5), continuous=True)
+
+    forks = [_deal(deck.fork()) for _ in range(4)]
+    assert len(set(map(tuple, forks))) == 4
+    # Копии не расходуют поток игры
+    assert _deal(deck, 50) == _deal(reference, 50)
+
+
+@pytest.mark.parametrize('name', SHUFFLERS)
+def test_forks_are_reproducible(name):
+    config = ConfigLoader()
+    runs = []
+    for _ in range(2):
+        deck = Deck(config, 6, shuffler=create_shuffler(name, 5), continuous=True)
+        runs.append([_deal(deck.fork()) for _ in range(3)])
+    assert runs[0] == runs[1]
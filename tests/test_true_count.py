@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from config.config_loader import ConfigLoader
+from game.deck import Deck
+from game.game_manager import GameManager
+from game.shuffler import create_shuffler
+from simulation.compare import SharedShoe
+from simulation.engine import FastShoe
+
+
+def _tag(value):
+    return 1 if value <= 6 else -1 if value >= 10 else 0
+
+
+def _recount(game_manager):
+    """Истинный счет пересчетом: невидимые карты - колода и закрытая карта дилера"""
+    unseen = [card.value for card in game_manager.deck.cards]
+    unseen += [card.value for card in game_manager.dealer.hand if not card.face_up]
+    return -sum(map(_tag, unseen)) / max(len(unseen) / 52, 0.5)
+
+
+@pytest.mark.parametrize('continuous', [False, True])
+def test_deck_count_matches_recount_and_skips_hole_card(continuous):
+    config = ConfigLoader()
+    game_manager = GameManager(config, None, record_stats=False, dealer_delay=0,
+                               shuffler=create_shuffler('seeded', 3))
+    game_manager.deck = Deck(config, 1, shuffler=create_shuffler('seeded', 3), continuous=continuous)
+    game_manager.player.balance = 10 ** 9
+    rng = random.Random(3)
+
+    # Несколько башмаков: счет переживает пересоздание колоды и сброс в машину
+    for _ in range(200):
+        game_manager.start_new_round()
+        reshuffles = game_manager.deck.reshuffles
+        game_manager.place_bet(game_manager.min_bet)
+        while game_manager.get_state() == "playing":
+            assert game_manager.deck.true_count() == pytest.approx(_recount(game_manager))
+            snapshot = game_manager.snapshot()
+            expected = game_manager.deck.true_count()
+            game_manager.fork().player_hit()
+            game_manager.restore(snapshot)
+            assert game_manager.deck.true_count() == expected
+            if rng.random() < 0.5:
+                game_manager.player_hit()
+            else:
+                game_manager.player_stand()
+        # После перебора закрытая карта не открыта; если башмак сменился посреди раунда,
+        # она из прежнего башмака и в новый счет не входит
+        if not continuous and game_manager.deck.reshuffles == reshuffles:
+            assert game_manager.deck.true_count() == pytest.approx(_recount(game_manager))
+
+
+def test_fast_shoe_hides_hole_card_until_round_end():
+    config = ConfigLoader()
+    shoe = FastShoe(config, 1, random.Random(1))
+    shoe.deal()
+    hole = shoe.deal()
+    shoe.hide(hole)
+    unseen = shoe.cards + [hole]
+    assert shoe.true_count() == pytest.approx(-sum(map(_tag, unseen)) / max(len(unseen) / 52, 0.5))
+
+    shoe.end_round()
+    assert shoe.true_count() == pytest.approx(-sum(map(_tag, shoe.cards)) / max(len(shoe.cards) / 52, 0.5))
+
+
+def test_shared_shoe_matches_fast_shoe():
+    config = ConfigLoader()
+    fast = FastShoe(config, 2, random.Random(5))
+    shared = SharedShoe(FastShoe(config, 2, random.Random(5)))
+    for _ in range(20):
+        for deal in range(4):
+            value = fast.deal()
+            assert shared.deal() == value
+            if deal == 1:
+                fast.hide(value)
+                shared.hide(value)
+            assert shared.true_count() == pytest.approx(fast.true_count())
+        fast.end_round()
+        shared.end_round()
@@ -1,5 +1,8 @@
 import pygame
 
+# Размер шрифта надписи в виртуальных пикселях
+FONT_SIZE = 32
+
 
 class Button:
     """Класс кнопки для игрового интерфейса"""
@@ -26,10 +29,15 @@ class Button:
         self.text_color = config.get('colors', 'text_white')
 
         # Шрифт для текста
-        self.font = pygame.font.Font(None, 32)
+        self.font = pygame.font.Font(None, FONT_SIZE)
+        self._label_key = None
+        self._label_surface = None
 
-    def draw(self, surface):
-        """Отрисовка кнопки"""
+    def draw(self, surface, layout=None):
+        """
+        Отрисовка кнопки
+        layout: разметка окна (None - rect в пикселях окна)
+        """
         # Выбор цвета в зависимости от состояния
         if not self.enabled:
             color = self.color_disabled
@@ -38,35 +46,25 @@ class Button:
         else:
             color = self.color_normal
 
+        rect = layout.rect(self.rect) if layout else self.rect
+
         # Рисуем прямоугольник кнопки
-        pygame.draw.rect(surface, color, self.rect)
-        pygame.draw.rect(surface, self.text_color, self.rect, 2)  # Обводка
+        pygame.draw.rect(surface, color, rect)
+        pygame.draw.rect(surface, self.text_color, rect, layout.length(2) if layout else 2)  # Обводка
 
         # Рисуем текст по центру
-        text_surface = self.font.render(self.text, True, self.text_color)
-        text_rect = text_surface.get_rect(center=self.rect.center)
+        text_surface = self._label(layout)
+        text_rect = text_surface.get_rect(center=rect.center)
         surface.blit(text_surface, text_rect)
 
-    def handle_event(self, event):
-        """
-        Обработка событий мыши
-        Возвращает True если кнопка была нажата
-        """
-        if not self.enabled:
-            return False
-
-        # Проверка наведения мыши
-        if event.type == pygame.MOUSEMOTION:
-            self.hovered = self.rect.collidepoint(event.pos)
-
-        # Проверка клика
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            if self.rect.collidepoint(event.pos):
-                if self.action:
-                    self.action()
-                return True
-
-        return False
+    def _label(self, layout):
+        """Надпись кнопки; перерисовывается только при смене текста или масштаба"""
+        key = (self.text, layout.generation if layout else None)
+        if self._label_key != key:
+            font = layout.font(FONT_SIZE) if layout else self.font
+            self._label_surface = font.render(self.text, True, self.text_color)
+            self._label_key = key
+        return self._label_surface
 
     def set_enabled(self, enabled):
         """Включить/выключить кнопку"""
@@ -75,10 +73,3 @@ class Button:
     def set_text(self, text):
         """Изменить текст кнопки"""
         self.text = text
-
-    def is_hovered(self):
-        """Проверка наведения мыши"""
-        if not self.enabled:
-            return False
-        pos = pygame.mouse.get_pos()
-        return self.rect.collidepoint(pos)
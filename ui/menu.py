@@ -1,19 +1,52 @@
+import threading
+
 import pygame
 from ui.button import Button
+from ui.widget_tree import WidgetScreen
+from game.round_stats import RoundStatsAggregator
+from simulation.analytics import AnalyticsCache
+from simulation.policy_table import PolicyTable
+
+try:
+    from simulation.risk import preset_ruin
+except ImportError:  # NumPy не установлен - шансы разорения не показываем
+    preset_ruin = None
+
+# Горизонт расчета шансов разорения на экране настроек
+RUIN_ROUNDS = 1000
+
+
+def _money(amount):
+    """Сумма со знаком: +$10 / -$10"""
+    return f"{'-' if amount < 0 else '+'}${abs(amount)}"
 
 
 class Menu:
     """Класс меню игры"""
 
-    def __init__(self, screen, config, renderer):
+    def __init__(self, screen, config, renderer, round_stats=None):
         """
         screen: объект pygame.display
         config: объект ConfigLoader
         renderer: объект Renderer
+        round_stats: объект RoundStatsAggregator (если None - создается свой)
         """
         self.screen = screen
         self.config = config
         self.renderer = renderer
+        self.round_stats = round_stats if round_stats else RoundStatsAggregator(config)
+
+        # Преимущество казино и шансы разорения по пресетам {сложность: вероятность};
+        # аналитика берется из кэша на диске (при первом запуске считается в фоне)
+        self.house_edges = {}
+        self.ruin_odds = {}
+        # Скомпилированные таблицы стратегии {сложность: PolicyTable} - для автоигры
+        self.chart_policies = {}
+        self._analytics_thread = None
+
+        # Готовые строки экрана статистики, пересобираются только при изменении статистики
+        self._stats_lines = []
+        self._stats_version = None
 
         self.width = config.get('game', 'screen_width')
         self.height = config.get('game', 'screen_height')
@@ -26,6 +59,14 @@ class Menu:
         self._create_settings_buttons()
         self._create_stats_buttons()
 
+        # Экраны меню с индексом попаданий для диспетчеризации событий
+        self.screens = {
+            "main": self._build_screen(self.main_buttons),
+            "settings": self._build_screen(self.settings_buttons),
+            "stats": self._build_screen(self.stats_buttons),
+        }
+        self.mouse_pos = (0, 0)
+
     def _create_main_menu_buttons(self):
         """Создает кнопки главного меню"""
         center_x = self.width // 2 - 100
@@ -33,10 +74,12 @@ class Menu:
         button_spacing = 80
 
         self.main_buttons = [
-            Button(center_x, start_y, 200, 60, "PLAY", self.config),
-            Button(center_x, start_y + button_spacing, 200, 60, "SETTINGS", self.config),
-            Button(center_x, start_y + button_spacing * 2, 200, 60, "STATS", self.config),
-            Button(center_x, start_y + button_spacing * 3, 200, 60, "EXIT", self.config)
+            Button(center_x, start_y, 200, 60, "PLAY", self.config, lambda: "play"),
+            Button(center_x, start_y + button_spacing, 200, 60, "SETTINGS", self.config,
+                   lambda: self._switch_screen("settings")),
+            Button(center_x, start_y + button_spacing * 2, 200, 60, "STATS", self.config,
+                   lambda: self._switch_screen("stats")),
+            Button(center_x, start_y + button_spacing * 3, 200, 60, "EXIT", self.config, lambda: "exit")
         ]
 
     def _create_settings_buttons(self):
@@ -46,10 +89,13 @@ class Menu:
         button_spacing = 80
 
         self.settings_buttons = [
-            Button(center_x, start_y, 200, 60, "EASY", self.config),
-            Button(center_x, start_y + button_spacing, 200, 60, "MEDIUM", self.config),
-            Button(center_x, start_y + button_spacing * 2, 200, 60, "HARD", self.config),
-            Button(center_x, start_y + button_spacing * 3, 200, 60, "BACK", self.config)
+            Button(center_x, start_y, 200, 60, "EASY", self.config, lambda: self._set_difficulty("easy")),
+            Button(center_x, start_y + button_spacing, 200, 60, "MEDIUM", self.config,
+                   lambda: self._set_difficulty("medium")),
+            Button(center_x, start_y + button_spacing * 2, 200, 60, "HARD", self.config,
+                   lambda: self._set_difficulty("hard")),
+            Button(center_x, start_y + button_spacing * 3, 200, 60, "BACK", self.config,
+                   lambda: self._switch_screen("main"))
         ]
 
     def _create_stats_buttons(self):
@@ -57,9 +103,16 @@ class Menu:
         center_x = self.width // 2 - 100
 
         self.stats_buttons = [
-            Button(center_x, 550, 200, 60, "BACK", self.config)
+            Button(center_x, 550, 200, 60, "BACK", self.config, lambda: self._switch_screen("main"))
         ]
 
+    def _build_screen(self, buttons):
+        """Собирает экран из кнопок"""
+        screen = WidgetScreen()
+        for button in buttons:
+            screen.add(button)
+        return screen
+
     def draw_main_menu(self):
         """Отрисовка главного меню"""
         self.renderer.draw_background()
@@ -69,8 +122,7 @@ class Menu:
         self.renderer.draw_text_centered(title, 100, 'large', self.renderer.text_gold)
 
         # Кнопки
-        for button in self.main_buttons:
-            button.draw(self.screen)
+        self.screens["main"].draw(self.screen, self.renderer.layout)
 
     def draw_settings_menu(self):
         """Отрисовка меню настроек"""
@@ -80,13 +132,50 @@ class Menu:
         self.renderer.draw_text_centered("DIFFICULTY", 100, 'large', self.renderer.text_gold)
 
         # Описание уровней сложности
-        self.renderer.draw_text_centered("Easy: 1 deck, $1500 start", 200, 'small')
-        self.renderer.draw_text_centered("Medium: 4 decks, $1000 start", 250, 'small')
-        self.renderer.draw_text_centered("Hard: 6 decks, $500 start", 300, 'small')
+        self.start_analytics()
+        descriptions = [
+            ("easy", "Easy: 1 deck, $1500 start"),
+            ("medium", "Medium: 4 decks, $1000 start"),
+            ("hard", "Hard: 6 decks, $500 start"),
+        ]
+        for i, (difficulty, text) in enumerate(descriptions):
+            if difficulty in self.house_edges:
+                text += f" - edge {self.house_edges[difficulty] * 100:.1f}%"
+            if difficulty in self.ruin_odds:
+                text += f", ruin {self.ruin_odds[difficulty] * 100:.0f}%"
+            self.renderer.draw_text_centered(text, 200 + i * 50, 'small')
+
+        if preset_ruin:
+            min_bet = self.config.get('game', 'min_bet')
+            self.renderer.draw_text_centered(f"Edge and ruin with the chart: {RUIN_ROUNDS} rounds at ${min_bet} flat", 150, 'small')
 
         # Кнопки
-        for button in self.settings_buttons:
-            button.draw(self.screen)
+        self.screens["settings"].draw(self.screen, self.renderer.layout)
+
+    def start_analytics(self):
+        """
+        Один раз запускает фоновую загрузку аналитики, компиляцию таблиц стратегии
+        и расчет шансов разорения
+        """
+        if self._analytics_thread is not None:
+            return
+        self._analytics_thread = threading.Thread(target=self._load_analytics, daemon=True)
+        self._analytics_thread.start()
+
+    def _load_analytics(self):
+        """Читает кэш аналитики (пересчитывает при смене правил) и считает шансы разорения"""
+        with AnalyticsCache(self.config) as cache:
+            for difficulty in self.config.get('difficulty'):
+                # Преимущество казино при игре по таблице стратегии и сама таблица
+                self.house_edges[difficulty] = cache.house_edge(difficulty, strategy=True)
+                self.chart_policies[difficulty] = PolicyTable.compile(cache.policy(difficulty))
+
+            # Шансы разорения считаются дольше - после того, как таблицы готовы
+            for difficulty in self.config.get('difficulty'):
+                if preset_ruin:
+                    # Шансы разорения - для той же стратегии по таблице, что и преимущество
+                    result = preset_ruin(self.config, difficulty, cache.strategy_outcomes(difficulty), RUIN_ROUNDS)
+                    self.ruin_odds[difficulty] = result.ruin_probability
 
     def draw_stats_menu(self):
         """Отрисовка меню статистики"""
@@ -95,29 +184,63 @@ class Menu:
         # Заголовок
         self.renderer.draw_text_centered("STATISTICS", 100, 'large', self.renderer.text_gold)
 
-        # Получаем статистику
-        stats = self.config.get('stats')
-
-        # Отображаем статистику
-        y_pos = 200
-        line_spacing = 50
+        if self._stats_version != self.round_stats.version:
+            self._build_stats_lines()
 
-        self.renderer.draw_text_centered(f"Total Games: {stats['total_games']}", y_pos, 'medium')
-        self.renderer.draw_text_centered(f"Wins: {stats['wins']}", y_pos + line_spacing, 'medium', (0, 255, 0))
-        self.renderer.draw_text_centered(f"Losses: {stats['losses']}", y_pos + line_spacing * 2, 'medium', (255, 0, 0))
-        self.renderer.draw_text_centered(f"Blackjacks: {stats['blackjacks']}", y_pos + line_spacing * 3, 'medium',
-                                         self.renderer.text_gold)
-        self.renderer.draw_text_centered(f"Highest Balance: ${stats['highest_balance']}", y_pos + line_spacing * 4,
-                                         'medium', self.renderer.text_gold)
-
-        # Процент побед
-        if stats['total_games'] > 0:
-            win_rate = (stats['wins'] / stats['total_games']) * 100
-            self.renderer.draw_text_centered(f"Win Rate: {win_rate:.1f}%", y_pos + line_spacing * 5, 'medium')
+        for text, x, y, font, color in self._stats_lines:
+            self.renderer.draw_text(text, x, y, font, color)
 
         # Кнопки
-        for button in self.stats_buttons:
-            button.draw(self.screen)
+        self.screens["stats"].draw(self.screen, self.renderer.layout)
+
+    def _build_stats_lines(self):
+        """Форматирует строки статистики из готовых значений агрегатора"""
+        stats = self.round_stats
+        gold = self.renderer.text_gold
+        green = (0, 255, 0)
+        red = (255, 0, 0)
+
+        left_x = 80
+        right_x = 520
+        y_pos = 170
+        line_spacing = 40
+
+        # Левая колонка: общая статистика
+        left = [
+            ("LIFETIME", gold),
+            (f"Total Games: {stats.total_games}", None),
+            (f"Wins: {stats.wins}", green),
+            (f"Losses: {stats.losses}", red),
+            (f"Blackjacks: {stats.blackjacks}", gold),
+            (f"Highest Balance: ${stats.highest_balance}", gold),
+            (f"Win Rate: {stats.win_rate:.1f}%", None),
+        ]
+
+        # Правая колонка: скользящие окна, серии, сессия и сложность
+        right = [("RECENT", gold)]
+        for size, window in stats.windows.items():
+            right.append((f"Last {size}: {window.wins}-{window.losses}-{window.pushes} "
+                          f"({window.win_rate():.0f}%) {_money(window.net)}", None))
+
+        if stats.streak > 0:
+            streak = f"{stats.streak} wins"
+        elif stats.streak < 0:
+            streak = f"{-stats.streak} losses"
+        else:
+            streak = "-"
+        right.append((f"Streak: {streak}", None))
+        right.append((f"Longest: {stats.longest_win_streak}W / {stats.longest_loss_streak}L", None))
+        right.append((f"Session: {_money(stats.session_net)} in {stats.session_rounds}", gold))
+
+        for difficulty, split in stats.by_difficulty.items():
+            rate = split['wins'] / split['rounds'] * 100 if split['rounds'] else 0.0
+            right.append((f"{str(difficulty).capitalize()}: {rate:.0f}% {_money(split['net'])}", None))
+
+        self._stats_lines = []
+        for column, x in ((left, left_x), (right, right_x)):
+            for i, (text, color) in enumerate(column):
+                self._stats_lines.append((text, x, y_pos + i * line_spacing, 'small', color))
+        self._stats_version = stats.version
 
     def draw(self):
         """Отрисовка текущего экрана меню"""
@@ -133,57 +256,18 @@ class Menu:
         Обработка событий меню
         Возвращает действие: 'play', 'exit', None
         """
-        if self.current_screen == "main":
-            return self._handle_main_menu_event(event)
-        elif self.current_screen == "settings":
-            return self._handle_settings_event(event)
-        elif self.current_screen == "stats":
-            return self._handle_stats_event(event)
-
-        return None
-
-    def _handle_main_menu_event(self, event):
-        """Обработка событий главного меню"""
-        for i, button in enumerate(self.main_buttons):
-            button.handle_event(event)
-
-            if event.type == pygame.MOUSEBUTTONDOWN and button.is_hovered():
-                if i == 0:  # PLAY
-                    return "play"
-                elif i == 1:  # SETTINGS
-                    self.current_screen = "settings"
-                elif i == 2:  # STATS
-                    self.current_screen = "stats"
-                elif i == 3:  # EXIT
-                    return "exit"
-
-        return None
-
-    def _handle_settings_event(self, event):
-        """Обработка событий меню настроек"""
-        for i, button in enumerate(self.settings_buttons):
-            button.handle_event(event)
-
-            if event.type == pygame.MOUSEBUTTONDOWN and button.is_hovered():
-                if i == 0:  # EASY
-                    self._set_difficulty("easy")
-                elif i == 1:  # MEDIUM
-                    self._set_difficulty("medium")
-                elif i == 2:  # HARD
-                    self._set_difficulty("hard")
-                elif i == 3:  # BACK
-                    self.current_screen = "main"
-
-        return None
-
-    def _handle_stats_event(self, event):
-        """Обработка событий меню статистики"""
-        for button in self.stats_buttons:
-            button.handle_event(event)
-
-            if event.type == pygame.MOUSEBUTTONDOWN and button.is_hovered():
-                self.current_screen = "main"
-
+        if event.type == pygame.MOUSEMOTION:
+            self.mouse_pos = event.pos
+
+        screen = self.screens.get(self.current_screen)
+        if screen is None:
+            return None
+        return screen.dispatch(event)
+
+    def _switch_screen(self, name):
+        """Переключает экран меню и обновляет подсветку кнопок"""
+        self.current_screen = name
+        self.screens[name].update_hover(self.mouse_pos)
         return None
 
     def _set_difficulty(self, difficulty):
@@ -191,12 +275,18 @@ class Menu:
         difficulty_settings = self.config.get('difficulty', difficulty)
 
         # Сохраняем настройки в основной конфиг
+        self.config.set('game', 'difficulty', value=difficulty)
         self.config.set('game', 'starting_balance', value=difficulty_settings['starting_balance'])
         self.config.save_config()
 
         # Возвращаемся в главное меню
-        self.current_screen = "main"
+        self._switch_screen("main")
 
-    def reset_to_main(self):
-        """Возврат в главное меню"""
-        self.current_screen = "main"
+    def reset_to_main(self, mouse_pos=None):
+        """
+        Возврат в главное меню
+        mouse_pos: последняя известная позиция мыши (для подсветки кнопок)
+        """
+        if mouse_pos is not None:
+            self.mouse_pos = mouse_pos
+        self._switch_screen("main")
@@ -0,0 +1,297 @@
+import argparse
+import math
+import os
+import random
+import time
+
+import pygame
+from config.config_loader import ConfigLoader
+from game.autoplay import AutoPlayer
+from game.card import Card
+from game.game_manager import GameManager, RESULT_MESSAGES
+from game.renderer import Renderer
+from game.shuffler import create_shuffler
+from game.spectator import SpectatorClient, parse_address
+from simulation.analytics import load_policy
+
+
+class SimulatedTable:
+    """Стол монитора, который играет сам: GameManager и автоигра в темпе живого дилера"""
+
+    def __init__(self, config, name, seed=None, action_interval=0.4, policy=None):
+        """
+        config: объект ConfigLoader
+        name: подпись стола
+        seed: зерно тасования и темпа
+        action_interval: среднее время между действиями в секундах
+        policy: (имя, стратегия) бота (None - стратегия автоигры из конфига)
+        """
+        self.config = config
+        self.name = name
+        self.policy = policy
+        self.seed = seed
+        self.action_interval = action_interval
+        self.rng = random.Random(seed)
+        self.dirty = True
+        self._games = 0
+        self._new_game()
+        self._next_action = time.perf_counter() + self._pause()
+
+    def _new_game(self):
+        """Новая игра с полным балансом (после game over)"""
+        seed = None if self.seed is None else self.seed + self._games
+        self._games += 1
+        # Поток подготовки башмака прошлой игры останавливается, иначе каждая игра оставляет поток
+        if self._games > 1:
+            self.game_manager.deck.close()
+        self.game_manager = GameManager(self.config, None, record_stats=False, dealer_delay=0,
+                                        shuffler=create_shuffler('seeded', seed))
+        self.game_manager.add_change_listener(self._on_change)
+        self.autoplay = AutoPlayer(self.config, self.game_manager.difficulty, self.policy)
+        self.game_manager.start_new_round()
+
+    def _on_change(self, game_manager):
+        self.dirty = True
+
+    def _pause(self):
+        return self.action_interval * self.rng.uniform(0.5, 1.5)
+
+    def advance(self, now):
+        """Делает очередное действие, если пришло его время"""
+        if now < self._next_action:
+            return
+        self._next_action = now + self._pause()
+        if self.game_manager.get_state() == "game_over":
+            self._new_game()
+        else:
+            self.autoplay.step(self.game_manager)
+
+    def draw(self, renderer):
+        """Рисует стол тем же кодом, что и игра"""
+        self.game_manager.renderer = renderer
+        self.game_manager.draw()
+
+    def close(self):
+        self.game_manager.deck.close()
+
+
+class LiveTable:
+    """Стол монитора из трансляции живой игры (game.spectator)"""
+
+    def __init__(self, config, name, address):
+        """
+        config: объект ConfigLoader
+        name: подпись стола
+        address: адрес публикатора (путь Unix-сокета или 'host:port')
+        """
+        self.config = config
+        self.name = name
+        self.client = SpectatorClient(parse_address(address))
+        self.online = True
+        self.dirty = True
+        self._cards = {}
+
+    def advance(self, now):
+        """Применяет пришедшие сообщения без ожидания"""
+        if not self.online:
+            return
+        try:
+            if self.client.receive(timeout=0):
+                self.dirty = True
+        except (ConnectionError, OSError):
+            self.online = False
+            self.dirty = True
+
+    def _card(self, card):
+        """Card для отрисовки по (ранг, масть); None - закрытая карта"""
+        if card not in self._cards:
+            if card is None:
+                drawn = Card('spades', 'A', self.config)
+                drawn.face_up = False
+            else:
+                rank, suit = card
+                drawn = Card(suit, rank, self.config)
+            self._cards[card] = drawn
+        return self._cards[card]
+
+    @staticmethod
+    def _hand_value(cards):
+        total = sum(card.value for card in cards if card.face_up)
+        aces = sum(1 for card in cards if card.face_up and card.rank == 'A')
+        while total > 21 and aces:
+            total -= 10
+            aces -= 1
+        return total
+
+    def draw(self, renderer):
+        """Рисует вид наблюдателя в раскладке GameManager.draw"""
+        view = self.client.view
+        renderer.draw_background()
+        renderer.draw_deck_info(view.cards_remaining)
+
+        dealer = [self._card(card) for card in view.dealer_cards]
+        player = [self._card(card) for card in view.player_cards]
+        renderer.draw_dealer_label(50, 50)
+        renderer.draw_hand(dealer, 250, 50, all(card.face_up for card in dealer), self._hand_value(dealer))
+        renderer.draw_player_label(50, 450)
+        renderer.draw_hand(player, 250, 450, True, self._hand_value(player))
+
+        renderer.draw_text(f"Balance: ${view.balance}", 50, 550, 'medium', renderer.text_gold)
+        if view.bet > 0:
+            renderer.draw_text(f"Bet: ${view.bet}", 50, 585, 'medium', renderer.text_white)
+
+        if not self.online:
+            renderer.draw_message("OFFLINE", (255, 0, 0))
+        elif view.state == "round_over" and view.last_outcome:
+            renderer.draw_game_result(RESULT_MESSAGES[view.last_outcome], max(view.last_net, 0))
+        elif view.state == "game_over":
+            renderer.draw_message("Game Over", (255, 0, 0))
+
+    def close(self):
+        self.client.close()
+
+
+class TableGrid:
+    """
+    Монитор нескольких столов в одном окне
+    Каждый стол рисуется своим Renderer на собственной поверхности
+    размера ячейки (Renderer масштабирует разметку сам); кадр стола
+    кэшируется, поэтому за кадр перерисовываются только изменившиеся столы
+    """
+
+    def __init__(self, screen, config, tables, columns=None):
+        """
+        screen: окно pygame
+        config: объект ConfigLoader
+        tables: столы (SimulatedTable / LiveTable)
+        columns: столбцов сетки (None - почти квадратная сетка)
+        """
+        self.screen = screen
+        self.tables = tables
+        self.columns = columns if columns else math.ceil(math.sqrt(len(tables)))
+        self.rows = math.ceil(len(tables) / self.columns)
+
+        table_size = (config.get('game', 'screen_width'), config.get('game', 'screen_height'))
+        screen_width, screen_height = screen.get_size()
+        cell_width = screen_width // self.columns
+        cell_height = screen_height // self.rows
+        # Масштаб с сохранением пропорций стола
+        scale = min(cell_width / table_size[0], cell_height / table_size[1])
+        self.cell_size = (int(table_size[0] * scale), int(table_size[1] * scale))
+
+        self.label_color = config.get('colors', 'text_gold')
+        self.font = pygame.font.Font(None, 24)
+
+        self._renderers = []
+        self._cells = []  # Область окна стола (subsurface)
+        self._cached = []  # Кадр стола в размере ячейки
+        for index in range(len(tables)):
+            column, row = index % self.columns, index // self.columns
+            rect = pygame.Rect(column * cell_width, row * cell_height, *self.cell_size)
+            surface = pygame.Surface(self.cell_size)
+            self._renderers.append(Renderer(surface, config))
+            self._cells.append(screen.subsurface(rect))
+            self._cached.append(surface)
+
+        self.frames = 0
+        self.redraws = 0
+
+    def advance(self, now=None):
+        """Продвигает все столы"""
+        now = time.perf_counter() if now is None else now
+        for table in self.tables:
+            table.advance(now)
+
+    def draw(self):
+        """
+        Перерисовывает изменившиеся столы
+        Возвращает прямоугольники окна для pygame.display.update
+        """
+        rects = []
+        for index, table in enumerate(self.tables):
+            if not table.dirty:
+                continue
+            table.dirty = False
+            table.draw(self._renderers[index])
+            self._blit(index)
+            rects.append(self._cells[index].get_abs_offset() + self.cell_size)
+            self.redraws += 1
+        self.frames += 1
+        return rects
+
+    def redraw_all(self):
+        """Выводит все столы из кэша (после того, как окно было перекрыто)"""
+        for index in range(len(self.tables)):
+            self._blit(index)
+        return [self.screen.get_rect()]
+
+    def _blit(self, index):
+        cell = self._cells[index]
+        cell.blit(self._cached[index], (0, 0))
+        label = self.font.render(self.tables[index].name, True, self.label_color)
+        cell.blit(label, label.get_rect(midtop=(self.cell_size[0] // 2, 4)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-table monitor")
+    parser.add_argument('--tables', type=int, default=9, help="Tables shown (4-16)")
+    parser.add_argument('--live', action='append', default=[], metavar='ADDRESS',
+                        help="Spectator stream of a live table (path or host:port); other seats are simulated")
+    parser.add_argument('--columns', type=int, default=None)
+    parser.add_argument('--interval', type=float, default=0.4, help="Seconds between simulated actions")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', action='append', default=[],
+                        help="Bot policy ('hit17', 'chart' or a policy table file); repeat to alternate tables")
+    parser.add_argument('--seconds', type=float, default=None, help="Exit after this many seconds")
+    parser.add_argument('--headless', action='store_true', help="Use the dummy video driver")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    if not 4 <= max(args.tables, len(args.live)) <= 16:
+        parser.error("Monitor shows 4-16 tables")
+
+    pygame.init()
+    config = ConfigLoader()
+    screen = pygame.display.set_mode((config.get('game', 'screen_width'), config.get('game', 'screen_height')))
+    pygame.display.set_caption("Table monitor")
+
+    # Каждая стратегия загружается один раз: столы делят одну таблицу
+    difficulty = config.get('game', 'difficulty', default='medium')
+    policies = [(name, load_policy(config, name, difficulty)) for name in args.policy] or [None]
+
+    tables = [LiveTable(config, f"LIVE {i + 1}", address) for i, address in enumerate(args.live)]
+    for i in range(len(tables), max(args.tables, len(tables))):
+        seed = None if args.seed is None else args.seed + i * 1000
+        tables.append(SimulatedTable(config, f"TABLE {i + 1}", seed, args.interval, policies[i % len(policies)]))
+    grid = TableGrid(screen, config, tables, args.columns)
+
+    clock = pygame.time.Clock()
+    fps = config.get('game', 'fps')
+    start = time.perf_counter()
+    running = True
+    while running:
+        rects = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                rects = grid.redraw_all()
+
+        grid.advance()
+        rects += grid.draw()
+        if rects:
+            pygame.display.update(rects)
+        clock.tick(fps)
+        if args.seconds is not None and time.perf_counter() - start >= args.seconds:
+            running = False
+
+    print(f"{grid.frames} frames, {grid.redraws} table redraws "
+          f"({grid.redraws / max(grid.frames, 1):.2f} of {len(tables)} tables per frame)")
+    for table in tables:
+        table.close()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
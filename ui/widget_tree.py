@@ -0,0 +1,110 @@
+import pygame
+
+
+def coalesce_motion(events):
+    """
+    Схлопывает MOUSEMOTION за кадр в одно событие (последнее)
+    Клики несут собственные координаты, поэтому промежуточные движения не нужны
+    """
+    last_motion = None
+    for i, event in enumerate(events):
+        if event.type == pygame.MOUSEMOTION:
+            last_motion = i
+
+    if last_motion is None:
+        return events
+    return [event for i, event in enumerate(events)
+            if event.type != pygame.MOUSEMOTION or i == last_motion]
+
+
+class WidgetScreen:
+    """
+    Набор кнопок одного экрана с индексом попаданий
+    Кнопки раскладываются по ячейкам сетки, поэтому событие проверяет
+    только кнопки своей ячейки, а не все кнопки экрана
+    """
+
+    def __init__(self, cell_size=100):
+        """cell_size: размер ячейки сетки индекса в пикселях"""
+        self.cell_size = cell_size
+        self.buttons = []
+        self._grid = {}
+        self._hovered = None
+
+        # Обработчики по типу события
+        self._handlers = {
+            pygame.MOUSEMOTION: self._on_motion,
+            pygame.MOUSEBUTTONDOWN: self._on_button_down,
+        }
+
+    def add(self, button):
+        """Добавляет кнопку на экран"""
+        self.buttons.append(button)
+        self._index_button(button)
+        return button
+
+    def _index_button(self, button):
+        """Заносит кнопку во все ячейки, которые она перекрывает"""
+        rect = button.rect
+        size = self.cell_size
+        for cell_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cell_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self._grid.setdefault((cell_x, cell_y), []).append(button)
+
+    def reindex(self):
+        """Перестраивает индекс после изменения позиций кнопок"""
+        self._grid = {}
+        for button in self.buttons:
+            self._index_button(button)
+
+    def hit_test(self, pos):
+        """Кнопка под точкой pos или None (последняя добавленная - сверху)"""
+        cell = self._grid.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not cell:
+            return None
+        for button in reversed(cell):
+            if button.rect.collidepoint(pos):
+                return button
+        return None
+
+    def dispatch(self, event):
+        """
+        Передает событие нужной кнопке
+        Возвращает результат действия нажатой кнопки или None
+        """
+        handler = self._handlers.get(event.type)
+        if handler:
+            return handler(event)
+        return None
+
+    def update_hover(self, pos):
+        """Обновляет подсветку по позиции мыши (например, при смене экрана)"""
+        button = self.hit_test(pos)
+        if button is self._hovered:
+            return
+        if self._hovered:
+            self._hovered.hovered = False
+        if button:
+            button.hovered = True
+        self._hovered = button
+
+    def _on_motion(self, event):
+        self.update_hover(event.pos)
+        return None
+
+    def _on_button_down(self, event):
+        if event.button != 1:
+            return None
+
+        button = self.hit_test(event.pos)
+        if button is None or not button.enabled or button.action is None:
+            return None
+        return button.action()
+
+    def draw(self, surface, layout=None):
+        """
+        Отрисовка всех кнопок экрана
+        layout: разметка окна; координаты кнопок и индекс остаются виртуальными
+        """
+        for button in self.buttons:
+            button.draw(surface, layout)